@@ -10,3 +10,4 @@ from pandaprosumer.run_control import *
 from pandaprosumer.run_time_series import *
 
 
+from pandaprosumer.file_io import to_binary, from_binary
@@ -2,3 +2,5 @@ from .data_model import *
 from .models import *
 from .const_profile import *
 
+from .hooks import *
+from .result_policy import *
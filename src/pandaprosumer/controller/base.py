@@ -2,6 +2,8 @@
 Module containing the BasicProsumerController class.
 """
 
+import functools
+
 import numpy as np
 import pandas as pd
 from pandapower.control.basic_controller import BasicCtrl
@@ -13,6 +15,37 @@ from ..mapping import FluidMixMapping
 logger = pplog.getLogger(__name__)
 
 
+def _copy_t_m(result):
+    return tuple(value.copy() if isinstance(value, np.ndarray) else value for value in result)
+
+
+def memoize_t_m(method):
+    """
+    Memoize a t_m method of a BasicProsumerController, for its arguments and for the state of the controller and of
+    its chain of responders (see BasicProsumerController._t_m_state_key).
+    A result is reused until something changed in the chain, e.g. when the t_m_to_deliver of a controller is called
+    again by its initiators or across the coupling iterations of the connector prosumers of a net.
+    The element tables of the prosumer are assumed not to change during a time step.
+
+    :param method: The method, with the prosumer as first argument
+    :return: The memoized method
+    """
+    @functools.wraps(method)
+    def wrapper(self, prosumer, *args):
+        if not self.t_m_memoization:
+            return method(self, prosumer, *args)
+        token = (id(prosumer), self.time, self._t_m_state_key(prosumer))
+        cache = self._t_m_cache
+        if cache is None or cache[0] != token:
+            cache = self._t_m_cache = (token, {})
+        key = (method.__name__, *args)
+        if key not in cache[1]:
+            cache[1][key] = _copy_t_m(method(self, prosumer, *args))
+        return _copy_t_m(cache[1][key])
+
+    return wrapper
+
+
 class BasicProsumerController(MappedController):
     """
     Base class for all prosumer controllers that can be part of a 'get_t_m' chain.
@@ -30,6 +63,15 @@ class BasicProsumerController(MappedController):
     :param kwargs: Additional keyword arguments
     """
 
+    # The memoized t_m results and mapped responders are runtime caches, they are not serialized
+    json_excludes = MappedController.json_excludes + ["_t_m_cache", "_chain_responders"]
+    _t_m_cache = None
+    _chain_responders = None
+    # If False, the t_m methods are computed at each call (see memoize_t_m)
+    t_m_memoization = True
+    # The attributes that are not part of the state of the t_m methods (see _t_m_state_key)
+    _t_m_state_excludes = frozenset(["inputs", "res", "step_results", "t_keep_return_c", "_t_m_cache"])
+
     def name_class(self):
         return "basic_controller"
 
@@ -82,6 +124,44 @@ class BasicProsumerController(MappedController):
 
         return treturn_tab_c
 
+    def _get_chain_responders(self, prosumer):
+        """
+        Returns the mapped responders of the controller, computed again only if rows are added to or removed from
+        the controller or the mapping table of the prosumer, or if these tables are replaced.
+
+        :param prosumer: The prosumer object
+        :return: List of mapped responders
+        """
+        signature = (id(prosumer), id(prosumer.controller), len(prosumer.controller),
+                     id(prosumer.mapping), len(prosumer.mapping))
+        if self._chain_responders is None or self._chain_responders[0] != signature:
+            self._chain_responders = (signature, self._get_mapped_responders(prosumer))
+        return self._chain_responders[1]
+
+    def _t_m_state_key(self, prosumer):
+        """
+        Key of the state that the t_m methods of the controller depend on: the inputs of the controller, its float
+        attributes (e.g. the t_previous_* values, the storage layers temperatures), the methods overridden on the
+        instance and the state keys of its responders
+
+        :param prosumer: The prosumer object
+        :return: The key, to be compared with ==
+        """
+        floats, others = [], [self.inputs.tobytes()]
+        for name, value in self.__dict__.items():
+            if name in self._t_m_state_excludes:
+                continue
+            if isinstance(value, float):
+                floats.append(value)
+            elif isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+                others.append(value.tobytes())
+            elif callable(value):
+                others.append(id(value))
+        floats += self.input_mass_flow_with_temp.values()
+        return (np.array(floats, dtype=float).tobytes(), *others,
+                *(responder._t_m_state_key(prosumer) for responder in self._get_chain_responders(prosumer)))
+
+    @memoize_t_m
     def t_m_to_deliver(self, prosumer):
         """
         Calculates the feed temperature and mass flow to deliver
@@ -101,7 +181,7 @@ class BasicProsumerController(MappedController):
         # m = pd.Series(0, index=self.element_index)
         # ToDo: the actual return temperature could be different if the mass flow provided is less than the requested
 
-        responders = self._get_mapped_responders(prosumer)
+        responders = self._get_chain_responders(prosumer)
         if len(responders) == 0:
             return 0, 0, np.array([])
         
@@ -150,6 +230,18 @@ class BasicProsumerController(MappedController):
         and calculate the required mass flow and feed temperature that should still be provided
         given the values already mapped in the input to provide the expected values
 
+        :param prosumer: The prosumer object
+        :return: A Tuple (Feed temperature, return temperature and mass flow)
+        """
+        tfeed_required_c, treturn_required_c, mdot_required_kg_per_s = self._t_m_to_receive(prosumer)
+        self.t_keep_return_c = treturn_required_c
+        return tfeed_required_c, treturn_required_c, mdot_required_kg_per_s
+
+    @memoize_t_m
+    def _t_m_to_receive(self, prosumer):
+        """
+        Memoized computation of t_m_to_receive
+
         :param prosumer: The prosumer object
         :return: A Tuple (Feed temperature, return temperature and mass flow)
         """
@@ -171,10 +263,9 @@ class BasicProsumerController(MappedController):
                 tfeed_required_c = treturn_required_c + ((tfeed_required_c - treturn_required_c) * mdot_required_kg_per_s - (tfeedin_supplied_c - treturn_required_c) * mdot_supplied_kg_per_s) / mdot_required_kg_per_s_tmp
                 mdot_required_kg_per_s = mdot_required_kg_per_s_tmp
 
-        self.t_keep_return_c = treturn_required_c
-
         return tfeed_required_c, treturn_required_c, mdot_required_kg_per_s
 
+    @memoize_t_m
     def t_m_to_deliver_for_t(self, prosumer, t_feed_c):
         """
         For a given feed temperature in °C,
@@ -192,7 +283,7 @@ class BasicProsumerController(MappedController):
         :param t_feed_c: The feed temperature
         :return: A Tuple (Feed temperature (float), Return Temperature (float), Mass Flow to deliver (np.array[float])
         """
-        responders = self._get_mapped_responders(prosumer)
+        responders = self._get_chain_responders(prosumer)
         # If there is no responder, required no energy
         if len(responders) == 0:
             return 0, 0, np.array([])
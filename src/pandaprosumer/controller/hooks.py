@@ -0,0 +1,174 @@
+"""
+Module containing the controller hooks used to profile the execution of MappedControllers,
+together with the built-in sinks collecting the measurements.
+"""
+
+import json
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+# Names of the MappedController methods that can be observed by hooks
+HOOKED_EVENTS = ("time_step", "control_step", "finalize_control", "finalize", "_apply_mappings")
+
+
+class ControllerHook:
+    """
+    Base class for all controller hooks.
+
+    A hook registered on a MappedController is called before and after each of the HOOKED_EVENTS methods.
+    The measured times are inclusive: the duration of 'control_step' contains the duration of 'finalize',
+    which itself contains the duration of '_apply_mappings'.
+    """
+
+    def before(self, controller, event, container):
+        """
+        Called before the execution of the hooked method.
+
+        :param controller: The controller executing the method
+        :param event: The name of the executed method
+        :param container: The container (prosumer/net/energy_system) passed to the method
+        """
+        pass
+
+    def after(self, controller, event, container, start_s, duration_s):
+        """
+        Called after the execution of the hooked method, even if it raised an exception.
+
+        :param controller: The controller executing the method
+        :param event: The name of the executed method
+        :param container: The container (prosumer/net/energy_system) passed to the method
+        :param start_s: The start time of the method, from time.perf_counter() [s]
+        :param duration_s: The duration of the method [s]
+        """
+        pass
+
+
+def _controller_key(controller, container):
+    """
+    Key used by the sinks to attribute the measurements to a controller.
+    """
+    container_name = container.get("name", "") if isinstance(container, dict) else ""
+    return container_name, controller.index, controller.__class__.__name__, controller.name
+
+
+class CumulativeTimingSink(ControllerHook):
+    """
+    Accumulate the number of calls and the total time spent per controller and per event.
+    """
+
+    def __init__(self):
+        self.calls = dict()
+        self.total_s = dict()
+
+    def after(self, controller, event, container, start_s, duration_s):
+        key = _controller_key(controller, container) + (event,)
+        self.calls[key] = self.calls.get(key, 0) + 1
+        self.total_s[key] = self.total_s.get(key, 0.) + duration_s
+
+    def to_dataframe(self):
+        """
+        :return: A DataFrame with one row per controller and event, sorted by decreasing total time
+        """
+        columns = ["container", "controller_index", "controller_class", "controller_name", "event"]
+        df = pd.DataFrame(list(self.calls.keys()), columns=columns)
+        df["calls"] = list(self.calls.values())
+        df["total_s"] = [self.total_s[key] for key in self.calls.keys()]
+        df["mean_s"] = df["total_s"] / df["calls"]
+        return df.sort_values("total_s", ascending=False, ignore_index=True)
+
+
+class LatencyHistogramSink(ControllerHook):
+    """
+    Histogram of the latencies of the calls, per controller and per event.
+
+    :param bin_edges_s: The edges of the histogram bins [s]. Default to log-spaced bins from 1 µs to 100 s.
+        Latencies out of the bins range are counted in the first or last bin.
+    """
+
+    def __init__(self, bin_edges_s=None):
+        self.bin_edges_s = np.logspace(-6, 2, 33) if bin_edges_s is None else np.asarray(bin_edges_s, dtype=float)
+        self.counts = dict()
+
+    def after(self, controller, event, container, start_s, duration_s):
+        key = _controller_key(controller, container) + (event,)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = np.zeros(len(self.bin_edges_s) - 1, dtype=np.int64)
+            self.counts[key] = counts
+        bin_idx = np.searchsorted(self.bin_edges_s, duration_s, side="right") - 1
+        counts[min(max(bin_idx, 0), len(counts) - 1)] += 1
+
+    def to_dataframe(self):
+        """
+        :return: A DataFrame with one row per controller and event and one column per bin (labelled by
+            the lower edge of the bin in seconds)
+        """
+        columns = ["container", "controller_index", "controller_class", "controller_name", "event"]
+        index = pd.MultiIndex.from_tuples(list(self.counts.keys()), names=columns)
+        return pd.DataFrame(list(self.counts.values()), index=index, columns=self.bin_edges_s[:-1])
+
+
+class ChromeTraceSink(ControllerHook):
+    """
+    Record every call as a complete event of the Chrome trace event format, so the execution can be
+    visualized in chrome://tracing or https://ui.perfetto.dev
+
+    The containers are represented as threads and the events are named after the controllers.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._t0_s = perf_counter()
+
+    def after(self, controller, event, container, start_s, duration_s):
+        container_name, ctrl_index, ctrl_class, ctrl_name = _controller_key(controller, container)
+        self.events.append({"name": "%s.%s" % (ctrl_name or ctrl_class, event),
+                            "cat": event,
+                            "ph": "X",
+                            "ts": (start_s - self._t0_s) * 1e6,
+                            "dur": duration_s * 1e6,
+                            "pid": 0,
+                            "tid": str(container_name),
+                            "args": {"controller_index": int(ctrl_index), "controller_class": ctrl_class}})
+
+    def to_dict(self):
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def save(self, path):
+        """
+        Write the trace to a JSON file
+
+        :param path: Path of the JSON file
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+
+def enable_profiling(container, *hooks):
+    """
+    Register hooks on all the MappedControllers of a container (prosumer or net).
+    If no hook is given, a CumulativeTimingSink is created.
+
+    :param container: The prosumer/net
+    :param hooks: The hooks to register
+    :return: The list of registered hooks
+    """
+    hooks = list(hooks) if hooks else [CumulativeTimingSink()]
+    for ctrl in container.controller.object.values:
+        if hasattr(ctrl, "add_hook"):
+            for hook in hooks:
+                ctrl.add_hook(hook)
+    return hooks
+
+
+def disable_profiling(container):
+    """
+    Remove all the hooks from the MappedControllers of a container (prosumer or net)
+
+    :param container: The prosumer/net
+    """
+    for ctrl in container.controller.object.values:
+        if hasattr(ctrl, "remove_hooks"):
+            ctrl.remove_hooks()
@@ -2,15 +2,39 @@
 Module containing the MappedController class.
 """
 
+import copy
+
 import numpy as np
 import pandas as pd
 import logging as pplog
+from time import perf_counter
 
 from pandapower.control.basic_controller import Controller
 from pandaprosumer.mapping.fluid_mix import FluidMixMapping
+from pandaprosumer.controller.hooks import HOOKED_EVENTS
 
 logger = pplog.getLogger(__name__)
 
+# Version of the controller tables of the prosumers, increased when a controller is added or activated/deactivated
+# (see pandaprosumer.energy_system.control.run_control_energy_system.get_controller_order_energy_system)
+_controller_tables_version = 0
+
+
+def notify_controller_tables_changed():
+    """
+    Invalidate the cached controller orders of the energy systems. To call after a controller table of a prosumer
+    was modified directly, e.g. a controller removed or its in_service, order or level changed
+    """
+    global _controller_tables_version
+    _controller_tables_version += 1
+
+
+def get_controller_tables_version():
+    """
+    :return: The version of the controller tables of the prosumers, see notify_controller_tables_changed
+    """
+    return _controller_tables_version
+
 
 class MappedController(Controller):
     """
@@ -29,6 +53,12 @@ class MappedController(Controller):
     :param kwargs: Additional keyword arguments
     """
 
+    # The hooks and the hooked methods are runtime observers, they are not copied nor serialized
+    json_excludes = Controller.json_excludes + ["_hooks", *HOOKED_EVENTS]
+    _hooks = ()
+    # The result policy bound to the controller (see set_result_policy), None to store all the results
+    _result_policy = None
+
     @classmethod
     def name(cls):
         return "mapped_controller"
@@ -70,12 +100,7 @@ class MappedController(Controller):
             self.step_results = np.full([self._nb_elements, len(self.result_columns)], np.nan)  # np.full([self._nb_elements, np.shape(self.result_columns)[1]], np.nan)
             if hasattr(self.obj[0], "period_index"):
                 self.has_period = True
-                self.period_index = self.obj[0].period_index
-                self.start = container.period.at[self.obj[0].period_index, 'start']
-                self.end = container.period.at[self.obj[0].period_index, 'end']
-                self.tz = container.period.at[self.obj[0].period_index, 'timezone']
-                self.resol = int(container.period.at[self.obj[0].period_index, 'resolution_s'])
-                self.time_index = pd.date_range(self.start, self.end, freq='%ss' % self.resol, tz=self.tz)
+                self._set_period_attributes(container, self.obj[0].period_index)
                 self.res = np.zeros([self._nb_elements, len(self.time_index), len(self.result_columns)])
             if self.has_elements:
                 self.element_name = [obj.element_name for obj in self.obj]
@@ -88,12 +113,7 @@ class MappedController(Controller):
             self.step_results = np.full([self._nb_elements, len(self.result_columns)], np.nan)
             if hasattr(self.obj, "period_index") and self.obj.period_index is not None:
                 self.has_period = True
-                self.period_index = self.obj.period_index
-                self.start = container.period.at[self.obj.period_index, 'start']
-                self.end = container.period.at[self.obj.period_index, 'end']
-                self.tz = container.period.at[self.obj.period_index, 'timezone']
-                self.resol = int(container.period.at[self.obj.period_index, 'resolution_s'])
-                self.time_index = pd.date_range(self.start, self.end, freq='%ss' % self.resol, tz=self.tz)
+                self._set_period_attributes(container, self.obj.period_index)
                 self.res = np.zeros([self._nb_elements, len(self.time_index), len(self.result_columns)])
 
             if self.has_elements:
@@ -112,6 +132,151 @@ class MappedController(Controller):
         # Keep the return temperature for the next time step (used only for models with fluid input)
         self.t_keep_return_c = np.nan
 
+    def _set_period_attributes(self, container, period_index):
+        self.period_index = period_index
+        self.start = container.period.at[period_index, 'start']
+        self.end = container.period.at[period_index, 'end']
+        self.tz = container.period.at[period_index, 'timezone']
+        self.resol = int(container.period.at[period_index, 'resolution_s'])
+        self.time_index = pd.date_range(self.start, self.end, freq='%ss' % self.resol, tz=self.tz)
+
+    def set_period(self, container, period_index):
+        """
+        Bind the controller to another period of the container, keeping all its other attributes and caches.
+
+        The time index of the controller and its result buffer are reallocated for the new period. The results of
+        the previous period are kept in the time_series table of the container if the controller was run for it.
+        The data object of the controller is copied before its period is changed, as it can be shared with other
+        controllers.
+        The profiles are read by time step, so they must cover the time steps of the new period.
+        A controller without period is not changed.
+
+        :param container: The prosumer/net/energy_system object
+        :param period_index: The index of the period in container.period
+        """
+        if not self.has_period:
+            return
+        # The data objects can be shared with other controllers, which keep their period
+        if np.iterable(self.obj):
+            self.obj = [copy.copy(obj) for obj in self.obj]
+            for obj in self.obj:
+                obj.period_index = period_index
+        else:
+            self.obj = copy.copy(self.obj)
+            self.obj.period_index = period_index
+        self._set_period_attributes(container, period_index)
+        if self._result_policy is None:
+            # Keep the number of elements and of result columns of the buffer allocated by the controller
+            self.res = np.zeros([self.res.shape[0], len(self.time_index), self.res.shape[2]])
+        else:
+            self.set_result_policy(self._result_policy.policy)
+
+    def set_result_policy(self, policy):
+        """
+        Set the policy of the results stored in the result buffer (res) of the controller and written to the
+        time_series table of the container, and reallocate the buffer accordingly.
+
+        :param policy: The result policy. If None, the results of every time step and result column are stored
+        :type policy: pandaprosumer.controller.result_policy.ResultPolicy
+        """
+        if not self.has_period:
+            raise ValueError("The controller '%s' has no period, its results are not stored" % self.name)
+        nb_elements = self.res.shape[0]
+        if policy is None:
+            self._result_policy = None
+            self.res = np.zeros([nb_elements, len(self.time_index), len(self.result_columns)])
+        else:
+            self._result_policy = policy.bind(self.result_columns, self.time_index, self.resol)
+            self.res = self._result_policy.allocate(nb_elements)
+
+    @property
+    def res_columns(self):
+        """
+        :return: The result columns stored in the result buffer (res)
+        """
+        return self.result_columns if self._result_policy is None else self._result_policy.columns
+
+    @property
+    def res_time_index(self):
+        """
+        :return: The time steps stored in the result buffer (res)
+        """
+        return self.time_index if self._result_policy is None else self._result_policy.time_index
+
+    def add_controller_to_net(self, net, in_service, initial_run, order, level, index, recycle,
+                              drop_same_existing_ctrl, overwrite, **kwargs):
+        """
+        Adds the controller to the controller table of the container.
+
+        While controllers are created in bulk (see pandaprosumer.create_controlled._create_controllers), the row
+        is only collected in the pending rows of the container, that are appended to the table at once afterward.
+        """
+        notify_controller_tables_changed()
+        pending_rows = getattr(net, '_pending_controller_rows', None)
+        if pending_rows is None:
+            return super().add_controller_to_net(net, in_service, initial_run, order, level, index, recycle,
+                                                 drop_same_existing_ctrl, overwrite, **kwargs)
+        pending_rows.append({"object": self, "in_service": in_service, "initial_run": initial_run,
+                             "recycle": recycle, "order": order, "level": level})
+        return index
+
+    def add_hook(self, hook):
+        """
+        Register a hook (see pandaprosumer.controller.hooks.ControllerHook) called before and after
+        the execution of the methods listed in HOOKED_EVENTS.
+
+        The methods are only wrapped while at least one hook is registered, so a controller without hook
+        runs without any overhead.
+
+        :param hook: The hook to register
+        """
+        if not self._hooks:
+            for event in HOOKED_EVENTS:
+                setattr(self, event, self._hooked_method(event))
+        self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook):
+        """
+        Unregister a hook. The methods are unwrapped when the last hook is removed.
+
+        :param hook: The hook to remove
+        """
+        self._hooks = tuple(h for h in self._hooks if h is not hook)
+        if not self._hooks:
+            self.remove_hooks()
+
+    def remove_hooks(self):
+        """
+        Unregister all the hooks and unwrap the hooked methods.
+        """
+        for event in HOOKED_EVENTS:
+            self.__dict__.pop(event, None)
+        self.__dict__.pop("_hooks", None)
+
+    def _hooked_method(self, event):
+        """
+        Wrap the method 'event' of the controller class so the registered hooks are called before and after it.
+        The first positional argument of every hooked method is the container.
+
+        :param event: The name of the method to wrap
+        :return: The wrapped method
+        """
+        method = getattr(type(self), event).__get__(self)
+
+        def wrapper(container, *args, **kwargs):
+            hooks = self._hooks
+            for hook in hooks:
+                hook.before(self, event, container)
+            start_s = perf_counter()
+            try:
+                return method(container, *args, **kwargs)
+            finally:
+                duration_s = perf_counter() - start_s
+                for hook in hooks:
+                    hook.after(self, event, container, start_s, duration_s)
+
+        return wrapper
+
     def is_converged(self, container):
         """
             Check if controller already was applied
@@ -338,6 +503,9 @@ class MappedController(Controller):
         :param container: The prosumer/net/energy_system object
         :return: List of initializations
         """
+        if self._result_policy is not None:
+            # Restart the aggregation of the results, for a new run
+            self.res = self._result_policy.allocate(self.res.shape[0])
         return []
 
     def time_series_finalization(self, container):
@@ -348,6 +516,8 @@ class MappedController(Controller):
         :return: List of finalizations
         """
         if self.has_period:
+            if self._result_policy is not None:
+                self._result_policy.flush(self.res)
             return self.res
         else:
             return []
@@ -367,6 +537,7 @@ class MappedController(Controller):
 
     def set_active(self, container, in_service):
         super().set_active(container, in_service)
+        notify_controller_tables_changed()
 
     def _merit_order_mass_flow(self, container, mdot_out_available_kg_per_s, mdot_required_tab_kg_per_s):
         """
@@ -411,11 +582,24 @@ class MappedController(Controller):
             # Write the result in res tab for saving to timeseries result data frame
             if self.has_period:
                 time_step_idx = np.where(self.time_index == self.time)[0][0]
-                self.res[:, time_step_idx, :] = result
+                if not self.res.flags.writeable:
+                    # The result buffer is shared with another container (see pandaprosumerContainer.clone)
+                    self.res = self.res.copy()
+                if self._result_policy is None:
+                    self.res[:, time_step_idx, :] = result
+                else:
+                    self._result_policy.write(self.res, time_step_idx, result)
         # Write result_fluid_mix for FluidMixMapping
         self.result_mass_flow_with_temp = result_fluid_mix
 
-        # Execute all the mappings for which this controller is the initiator
+        self._apply_mappings(container)
+
+    def _apply_mappings(self, container):
+        """
+        Execute all the mappings for which this controller is the initiator
+
+        :param container: The container (prosumer) object
+        """
         for row in self._get_mappings(container):
             if row.object.responder_net == container:
                 if container.check_order: self.check_mappings_orders(container)
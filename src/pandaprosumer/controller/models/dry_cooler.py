@@ -10,7 +10,7 @@ from math import log
 import pandapipes
 import pandas as pd
 
-from pandapipes import create_fluid_from_lib, call_lib
+from pandaprosumer.library.fluids import get_fluid
 from pandaprosumer.mapping.fluid_mix import FluidMixMapping
 from pandaprosumer.constants import CELSIUS_TO_K, HeatExchangerControl
 from pandaprosumer.controller.base import BasicProsumerController
@@ -211,7 +211,7 @@ class DryCoolerController(BasicProsumerController):
                          name=name, **kwargs)
 
         self.fluid = prosumer.fluid
-        self.cooling_fluid = pandapipes.call_lib('air')
+        self.cooling_fluid = get_fluid('air')
         self.t_previous_out_c = np.nan
         self.t_previous_in_c = np.nan
         self.mdot_previous_in_kg_per_s = np.nan
@@ -4,7 +4,7 @@ Module containing the HeatExchangerController class.
 
 import logging
 import numpy as np
-from pandapipes import call_lib
+from pandaprosumer.library.fluids import get_fluid
 from scipy import optimize
 
 from pandaprosumer.controller.base import BasicProsumerController
@@ -162,9 +162,9 @@ class HeatExchangerController(BasicProsumerController):
         super().__init__(prosumer, stratified_heat_storage_object, order=order, level=level, in_service=in_service,
                          index=index, name=name, **kwargs)
 
-        self.primary_fluid = call_lib(self.element_instance.primary_fluid[self.element_index[0]]) \
+        self.primary_fluid = get_fluid(self.element_instance.primary_fluid[self.element_index[0]]) \
             if self.element_instance.primary_fluid[self.element_index[0]] else prosumer.fluid
-        self.secondary_fluid = call_lib(self.element_instance.secondary_fluid[self.element_index[0]]) \
+        self.secondary_fluid = get_fluid(self.element_instance.secondary_fluid[self.element_index[0]]) \
             if self.element_instance.secondary_fluid[self.element_index[0]] else prosumer.fluid
 
         self.t_previous_1_out_c = np.nan
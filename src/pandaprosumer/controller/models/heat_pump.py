@@ -6,7 +6,7 @@ import numpy as np
 from math import log
 import pandas as pd
 
-from pandapipes import create_fluid_from_lib, call_lib
+from pandaprosumer.library.fluids import get_fluid
 from pandaprosumer.mapping.fluid_mix import FluidMixMapping
 from pandaprosumer.constants import CELSIUS_TO_K, TEMPERATURE_CONVERGENCE_THRESHOLD_C
 from pandaprosumer.controller.base import BasicProsumerController
@@ -37,8 +37,8 @@ class HeatPumpController(BasicProsumerController):
 
         cond_fluid = self._get_element_param(prosumer, 'cond_fluid')
         evap_fluid = self._get_element_param(prosumer, 'evap_fluid')
-        self.cond_fluid = call_lib(cond_fluid) if cond_fluid else prosumer.fluid
-        self.evap_fluid = call_lib(evap_fluid) if evap_fluid else prosumer.fluid
+        self.cond_fluid = get_fluid(cond_fluid) if cond_fluid else prosumer.fluid
+        self.evap_fluid = get_fluid(evap_fluid) if evap_fluid else prosumer.fluid
         # FixMe: Does it works when evap fluid is a gas (e.g. air) ?
         # ToDo: Add power ramp up/down constrain
         self.t_previous_evap_out_c = np.nan
@@ -0,0 +1,186 @@
+"""
+Module containing the result policies of the MappedControllers, which reduce the results stored in the result
+buffer (res) of a controller while they are written, at the end of each time step.
+"""
+
+import numpy as np
+
+# Aggregations of the time steps of a stored time step, with the value of the stored results without time step
+RESULT_AGGREGATIONS = {"mean": np.nan, "sum": 0., "max": np.nan, "min": np.nan, "last": np.nan}
+
+
+class ResultPolicy:
+    """
+    Policy of the results stored by a controller for the time_series table: the stored result columns, and their
+    resolution and aggregation.
+
+    The stored time steps are aligned on the start of the period. Each stored time step aggregates the time steps
+    from its start to the start of the next one (the last one may aggregate less time steps).
+    As pandas resample, the aggregations skip the NaN results: a stored result is NaN if all its results are NaN,
+    except for "sum" which is 0.
+
+    :param resolution_s: The resolution of the stored results [s], a multiple of the resolution of the period.
+        If None, the results of every time step are stored
+    :param aggregation: The aggregation of the time steps ("mean", "sum", "max", "min" or "last"), or a dict
+        of the aggregation per result column (the aggregation of the other columns is "mean")
+    :param columns: The result columns to store. If None, all the result columns are stored
+    """
+
+    def __init__(self, resolution_s=None, aggregation="mean", columns=None):
+        aggregations = aggregation.values() if isinstance(aggregation, dict) else [aggregation]
+        unknown = [agg for agg in aggregations if agg not in RESULT_AGGREGATIONS]
+        if unknown:
+            raise ValueError("Unknown result aggregation %s, expected one of %s"
+                             % (unknown, list(RESULT_AGGREGATIONS)))
+        if resolution_s is not None and resolution_s <= 0:
+            raise ValueError("The resolution of the results must be positive, got %s" % resolution_s)
+        self.resolution_s = resolution_s
+        self.aggregation = aggregation
+        self.columns = None if columns is None else list(columns)
+
+    def get_aggregation(self, column):
+        """
+        :return: The aggregation of a result column
+        """
+        if isinstance(self.aggregation, dict):
+            return self.aggregation.get(column, "mean")
+        return self.aggregation
+
+    def bind(self, result_columns, time_index, resol):
+        """
+        Apply the policy to the results of a controller.
+
+        :param result_columns: The result columns of the controller
+        :param time_index: The time index of the period of the controller
+        :param resol: The resolution of the period of the controller [s]
+        :return: The policy bound to the controller, writing its results
+        :rtype: BoundResultPolicy
+        """
+        return BoundResultPolicy(self, result_columns, time_index, resol)
+
+
+class BoundResultPolicy:
+    """
+    A result policy applied to the results of a controller (see ResultPolicy.bind)
+    """
+
+    def __init__(self, policy, result_columns, time_index, resol):
+        columns = result_columns if policy.columns is None else policy.columns
+        missing = [column for column in columns if column not in result_columns]
+        if missing:
+            raise ValueError("The result columns %s are not results of the controller (%s)"
+                             % (missing, result_columns))
+        if policy.resolution_s is None:
+            steps = 1
+        elif policy.resolution_s % resol:
+            raise ValueError("The resolution of the results (%s s) must be a multiple of the resolution of the "
+                             "period (%s s)" % (policy.resolution_s, resol))
+        else:
+            steps = int(policy.resolution_s // resol)
+        self.policy = policy
+        self.columns = list(columns)
+        self.steps = steps
+        self.time_index = time_index[::steps]
+
+        result_indexes = [list(result_columns).index(column) for column in self.columns]
+        aggregations = ["last" if steps == 1 else policy.get_aggregation(column) for column in self.columns]
+        self.initial_values = np.array([RESULT_AGGREGATIONS[agg] for agg in aggregations])
+        # The stored columns grouped by aggregation: (aggregation, indexes in res, indexes in the results)
+        self.groups = [(agg, np.array([i for i, a in enumerate(aggregations) if a == agg]),
+                        np.array([result_indexes[i] for i, a in enumerate(aggregations) if a == agg]))
+                       for agg in dict.fromkeys(aggregations)]
+        self._restart()
+
+    def _restart(self):
+        # The last written time step and its results, not aggregated yet
+        self._pending_step_idx = None
+        self._pending_result = None
+        # The stored time step aggregated by the mean and its number of aggregated (not NaN) results
+        self._mean_step = None
+        self._mean_counts = None
+
+    def allocate(self, nb_elements):
+        """
+        Allocate a new result buffer for the stored time steps and result columns, to which the results are then
+        written (the results written to the previous buffer and not aggregated yet are discarded)
+
+        :return: The result buffer
+        """
+        self._restart()
+        return np.tile(self.initial_values, (nb_elements, len(self.time_index), 1))
+
+    def write(self, res, time_step_idx, result):
+        """
+        Write the results of a time step to the result buffer.
+
+        The results of a time step are aggregated when the results of another time step are written or when the
+        buffer is flushed, so writing the results of the same time step again replaces them (the controllers can be
+        finalized several times in a time step).
+
+        :param res: The result buffer allocated by allocate
+        :param time_step_idx: The index of the time step in the time index of the period
+        :param result: The results of all the result columns of the controller for the time step
+        """
+        if self._pending_step_idx is not None and self._pending_step_idx != time_step_idx:
+            self._aggregate(res, self._pending_step_idx, self._pending_result)
+        self._pending_step_idx = time_step_idx
+        self._pending_result = np.array(result, dtype=float)
+
+    @property
+    def pending_stored_step(self):
+        """
+        The index, in the result buffer, of the stored time step to which the pending results will be aggregated,
+        None if no results are pending
+        """
+        return None if self._pending_step_idx is None else self._pending_step_idx // self.steps
+
+    def flush(self, res):
+        """
+        Aggregate the results of the last written time step to the result buffer, at the end of the run
+        """
+        if self._pending_step_idx is not None:
+            self._aggregate(res, self._pending_step_idx, self._pending_result)
+            self._pending_step_idx = self._pending_result = None
+
+    def _aggregate(self, res, time_step_idx, result):
+        step = time_step_idx // self.steps
+        for aggregation, res_indexes, result_indexes in self.groups:
+            values = result[:, result_indexes]
+            stored = res[:, step, res_indexes]
+            valid = ~np.isnan(values)
+            if aggregation == "last":
+                stored = np.where(valid, values, stored)
+            elif aggregation == "sum":
+                stored = stored + np.where(valid, values, 0.)
+            elif aggregation == "max":
+                stored = np.fmax(stored, values)
+            elif aggregation == "min":
+                stored = np.fmin(stored, values)
+            else:
+                if self._mean_step != step:
+                    self._mean_step, self._mean_counts = step, np.zeros(values.shape)
+                counts = self._mean_counts
+                counts += valid
+                # Running mean of the results which are not NaN
+                mean = stored + (values - stored) / np.maximum(counts, 1)
+                stored = np.where(valid, np.where(counts == 1, values, mean), stored)
+            res[:, step, res_indexes] = stored
+
+
+def set_result_policy(container, policy, index=None):
+    """
+    Set the result policy of controllers of a container (see MappedController.set_result_policy)
+
+    :param container: The prosumer/net/energy_system object
+    :param policy: The result policy. If None, the results of every time step and result column are stored
+    :type policy: ResultPolicy
+    :param index: The index or list of indexes of the controllers in container.controller. If None, the policy is
+        set for all the controllers with a period
+    """
+    if index is None:
+        controllers = container.controller.object.values
+    else:
+        controllers = container.controller.object.loc[np.atleast_1d(index)].values
+    for ctrl in controllers:
+        if getattr(ctrl, 'has_period', False):
+            ctrl.set_result_policy(policy)
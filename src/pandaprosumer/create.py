@@ -2,13 +2,15 @@ import logging
 
 import numpy as np
 import pandas as pd
-from pandapipes import Fluid, create_fluid_from_lib
+from pandapipes import Fluid
 
-from pandapower.create import _get_index_with_check, _set_entries, _add_to_entries_if_not_nan
+from pandapower.create import _get_index_with_check, _set_entries, _add_to_entries_if_not_nan, \
+    _get_multiple_index_with_check, _set_multiple_entries
 from pandaprosumer.element import *
 from pandapower.create import _get_index_with_check, _set_entries
 from pandaprosumer.element import HeatPumpElementData, HeatDemandElementData, \
      HeatStorageElementData, IceChpElementData, BoosterHeatPumpElementData, ChillerElementData
+from pandaprosumer.library.fluids import get_fluid
 from pandaprosumer.location_period import Period
 from pandaprosumer.pandaprosumer_container import pandaprosumerContainer, get_default_prosumer_container_structure
 from pandaprosumer.prosumer_toolbox import add_new_element, load_library_entry
@@ -41,7 +43,7 @@ def create_empty_prosumer_container(name="", add_basic_lib=True, fluid="water",c
         if isinstance(fluid, Fluid):
             prosumer["fluid"] = fluid
         elif isinstance(fluid, str):
-            create_fluid_from_lib(prosumer, fluid)
+            prosumer["fluid"] = get_fluid(fluid, shared=False)
         else:
             logger.warning("The fluid %s cannot be added to the prosumer. Only fluids of type Fluid or "
                            "strings can be used." % fluid)
@@ -169,6 +171,70 @@ def create_heat_pump(prosumer,
     return int(index)
 
 
+def create_heat_pumps(prosumer,
+                      nr_heat_pumps,
+                      delta_t_evap_c=15.,
+                      carnot_efficiency=0.5,
+                      pinch_c=None,
+                      delta_t_hot_default_c=5,
+                      max_p_comp_kw=np.nan,
+                      min_p_comp_kw=np.nan,
+                      max_t_cond_out_c=np.nan,
+                      max_cop=np.nan,
+                      cond_fluid=None,
+                      evap_fluid=None,
+                      name=None,
+                      index=None,
+                      in_service=True,
+                      **kwargs):
+    """
+    Creates several heat pump elements in prosumer["heat_pump"] at once
+
+    The parameters are the same as in create_heat_pump. Each of them can be a single value used for all the heat
+    pumps or an iterable (e.g. a DataFrame column) with one value per heat pump.
+
+    INPUT:
+        **prosumer** - The prosumer within these heat pumps should be created
+
+        **nr_heat_pumps** (int) - The number of heat pumps to create
+
+    OUTPUT:
+        **index** (numpy.ndarray) - The unique IDs of the created heat pumps
+
+    EXAMPLE:
+        create_heat_pumps(prosumer, 3, max_p_comp_kw=[100, 200, 300])
+    """
+    add_new_element(prosumer, HeatPumpElementData)
+
+    index = _get_multiple_index_with_check(prosumer, "heat_pump", index, nr_heat_pumps)
+
+    entries = dict(
+        zip(['name', 'pinch_c', 'delta_t_evap_c', 'carnot_efficiency', 'delta_t_hot_default_c', 'max_p_comp_kw',
+             'min_p_comp_kw', 'max_t_cond_out_c', 'max_cop', 'cond_fluid', 'evap_fluid', 'in_service'],
+            [name, pinch_c, delta_t_evap_c, carnot_efficiency, delta_t_hot_default_c, max_p_comp_kw,
+             min_p_comp_kw, max_t_cond_out_c, max_cop, _get_fluid_names(prosumer, cond_fluid),
+             _get_fluid_names(prosumer, evap_fluid), in_service])
+    )
+
+    _set_multiple_entries(prosumer, "heat_pump", index, **entries, **kwargs)
+
+    return index
+
+
+def _get_fluid_names(prosumer, fluids):
+    """
+    Return the name of the fluid, or the names of the fluids if an iterable is given. Missing fluids are replaced by
+    the fluid of the prosumer.
+    """
+    if fluids is None or isinstance(fluids, (str, Fluid)):
+        fluids, single = [fluids], True
+    else:
+        single = False
+    names = [prosumer.fluid.name if not fluid else fluid.name if isinstance(fluid, Fluid) else fluid
+             for fluid in fluids]
+    return names[0] if single else names
+
+
 def create_heat_demand(prosumer,
                        scaling=1.0,
                        name=None,
@@ -217,6 +283,42 @@ def create_heat_demand(prosumer,
     return int(index)
 
 
+def create_heat_demands(prosumer,
+                        nr_heat_demands,
+                        scaling=1.0,
+                        name=None,
+                        index=None,
+                        in_service=True,
+                        **kwargs):
+    """
+    Creates several heat demand elements in prosumer["heat_demand"] at once
+
+    The parameters are the same as in create_heat_demand. Each of them can be a single value used for all the heat
+    demands or an iterable (e.g. a DataFrame column) with one value per heat demand.
+
+    INPUT:
+        **prosumer** - The prosumer within these heat demands should be created
+
+        **nr_heat_demands** (int) - The number of heat demands to create
+
+    OUTPUT:
+        **index** (numpy.ndarray) - The unique IDs of the created heat demands
+
+    EXAMPLE:
+        create_heat_demands(prosumer, 3, scaling=[1., .5, 2.])
+    """
+    add_new_element(prosumer, HeatDemandElementData)
+
+    index = _get_multiple_index_with_check(prosumer, "heat_demand", index, nr_heat_demands)
+
+    entries = dict(zip(["name", "scaling", "in_service"],
+                       [name, scaling, in_service]))
+
+    _set_multiple_entries(prosumer, "heat_demand", index, **entries, **kwargs)
+
+    return index
+
+
 def create_stratified_heat_storage(prosumer,
                                    tank_height_m,
                                    tank_internal_radius_m,
@@ -309,20 +411,9 @@ def create_stratified_heat_storage(prosumer,
 
     if tank_external_radius_m is None:
         tank_external_radius_m = tank_internal_radius_m + .1
-    if tank_external_radius_m < tank_internal_radius_m:
-        raise ValueError(f"tank_external_radius_m ({tank_external_radius_m} m) must be greater "
-                         f"than tank_internal_radius_m ({tank_internal_radius_m} m)")
-
-    if (height_charge_out_m and height_charge_out_m < 0 or
-            height_charge_out_m and height_charge_out_m and height_charge_in_m < height_charge_out_m or
-            height_charge_out_m and height_charge_in_m > tank_height_m):
-        raise ValueError(f"height_charge_out_m ({height_charge_out_m} m) or height_charge_in_m ({height_charge_in_m} m)"
-                         f"is invalid.")
-    if (height_discharge_in_m and height_discharge_in_m < 0 or
-            height_discharge_in_m and height_discharge_in_m and height_discharge_out_m < height_discharge_in_m or
-            height_discharge_in_m and height_discharge_out_m > tank_height_m):
-        raise ValueError(f"height_discharge_in_m ({height_discharge_in_m} m) or "
-                         f"height_discharge_out_m ({tank_height_m} m) is invalid.")
+    _check_stratified_heat_storage(tank_height_m, tank_internal_radius_m, tank_external_radius_m,
+                                   height_charge_in_m, height_charge_out_m, height_discharge_out_m,
+                                   height_discharge_in_m)
 
     index = _get_index_with_check(prosumer, "stratified_heat_storage", index)
 
@@ -341,6 +432,101 @@ def create_stratified_heat_storage(prosumer,
     return int(index)
 
 
+def create_stratified_heat_storages(prosumer,
+                                    nr_stratified_heat_storages,
+                                    tank_height_m,
+                                    tank_internal_radius_m,
+                                    tank_external_radius_m=None,
+                                    insulation_thickness_m=.15,
+                                    n_layers=100,
+                                    min_useful_temp_c=65.,
+                                    k_fluid_w_per_mk=.598,
+                                    k_insu_w_per_mk=.028,
+                                    k_wall_w_per_mk=45,
+                                    h_ext_w_per_m2k=12.5,
+                                    t_ext_c=22.5,
+                                    max_remaining_capacity_kwh=1,
+                                    t_discharge_out_tol_c=1e-3,
+                                    max_dt_s=None,
+                                    height_charge_in_m=None,
+                                    height_charge_out_m=0,
+                                    height_discharge_out_m=None,
+                                    height_discharge_in_m=0,
+                                    name=None,
+                                    index=None,
+                                    in_service=True,
+                                    **kwargs):
+    """
+    Creates several stratified heat storage elements in prosumer["stratified_heat_storage"] at once
+
+    The parameters are the same as in create_stratified_heat_storage. Each of them can be a single value used for
+    all the storages or an iterable (e.g. a DataFrame column) with one value per storage.
+
+    INPUT:
+        **prosumer** - The prosumer within these stratified heat storages should be created.
+
+        **nr_stratified_heat_storages** (int) - The number of stratified heat storages to create
+
+        **tank_height_m** (float or iterable) - The height of the storage tanks in m.
+
+        **tank_internal_radius_m** (float or iterable) - The internal radius of the storage tanks in m.
+
+    OUTPUT:
+        **index** (numpy.ndarray) - The unique IDs of the created stratified heat storages
+
+    EXAMPLE:
+        create_stratified_heat_storages(prosumer, 2, [10, 8], 0.6)
+    """
+    add_new_element(prosumer, StratifiedHeatStorageElementData)
+
+    dimensions = [np.broadcast_to(np.asarray(value, dtype=object), nr_stratified_heat_storages)
+                  for value in [tank_height_m, tank_internal_radius_m, tank_external_radius_m, height_charge_in_m,
+                                height_charge_out_m, height_discharge_out_m, height_discharge_in_m]]
+    dimensions[2] = [internal_radius_m + .1 if external_radius_m is None else external_radius_m
+                     for internal_radius_m, external_radius_m in zip(dimensions[1], dimensions[2])]
+    for storage_dimensions in zip(*dimensions):
+        _check_stratified_heat_storage(*storage_dimensions)
+    tank_external_radius_m = np.asarray(dimensions[2], dtype=float)
+
+    index = _get_multiple_index_with_check(prosumer, "stratified_heat_storage", index, nr_stratified_heat_storages)
+
+    entries = dict(zip(['name', 'tank_height_m', 'tank_internal_radius_m', 'tank_external_radius_m', 'n_layers',
+                        'min_useful_temp_c', 'insulation_thickness_m', 'k_fluid_w_per_mk', 'k_insu_w_per_mk',
+                        'k_wall_w_per_mk', 'h_ext_w_per_m2k', 't_ext_c', 'max_remaining_capacity_kwh',
+                        't_discharge_out_tol_c', 'max_dt_s', 'height_charge_in_m',
+                        'height_charge_out_m', 'height_discharge_out_m', 'height_discharge_in_m', 'in_service'],
+                       [name, tank_height_m, tank_internal_radius_m, tank_external_radius_m, n_layers,
+                        min_useful_temp_c, insulation_thickness_m, k_fluid_w_per_mk, k_insu_w_per_mk,
+                        k_wall_w_per_mk, h_ext_w_per_m2k, t_ext_c, max_remaining_capacity_kwh,
+                        t_discharge_out_tol_c, max_dt_s, height_charge_in_m,
+                        height_charge_out_m, height_discharge_out_m, height_discharge_in_m, in_service]))
+
+    _set_multiple_entries(prosumer, "stratified_heat_storage", index, **entries, **kwargs)
+    return index
+
+
+def _check_stratified_heat_storage(tank_height_m, tank_internal_radius_m, tank_external_radius_m,
+                                   height_charge_in_m, height_charge_out_m, height_discharge_out_m,
+                                   height_discharge_in_m):
+    """
+    Raise a ValueError if the dimensions of a stratified heat storage are inconsistent
+    """
+    if tank_external_radius_m < tank_internal_radius_m:
+        raise ValueError(f"tank_external_radius_m ({tank_external_radius_m} m) must be greater "
+                         f"than tank_internal_radius_m ({tank_internal_radius_m} m)")
+
+    if (height_charge_out_m and height_charge_out_m < 0 or
+            height_charge_out_m and height_charge_out_m and height_charge_in_m < height_charge_out_m or
+            height_charge_out_m and height_charge_in_m > tank_height_m):
+        raise ValueError(f"height_charge_out_m ({height_charge_out_m} m) or height_charge_in_m ({height_charge_in_m} m)"
+                         f"is invalid.")
+    if (height_discharge_in_m and height_discharge_in_m < 0 or
+            height_discharge_in_m and height_discharge_in_m and height_discharge_out_m < height_discharge_in_m or
+            height_discharge_in_m and height_discharge_out_m > tank_height_m):
+        raise ValueError(f"height_discharge_in_m ({height_discharge_in_m} m) or "
+                         f"height_discharge_out_m ({tank_height_m} m) is invalid.")
+
+
 def create_heat_exchanger(prosumer,
                           t_1_in_nom_c=90,
                           t_1_out_nom_c=65,
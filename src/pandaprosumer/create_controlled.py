@@ -1,9 +1,14 @@
+from pandaprosumer.controller.mapped import notify_controller_tables_changed
 from pandaprosumer.controller.models.heat_pump import HeatPumpController
 from pandaprosumer.create import *
 from pandaprosumer.controller.models import *
 from pandaprosumer.controller.data_model import *
 from pandaprosumer.controller import *
 import numpy as np
+import pandas as pd
+
+from pandapower.auxiliary import _preserve_dtypes
+from pandapower.create import _get_multiple_index_with_check
 
 
 def create_controlled_const_profile(prosumer, input_columns, result_columns, period, data_source, level=0, order=0,
@@ -24,6 +29,45 @@ def create_controlled_const_profile(prosumer, input_columns, result_columns, per
     return const_profile.index
 
 
+def _create_controllers(prosumer, controller_class, controllers_data, names, order, level, **kwargs):
+    """
+    Creates one controller per controller data and appends their rows to prosumer["controller"] at once
+
+    :param prosumer: The prosumer within these controllers should be created
+    :param controller_class: The class of the controllers
+    :param controllers_data: The controller data of each controller
+    :param names: The name of each controller
+    :param order: The order of the controllers
+    :param level: The level of the controllers
+    :param kwargs: Additional keyword arguments passed to each controller
+    :return: The indices of the created controllers
+    """
+    index = _get_multiple_index_with_check(prosumer, "controller", None, len(controllers_data))
+    pending_rows = []
+    prosumer._setattr('_pending_controller_rows', pending_rows)
+    try:
+        for idx, controller_data, name in zip(index, controllers_data, names):
+            controller_class(prosumer, controller_data, order=order, level=level, index=int(idx), name=name,
+                             **kwargs)
+    finally:
+        prosumer._setattr('_pending_controller_rows', None)
+
+    dtypes = prosumer.controller.dtypes
+    prosumer.controller = pd.concat([prosumer.controller, pd.DataFrame(pending_rows, index=index)], sort=False)
+    _preserve_dtypes(prosumer.controller, dtypes)
+    notify_controller_tables_changed()
+    return index
+
+
+def _get_names(name, number):
+    """
+    Return a list with one name per element from a single name or an iterable of names
+    """
+    if name is None or isinstance(name, str):
+        return [name] * number
+    return list(name)
+
+
 def create_controlled_heat_pump(prosumer,
                                 delta_t_evap_c=15.,
                                 carnot_efficiency=0.5,
@@ -107,6 +151,53 @@ def create_controlled_heat_pump(prosumer,
     return heat_pump.index
 
 
+def create_controlled_heat_pumps(prosumer,
+                                 nr_heat_pumps,
+                                 name=None,
+                                 index=None,
+                                 level=0,
+                                 order=0,
+                                 period=0,
+                                 **kwargs):
+    """
+        Creates several heat pump elements in prosumer["heat_pump"] and one heat pump controller per heat pump
+
+        The element rows and the controller rows are appended to their tables at once, which is much faster than
+        calling create_controlled_heat_pump for each heat pump.
+
+        INPUT:
+            **prosumer** - The prosumer within these heat pumps should be created
+
+            **nr_heat_pumps** (int) - The number of heat pumps to create
+
+        OPTIONAL:
+            **name** (string or iterable, default None) - A custom name for the heat pumps and their controllers
+
+            **index** (iterable, default None) - Force the specified IDs of the heat pumps if they are available
+
+            **level** (int, default 0) - The level of the controllers
+
+            **order** (int, default 0) - The order of the controllers
+
+            **period** (int, default 0) - Index of the period, default is 0
+
+            **kwargs** - The parameters of the heat pumps (see create_heat_pump), each one given as a single
+            value or as an iterable (e.g. a DataFrame column) with one value per heat pump
+
+        OUTPUT:
+            **index** (numpy.ndarray) - The unique IDs of the created heat pump controllers
+
+        EXAMPLE:
+            create_controlled_heat_pumps(prosumer, 3, max_p_comp_kw=[100, 200, 300])
+        """
+    heat_pump_index = create_heat_pumps(prosumer, nr_heat_pumps, name=name, index=index, **kwargs)
+    controllers_data = [HeatPumpControllerData(element_name='heat_pump',
+                                               element_index=[int(idx)],
+                                               period_index=period) for idx in heat_pump_index]
+    return _create_controllers(prosumer, HeatPumpController, controllers_data, _get_names(name, nr_heat_pumps),
+                               order, level)
+
+
 def create_controlled_heat_demand(prosumer,
                                   scaling=1.0,
                                   name=None,
@@ -168,6 +259,54 @@ def create_controlled_heat_demand(prosumer,
     return heat_demand_controller.index
 
 
+def create_controlled_heat_demands(prosumer,
+                                   nr_heat_demands,
+                                   name=None,
+                                   index=None,
+                                   period=0,
+                                   level=0,
+                                   order=0,
+                                   **kwargs):
+    """
+        Creates several heat demand elements in prosumer["heat_demand"] and one heat demand controller per heat
+        demand
+
+        The element rows and the controller rows are appended to their tables at once, which is much faster than
+        calling create_controlled_heat_demand for each heat demand.
+
+        INPUT:
+            **prosumer** - The prosumer within these heat demands should be created
+
+            **nr_heat_demands** (int) - The number of heat demands to create
+
+        OPTIONAL:
+            **name** (string or iterable, default None) - A custom name for the heat demands and their controllers
+
+            **index** (iterable, default None) - Force the specified IDs of the heat demands if they are available
+
+            **level** (int, default 0) - The level of the controllers
+
+            **order** (int, default 0) - The order of the controllers
+
+            **period** (int, default 0) - Index of the period, default is 0
+
+            **kwargs** - The parameters of the heat demands (see create_heat_demand), each one given as a single
+            value or as an iterable (e.g. a DataFrame column) with one value per heat demand
+
+        OUTPUT:
+            **index** (numpy.ndarray) - The unique IDs of the created heat demand controllers
+
+        EXAMPLE:
+            create_controlled_heat_demands(prosumer, 3, scaling=[1., .5, 2.])
+        """
+    heat_demand_index = create_heat_demands(prosumer, nr_heat_demands, name=name, index=index, **kwargs)
+    controllers_data = [HeatDemandControllerData(element_name='heat_demand',
+                                                 element_index=[int(idx)],
+                                                 period_index=period) for idx in heat_demand_index]
+    return _create_controllers(prosumer, HeatDemandController, controllers_data, _get_names(name, nr_heat_demands),
+                               order, level)
+
+
 def create_controlled_stratified_heat_storage(prosumer,
                                               tank_height_m,
                                               tank_internal_radius_m,
@@ -293,6 +432,67 @@ def create_controlled_stratified_heat_storage(prosumer,
     return stratified_heat_storage_controller.index
 
 
+def create_controlled_stratified_heat_storages(prosumer,
+                                               nr_stratified_heat_storages,
+                                               tank_height_m,
+                                               tank_internal_radius_m,
+                                               name=None,
+                                               index=None,
+                                               level=0,
+                                               order=0,
+                                               period=0,
+                                               init_layer_temps_c=None,
+                                               plot=False,
+                                               bypass=True,
+                                               **kwargs):
+    """
+        Creates several stratified heat storage elements in prosumer["stratified_heat_storage"] and one stratified
+        heat storage controller per storage
+
+        The element rows and the controller rows are appended to their tables at once, which is much faster than
+        calling create_controlled_stratified_heat_storage for each storage.
+
+        INPUT:
+            **prosumer** - The prosumer within these stratified heat storages should be created.
+
+            **nr_stratified_heat_storages** (int) - The number of stratified heat storages to create
+
+            **tank_height_m** (float or iterable) - The height of the storage tanks in m.
+
+            **tank_internal_radius_m** (float or iterable) - The internal radius of the storage tanks in m.
+
+        OPTIONAL:
+            **name** (string or iterable, default None) - A custom name for the storages and their controllers
+
+            **index** (iterable, default None) - Force the specified IDs of the storages if they are available
+
+            **level** (int, default 0) - The level of the controllers
+
+            **order** (int, default 0) - The order of the controllers
+
+            **period** (int, default 0) - Index of the period, default is 0
+
+            **init_layer_temps_c** (float list, default None) - Initial state of charge, the same for all the storages
+
+            **kwargs** - The other parameters of the storages (see create_stratified_heat_storage), each one given as
+            a single value or as an iterable (e.g. a DataFrame column) with one value per storage
+
+        OUTPUT:
+            **index** (numpy.ndarray) - The unique IDs of the created stratified heat storage controllers
+
+        EXAMPLE:
+            create_controlled_stratified_heat_storages(prosumer, 2, [10, 8], 0.6)
+        """
+    shs_index = create_stratified_heat_storages(prosumer, nr_stratified_heat_storages, tank_height_m,
+                                                tank_internal_radius_m, name=name, index=index, **kwargs)
+    controllers_data = [StratifiedHeatStorageControllerData(element_name='stratified_heat_storage',
+                                                            element_index=[int(idx)],
+                                                            period_index=period) for idx in shs_index]
+    return _create_controllers(prosumer, StratifiedHeatStorageController, controllers_data,
+                               _get_names(name, nr_stratified_heat_storages), order, level,
+                               init_layer_temps_c=init_layer_temps_c, plot=plot, bypass=bypass)
+
+
 def create_controlled_heat_exchanger(prosumer,
                                      t_1_in_nom_c=90,
                                      t_1_out_nom_c=65,
@@ -691,7 +891,8 @@ def create_controlled_ice_chp(prosumer,
        EXAMPLE:
            create_controlled_ice_chp(prosumer, 350, "ng", 0, "example_ice_chp")
        """
-    ice_chp_index = create_ice_chp(prosumer, size, fuel, altitude, name, in_service, index, **kwargs)
+    ice_chp_index = create_ice_chp(prosumer, size, fuel, altitude, in_service=in_service, name=name, index=index,
+                                   **kwargs)
     ice_chp_controller_data = IceChpControllerData(
         element_name='ice_chp',
         element_index=[ice_chp_index],
@@ -9,4 +9,5 @@ from .dry_cooler import *
 from .electric_boiler import *
 from .gas_boiler import *
 from .chiller import*
+from .element_toolbox import set_validation_mode, get_validation_mode, validation_mode
 
@@ -1,29 +1,91 @@
 import inspect
-from contextlib import suppress
+from contextlib import contextmanager
 from functools import wraps
 import typing
 
+VALIDATION_MODES = ("strict", "once", "off")
 
-def enforce_types(callable):
+# "strict": check the types of the arguments of every construction
+# "once": check the types of the first construction of each decorated class or function only
+# "off": never check the types
+_validation_mode = "strict"
+
+
+def set_validation_mode(mode):
+    """
+    Set the mode of the type checks done by the callables decorated by enforce_types
+
+    :param mode: "strict" to check every call, "once" to check only the first call of each decorated class or
+        function, "off" to never check
+    :return: The previous validation mode
+    """
+    global _validation_mode
+    if mode not in VALIDATION_MODES:
+        raise ValueError("Unknown validation mode '%s', expected one of %s" % (mode, VALIDATION_MODES))
+    previous_mode, _validation_mode = _validation_mode, mode
+    return previous_mode
+
+
+def get_validation_mode():
+    """
+    :return: The mode of the type checks done by the callables decorated by enforce_types
+    """
+    return _validation_mode
+
+
+@contextmanager
+def validation_mode(mode):
+    """
+    Context manager setting the validation mode (see set_validation_mode) and restoring the previous one on exit
+    """
+    previous_mode = set_validation_mode(mode)
+    try:
+        yield
+    finally:
+        set_validation_mode(previous_mode)
+
+
+def _compile_validator(callable):
+    """
+    Precompute the type checks of the annotated parameters of a callable
+
+    :return: A function checking the types of the arguments of a call
+    """
     spec = inspect.getfullargspec(callable)
+    checks = {name: (typing.get_origin(type_hint) or type_hint, type_hint)
+              for name, type_hint in spec.annotations.items() if name in spec.args or name in spec.kwonlyargs}
+    positional_checks = [(position, name, *checks[name]) for position, name in enumerate(spec.args)
+                         if name in checks]
+
+    def check_type(name, value, actual_type, type_hint):
+        if value is not None and not isinstance(value, actual_type):
+            raise TypeError(
+                'Unexpected type for \'{}\' (expected {} but found {})'.format(name, type_hint, type(value)))
+
+    def check_types(args, kwargs):
+        for position, name, actual_type, type_hint in positional_checks:
+            if position >= len(args):
+                break
+            check_type(name, args[position], actual_type, type_hint)
+        for name, value in kwargs.items():
+            if name in checks:  # Assume un-annotated parameters can be any type
+                check_type(name, value, *checks[name])
 
-    def check_types(*args, **kwargs):
-        parameters = dict(zip(spec.args, args))
-        parameters.update(kwargs)
-        for name, value in parameters.items():
-            with suppress(KeyError):  # Assume un-annotated parameters can be any type
-                type_hint = spec.annotations[name]
-                actual_type = typing.get_origin(type_hint) or type_hint
-                if not isinstance(value, actual_type):
-                    if value is None:
-                        continue
-                    raise TypeError(
-                        'Unexpected type for \'{}\' (expected {} but found {})'.format(name, type_hint, type(value)))
+    return check_types
+
+
+def enforce_types(callable):
+    check_types = _compile_validator(callable)
 
     def decorate(func):
+        checked = False
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            check_types(*args, **kwargs)
+            nonlocal checked
+            if _validation_mode == "strict" or _validation_mode == "once" and not checked:
+                check_types(args, kwargs)
+                checked = True
             return func(*args, **kwargs)
 
         return wrapper
@@ -1,11 +1,30 @@
 import numpy as np
+import pandas as pd
 import pandapipes
+import logging as pplog
 from pandapower import control
+from pandapipes.pf.pipeflow_setup import PipeflowNotConverged
 
 from pandaprosumer.controller import MappedController, BasicProsumerController
 from pandaprosumer.constants import CELSIUS_TO_K
 from pandaprosumer.mapping import FluidMixMapping
 
+# The warm start runs the steps of pandapipes.pipeflow from the internals of pandapipes, it is only enabled for the
+# pandapipes versions (major.minor) it was written for. The other versions run pandapipes.pipeflow.
+WARM_START_PANDAPIPES_VERSIONS = ("0.11",)
+try:
+    from pandapipes.idx_branch import MDOTINIT, TOUTINIT
+    from pandapipes.idx_node import PINIT, TINIT, NODE_TYPE, NODE_TYPE_T, P, T, PC
+    from pandapipes.pf.pipeflow_setup import (init_options, init_all_result_tables, create_lookups, initialize_pit,
+                                              identify_active_nodes_branches, get_net_option, get_lookup)
+    from pandapipes.pf.result_extraction import extract_all_results
+    from pandapipes.pipeflow import hydraulics, heat_transfer, bidirectional
+    WARM_START_SUPPORTED = ".".join(pandapipes.__version__.split(".")[:2]) in WARM_START_PANDAPIPES_VERSIONS
+except ImportError:
+    WARM_START_SUPPORTED = False
+
+logger = pplog.getLogger(__name__)
+
 
 def getvalue(df, index, column_key, default_value=None):
     """
@@ -20,18 +39,184 @@ def getvalue(df, index, column_key, default_value=None):
             raise KeyError(f"Index {index}; column {column_key} not found in DataFrame")
 
 
+def getcolumn(df, column_key, default_value):
+    """
+    Get a column from DF as an array, with default value for the missing column or the missing values
+    """
+    if column_key not in df.columns:
+        return np.full(len(df), default_value, dtype=float)
+    return df[column_key].fillna(default_value).values.astype(float)
+
+
+# Branch tables whose initial mass flows are given by their setpoints and must not be warm-started
+CONTROLLED_MDOT_TABLES = ("flow_control", "heat_consumer")
+
+
+def get_warm_start(net):
+    """
+    Copy the solution of the last pipeflow of the net from its internal structure (pit), to be used as
+    initial guess of the next pipeflow (see pipeflow_warm_start)
+
+    :param net: The pandapipes net, after a converged pipeflow
+    :return: The warm start data, or None if the net has no converged pipeflow result or if the warm start is not
+        supported by the installed pandapipes version
+    """
+    if not WARM_START_SUPPORTED or not net.get("converged", False) or "_pit" not in net:
+        return None
+    node_pit, branch_pit = net["_pit"]["node"], net["_pit"]["branch"]
+    return {"node_from_to": dict(get_lookup(net, "node", "from_to")),
+            "branch_from_to": dict(get_lookup(net, "branch", "from_to")),
+            "node": node_pit[:, [PINIT, TINIT]].copy(),
+            "branch": branch_pit[:, [MDOTINIT, TOUTINIT]].copy()}
+
+
+def _apply_warm_start(net, warm_start):
+    """
+    Overwrite the initial values of the freshly initialized pit with the ones of warm_start.
+    The fixed pressures and temperatures of the reference nodes and the mass flows and return temperatures of
+    the controlled branches are kept, so the new setpoints are taken into account.
+
+    :return: True if the warm start has been applied, False if the structure of the net has changed
+    """
+    node_pit, branch_pit = net["_pit"]["node"], net["_pit"]["branch"]
+    if (warm_start["node_from_to"] != get_lookup(net, "node", "from_to") or
+            warm_start["branch_from_to"] != get_lookup(net, "branch", "from_to") or
+            warm_start["node"].shape[0] != node_pit.shape[0] or
+            warm_start["branch"].shape[0] != branch_pit.shape[0]):
+        return False
+
+    p_init, t_init = warm_start["node"][:, 0], warm_start["node"][:, 1]
+    free_p = ~np.isin(node_pit[:, NODE_TYPE], [P, PC]) & np.isfinite(p_init)
+    free_t = (node_pit[:, NODE_TYPE_T] != T) & np.isfinite(t_init)
+    node_pit[free_p, PINIT] = p_init[free_p]
+    node_pit[free_t, TINIT] = t_init[free_t]
+
+    mdot_init, tout_init = warm_start["branch"][:, 0], warm_start["branch"][:, 1]
+    free_mdot = np.isfinite(mdot_init)
+    free_tout = np.isfinite(tout_init)
+    for table, (f, t) in warm_start["branch_from_to"].items():
+        if table in CONTROLLED_MDOT_TABLES:
+            free_mdot[f:t] = False
+        if table == "heat_consumer" and "treturn_k" in net.heat_consumer.columns:
+            # The return temperature setpoints of the heat consumers are kept
+            free_tout[f:t] &= np.isnan(net.heat_consumer.treturn_k.values.astype(float))
+    branch_pit[free_mdot, MDOTINIT] = mdot_init[free_mdot]
+    branch_pit[free_tout, TOUTINIT] = tout_init[free_tout]
+    return True
+
+
+def pipeflow_warm_start(net, warm_start=None, **kwargs):
+    """
+    Run the pipeflow of the net, as pandapipes.pipeflow, but start the Newton-Raphson iterations from the
+    solution of a previous pipeflow of the same net instead of the default initial values.
+
+    pandapipes initializes the pressures from the "pn_bar" of the junctions and the mass flows to a fixed value.
+    As consecutive pipeflows of the coupling controllers only differ by some setpoints, starting from the
+    previous solution reduces the number of Newton-Raphson iterations.
+
+    :param net: The pandapipes net
+    :param warm_start: The warm start data returned by get_warm_start. If None, pandapipes.pipeflow is run. If the
+        structure of the net changed, the pipeflow starts from the default initial values
+    :param kwargs: The pipeflow options
+    :return: True if the warm start has been applied
+    """
+    if warm_start is None or not WARM_START_SUPPORTED:
+        pandapipes.pipeflow(net, **kwargs)
+        return False
+    init_options(net, {"net": net, "sol_vec": None, "kwargs": kwargs})
+    calculation_mode = get_net_option(net, "mode")
+    if calculation_mode not in ["hydraulics", "sequential", "bidirectional"]:
+        # The heat mode requires the hydraulic solution vector
+        pandapipes.pipeflow(net, **kwargs)
+        return False
+
+    net.converged = False
+    init_all_result_tables(net)
+    create_lookups(net)
+    initialize_pit(net)
+    applied = warm_start is not None and _apply_warm_start(net, warm_start)
+
+    identify_active_nodes_branches(net)
+    if calculation_mode == "bidirectional":
+        bidirectional(net)
+    else:
+        hydraulics(net)
+        if calculation_mode == "sequential":
+            # Keep the internal results of the hydraulic calculation, they are reset by the heat transfer
+            internal_results = net["_internal_results"]
+            heat_transfer(net)
+            net["_internal_results"] = {**internal_results, **net["_internal_results"]}
+    extract_all_results(net, calculation_mode)
+    return applied
+
+
 class PandapipesBalanceControl(BasicProsumerController):
     """
         NetTempControl
+
+        Adjust the feed temperature of the circulation pump and the mass flow of the demanders bypasses
+        (flow_control elements with the same index as the heat_consumer elements) so every heat consumer
+        receives the feed temperature that it requires.
+
+        All the setpoints are updated simultaneously once per outer iteration, with a single pipeflow per iteration:
+
+        - Each heat consumer belongs to the zone of one pump. All the pumps are updated in the same outer iteration.
+        - The consumers temperatures are assumed to follow the pump temperature with a factor
+          (t_consumer - t_amb) / (t_pump - t_amb) (exponential heat losses in the pipes). The pump temperature is
+          set (Newton step) so the warmest consumer, relative to its requirement, gets its required temperature,
+          or so the coldest consumer that can not be heated by its bypass gets its required temperature.
+        - Raising the bypass mass flow of a consumer reduces the heat losses upstream. The bypasses are updated
+          with a secant step on the consumer temperature, or with the derivative of the exponential heat losses
+          model if there is no previous iteration.
+
+        The steps are damped, the setpoints are bounded by the "_pandaprosumer_*" attributes of the elements and
+        the total pump mass flow is capped.
+
+        The connector prosumers are evaluated in this process. They are evaluated concurrently, in worker processes
+        keeping their state, when the energy system is run with n_jobs > 1 (see
+        pandaprosumer.energy_system.control.partitioned_prosumers, which sets demand_evaluator).
+
+        :param net: The pandapipes net
+        :param pandapipes_connector_controllers: The connector controllers of the demander prosumers
+        :param hc_element_indexes: The heat_consumer elements coupled to the connector controllers
+        :param connector_prosumers: The demander prosumers
+        :param basic_prosumer_object: The controller data
+        :param pump_id: Id, or list of ids, of the controlled circ_pump_pressure elements. With several pumps,
+            each heat consumer belongs to the zone of the pump given by its "_pandaprosumer_pump_id" attribute
+        :param tol: Tolerance on the consumers feed temperatures for the convergence condition [K]
+        :param max_iter: Maximal number of outer iterations (pipeflow calls) per control step
+        :param damping: Factor applied to the Newton/secant steps, in ]0, 1]
+        :param warm_start: If True, each pipeflow starts from the solution of the previous one (previous outer
+            iteration or previous time step) instead of the default pandapipes initial values. Only supported for
+            the pandapipes versions of WARM_START_PANDAPIPES_VERSIONS, else pandapipes.pipeflow is run
     """
 
+    # The warm start and the demand evaluator are runtime state, they are not serialized
+    json_excludes = BasicProsumerController.json_excludes + ["_warm_start", "demand_evaluator"]
+    _warm_start = None
+    # Callable returning the demands of the connector prosumers, in the order of hc_element_indexes, when they are
+    # evaluated concurrently in worker processes, see pandaprosumer.energy_system.control.partitioned_prosumers
+    demand_evaluator = None
+
     def __init__(self, net, pandapipes_connector_controllers, hc_element_indexes, connector_prosumers,
-                 basic_prosumer_object=None, pump_id=0, tol=1, in_service=True, level=0, order=0, **kwargs):
+                 basic_prosumer_object=None, pump_id=0, tol=1, in_service=True, level=0, order=0, max_iter=50,
+                 damping=.8, warm_start=True, **kwargs):
         super().__init__(net, basic_prosumer_object=basic_prosumer_object, in_service=in_service,
                          order=order, level=level, initial_powerflow=True, **kwargs)
 
-        self.pump_id = pump_id  # Id of the circ pump controlled by this controller, FixMe: manage multiple pumps ?
+        self.pump_id = pump_id  # Id(s) of the circ pump(s) controlled by this controller
         self.tol = tol  # Tolerance on the temperature difference for convergence condition.
+        self.max_iter = max_iter
+        self.damping = damping
+        if warm_start and not WARM_START_SUPPORTED:
+            logger.warning("The warm start of the pipeflows is not supported with pandapipes %s, it is disabled"
+                           % pandapipes.__version__)
+        self.warm_start = warm_start and WARM_START_SUPPORTED
+        self._warm_start = None
+        self.iterations = 0  # Number of outer iterations used in the last control step
+        self.pipeflow_calls = 0  # Number of pipeflow calls in the last control step
+        self.newton_iterations = 0  # Number of pandapipes Newton-Raphson iterations in the last control step
+        self._previous_state = None
         self.pandapipes_connector_controllers = pandapipes_connector_controllers
         self.connector_prosumers = connector_prosumers
         self.hc_element_indexes = hc_element_indexes
@@ -42,6 +227,32 @@ class PandapipesBalanceControl(BasicProsumerController):
         self.hc_element_indexes.append(hc_element_index)
         self.connector_prosumers.append(connector_prosumer)
 
+    def _run_pipeflow(self, net):
+        """
+        Run the pipeflow of the net. All the pipeflow calls of the controller go through this method.
+        If warm_start is enabled, the pipeflow starts from the solution of the previous call, possibly from the
+        previous time step, and is restarted with pandapipes.pipeflow if it does not converge. Else, and for the
+        first call, pandapipes.pipeflow is run.
+
+        :param net: The pandapipes net
+        """
+        self.pipeflow_calls += 1
+        warm_start = self._warm_start if self.warm_start else None
+        if warm_start is None:
+            pandapipes.pipeflow(net)
+        else:
+            try:
+                pipeflow_warm_start(net, warm_start)
+            except PipeflowNotConverged:
+                logger.info("PandapipesBalanceControl '%s': the warm-started pipeflow did not converge, "
+                            "restarting from the default initial values" % self.name)
+                self.pipeflow_calls += 1
+                pandapipes.pipeflow(net)
+        if self.warm_start:
+            self._warm_start = get_warm_start(net)
+        internal_results = net.get("_internal_results", {})
+        self.newton_iterations += sum(v for k, v in internal_results.items() if k.startswith("iterations_"))
+
     def level_reset(self, net):
         super().level_reset(net)
         self.applied = False
@@ -52,27 +263,24 @@ class PandapipesBalanceControl(BasicProsumerController):
 
     def control_step(self, net):
         super().control_step(net)
+        self.pipeflow_calls = 0
+        self.newton_iterations = 0
 
-        for fcc, hc_element_index, connector_prosumer in zip(self.pandapipes_connector_controllers, self.hc_element_indexes, self.connector_prosumers):
-            fcc.applied = False
-            fcc.input_mass_flow_with_temp = {FluidMixMapping.TEMPERATURE_KEY: np.nan,
-                                             FluidMixMapping.MASS_FLOW_KEY: np.nan}
-            fcc._unapply_responders(connector_prosumer)
-            t_feed_c, t_ret_c, mdot_kg_per_s = fcc.t_m_to_receive(connector_prosumer)
-            # mdot_kg_per_s = sum(mdot_tab_kg_per_s)
-
-            q_ext_w = mdot_kg_per_s * 4186 * (t_feed_c - t_ret_c)
-            # min_mdot_kg_per_s = .1
-            # if mdot_kg_per_s < min_mdot_kg_per_s:
-            #     mdot_kg_per_s = min_mdot_kg_per_s
-            # min_q_ext_w = 1
-            # if q_ext_w < min_q_ext_w:
-            #     q_ext_w = min_q_ext_w  # FixMe
-
-            net.heat_consumer.loc[hc_element_index, "_pandaprosumer_t_feed_c"] = t_feed_c
-            net.heat_consumer.loc[hc_element_index, "_pandaprosumer_t_ret_c"] = t_ret_c
-            net.heat_consumer.loc[hc_element_index, "qext_w"] = q_ext_w
-            net.heat_consumer.loc[hc_element_index, "controlled_mdot_kg_per_s"] = mdot_kg_per_s
+        t_feed_c, t_ret_c, mdot_kg_per_s = self._get_connectors_demands()
+        q_ext_w = mdot_kg_per_s * 4186 * (t_feed_c - t_ret_c)
+        # min_mdot_kg_per_s = .1
+        # if mdot_kg_per_s < min_mdot_kg_per_s:
+        #     mdot_kg_per_s = min_mdot_kg_per_s
+        # min_q_ext_w = 1
+        # if q_ext_w < min_q_ext_w:
+        #     q_ext_w = min_q_ext_w  # FixMe
+
+        # One vectorized assignment per column
+        hc_element_indexes = list(self.hc_element_indexes)
+        net.heat_consumer.loc[hc_element_indexes, "_pandaprosumer_t_feed_c"] = t_feed_c
+        net.heat_consumer.loc[hc_element_indexes, "_pandaprosumer_t_ret_c"] = t_ret_c
+        net.heat_consumer.loc[hc_element_indexes, "qext_w"] = q_ext_w
+        net.heat_consumer.loc[hc_element_indexes, "controlled_mdot_kg_per_s"] = mdot_kg_per_s
 
         # print("PandapipesBalanceControl.control_step")
         # print(self.pandapipes_connector_controllers)
@@ -92,111 +300,229 @@ class PandapipesBalanceControl(BasicProsumerController):
                 "The circ_pump_pressure elements must have a 't_flow_k' attribute"
 
             q_ext_thresold_w = 5000
-            tfeed_set_tab_c = [net.heat_consumer.loc[consumer, "_pandaprosumer_t_feed_c"] for consumer in net.heat_consumer.index if net.heat_consumer.loc[consumer, "qext_w"] > q_ext_thresold_w]
-            if not tfeed_set_tab_c:
-                tfeed_set_tab_c = [net.heat_consumer.loc[consumer, "_pandaprosumer_t_feed_c"] for consumer in
-                                   net.heat_consumer.index]
-            net.circ_pump_pressure.loc[self.pump_id, "t_flow_k"] = max(tfeed_set_tab_c) + CELSIUS_TO_K + 5  # self.tfeed_set_k + 5  # net.res_heat_consumer.t_from_k.max() + 10
-            pandapipes.pipeflow(net)
+            pump_ids, zones = self._get_zones(net)
+            tfeed_set_tab_c = net.heat_consumer["_pandaprosumer_t_feed_c"].values.astype(float)
+            significant = net.heat_consumer["qext_w"].values > q_ext_thresold_w
+            t_flow_k = net.circ_pump_pressure.loc[pump_ids, "t_flow_k"].values.astype(float)
+            for i in range(len(pump_ids)):
+                in_zone = zones == i
+                if not in_zone.any():
+                    continue
+                if (in_zone & significant).any():
+                    in_zone &= significant
+                t_flow_k[i] = tfeed_set_tab_c[in_zone].max() + CELSIUS_TO_K + 5  # self.tfeed_set_k + 5  # net.res_heat_consumer.t_from_k.max() + 10
+            net.circ_pump_pressure.loc[pump_ids, "t_flow_k"] = t_flow_k
 
         # self.first = True
 
-        count = 0
-        MAX_ITER = 50
-
-        while not self.applied and count < MAX_ITER:
-            count += 1
-            converged = True
-            # The temperature supplied by the pump must be higher than the maximum temperatures required by the consumers
-            min_t_pump_feed_k = net.heat_consumer["_pandaprosumer_t_feed_c"].max() + CELSIUS_TO_K
-            # Need to iterate more than the maximum number of iterations max_iter. ToDo: converge faster
-            # ToDo: In the general case, it is not possible that every consumer get the temperature that they require, what to do ?
-            for i in range(50):
-                pandapipes.pipeflow(net)
-                max_t_pump_feed_k = getvalue(net.circ_pump_pressure, self.pump_id, "_pandaprosumer_max_t_pump_feed_k",
-                                             100 + CELSIUS_TO_K)
-                max_mdot_pump_kg_per_s = getvalue(net.circ_pump_pressure, self.pump_id,
-                                                  "_pandaprosumer_max_mdot_pump_kg_per_s", 100)
-
-                if net.res_circ_pump_pressure.loc[self.pump_id, "t_to_k"] < min_t_pump_feed_k:
-                    net.circ_pump_pressure.loc[self.pump_id, "t_flow_k"] = min_t_pump_feed_k + 1
-                    converged = False
-                elif net.res_circ_pump_pressure.loc[self.pump_id, "t_to_k"] > max_t_pump_feed_k:
-                    net.circ_pump_pressure.loc[self.pump_id, "t_flow_k"] = max_t_pump_feed_k - 1
-                    converged = False
-                else:
-                    for consumer in net.heat_consumer.index:
-                        min_mdot_dmd_kg_per_s = getvalue(net.heat_consumer, consumer,
-                                                         "_pandaprosumer_min_mdot_dmd_kg_per_s", .05)
-                        max_mdot_dmd_kg_per_s = getvalue(net.heat_consumer, consumer,
-                                                         "_pandaprosumer_max_mdot_dmd_kg_per_s", 10000)
-                        min_t_dmd_return_k = getvalue(net.heat_consumer, consumer, "_pandaprosumer_min_t_dmd_return_k",
-                                                      10 + CELSIUS_TO_K)
-                        t_consumer_from_k = net.res_heat_consumer.loc[consumer, "t_from_k"]
-                        t_consumer_to_k = net.res_heat_consumer.loc[consumer, "t_outlet_k"]
-                        mdot_consumer_kg_per_s = net.res_flow_control.loc[
-                            consumer, "mdot_from_kg_per_s"]  # FixMe: + net.res_heat_consumer.loc[consumer, "mdot_from_kg_per_s"]
-                        if mdot_consumer_kg_per_s < min_mdot_dmd_kg_per_s:
-                            net.flow_control.loc[consumer, "controlled_mdot_kg_per_s"] = min_mdot_dmd_kg_per_s + .1
-                            converged = False
-                            break
-                        elif mdot_consumer_kg_per_s > max_mdot_dmd_kg_per_s:
-                            net.flow_control.loc[consumer, "controlled_mdot_kg_per_s"] = max_mdot_dmd_kg_per_s - .1
-                            converged = False
-                            break
-                        # Convergence condition:
-                        if abs(t_consumer_from_k - (
-                                net.heat_consumer.loc[consumer, "_pandaprosumer_t_feed_c"] + CELSIUS_TO_K)) > self.tol:
-                            if t_consumer_from_k < (
-                                    net.heat_consumer.loc[consumer, "_pandaprosumer_t_feed_c"] + CELSIUS_TO_K):
-                                if mdot_consumer_kg_per_s < max_mdot_dmd_kg_per_s:
-                                    if net.res_circ_pump_pressure.loc[
-                                        self.pump_id, "mdot_from_kg_per_s"] + .1 < max_mdot_pump_kg_per_s:
-                                        # Raising the mass flow rate of the consumer reduce the heat losses in the pipes
-                                        net.flow_control.loc[consumer, "controlled_mdot_kg_per_s"] += .1
-                                        converged = False
-                                else:
-                                    if net.res_circ_pump_pressure.loc[self.pump_id, "t_to_k"] + .1 < max_t_pump_feed_k:
-                                        # Increasing the temperature of the pump feed increase the temperature at the consumers
-                                        net.circ_pump_pressure.loc[self.pump_id, "t_flow_k"] += .1
-                                        converged = False
-                            else:
-                                if net.circ_pump_pressure.loc[self.pump_id, "t_flow_k"] - .1 > min_t_pump_feed_k and (
-                                        net.res_heat_consumer["t_from_k"] > net.heat_consumer[
-                                    "_pandaprosumer_t_feed_c"]).all():
-                                    net.circ_pump_pressure.loc[self.pump_id, "t_flow_k"] -= .1
-                                    converged = False
-                                else:
-                                    if mdot_consumer_kg_per_s - .2 > min_mdot_dmd_kg_per_s:
-                                        # Lowering the mass flow rate of the consumer increase the heat losses in the pipes
-                                        net.flow_control.loc[consumer, "controlled_mdot_kg_per_s"] -= .2
-                                        converged = False
-                            pandapipes.pipeflow(net)
-                            t_consumer_from_k = net.res_heat_consumer.loc[consumer, "t_from_k"]
-                            t_consumer_to_k = net.res_heat_consumer.loc[consumer, "t_outlet_k"]
-                            mdot_consumer_kg_per_s = net.res_heat_consumer.loc[consumer, "mdot_from_kg_per_s"]
-                            if t_consumer_to_k < min_t_dmd_return_k:
-                                # If the return temperature is too low, reduce the heat consumption of the consumer.
-                                # Some demand will not be satisfied
-                                # ToDo: If the temperature that the consumer recieves do not match "_pandaprosumer_t_feed_c",
-                                # or the mass flow rate through the consumer is changed, the way the consumer react could change,
-                                # so maybe should reexecute the consumer prosumer with the new values
-                                net.heat_consumer.loc[consumer, "qext_w"] = mdot_consumer_kg_per_s * 4186 * (
-                                            t_consumer_from_k - min_t_dmd_return_k) - 1
-                                converged = False
-                                pandapipes.pipeflow(net)
-                    pandapipes.pipeflow(net)
-
-                    if converged:
-                        break
-
-            self.applied = converged
-
-        result_fluid_mix = []
-        # for i, heat_consumer in net.res_heat_consumer.iterrows():
-        for hc_index in self.hc_element_indexes:
-            result_fluid_mix.append({FluidMixMapping.TEMPERATURE_KEY: net.res_heat_consumer.loc[hc_index].t_from_k - CELSIUS_TO_K,
-                                     FluidMixMapping.MASS_FLOW_KEY: net.res_heat_consumer.loc[hc_index].mdot_from_kg_per_s})
+        # One pipeflow per outer iteration, the first one evaluates the initial setpoints
+        self._previous_state = None
+        converged = False
+        self.iterations = 0
+        while not converged and self.iterations < self.max_iter:
+            self.iterations += 1
+            self._run_pipeflow(net)
+            converged = self._update_setpoints(net)
+        if not converged:
+            # Update the results with the last setpoints
+            self._run_pipeflow(net)
+        logger.debug("PandapipesBalanceControl '%s': %s iterations, %s pipeflow calls, converged: %s"
+                     % (self.name, self.iterations, self.pipeflow_calls, converged))
+
+        self.applied = converged
+
+        res_hc = net.res_heat_consumer.loc[list(self.hc_element_indexes), ["t_from_k", "mdot_from_kg_per_s"]].values
+        result_fluid_mix = [{FluidMixMapping.TEMPERATURE_KEY: t_k - CELSIUS_TO_K,
+                             FluidMixMapping.MASS_FLOW_KEY: mdot_kg_per_s}
+                            for t_k, mdot_kg_per_s in res_hc.tolist()]
 
         result = np.array([[]])
         self.finalize(net, result, result_fluid_mix)
+
+    def _get_connectors_demands(self):
+        """
+        Reset the connector controllers and get the demands of their prosumers.
+
+        The prosumers are evaluated serially in this process, or concurrently by the demand evaluator if the
+        prosumers are run in worker processes (run_timeseries of the energy system with n_jobs > 1, see
+        pandaprosumer.energy_system.control.partitioned_prosumers).
+
+        :return: The arrays of the required feed temperatures [C], return temperatures [C] and mass flows [kg/s],
+            in the order of hc_element_indexes
+        """
+        if self.demand_evaluator is not None:
+            demands = np.asarray(self.demand_evaluator(self), dtype=float).reshape(-1, 3)
+            return demands[:, 0], demands[:, 1], demands[:, 2]
+        demands = list(map(self._get_connector_demand, self.pandapipes_connector_controllers,
+                           self.connector_prosumers))
+        demands = np.array(demands, dtype=float).reshape(-1, 3)
+        return demands[:, 0], demands[:, 1], demands[:, 2]
+
+    @staticmethod
+    def _get_connector_demand(fcc, connector_prosumer):
+        """
+        Reset a connector controller and get the demand of its prosumer
+
+        :param fcc: The PandapipesConnectorController
+        :param connector_prosumer: The demander prosumer of the connector controller
+        :return: A tuple (feed temperature [C], return temperature [C], mass flow [kg/s])
+        """
+        fcc.applied = False
+        fcc.input_mass_flow_with_temp = {FluidMixMapping.TEMPERATURE_KEY: np.nan,
+                                         FluidMixMapping.MASS_FLOW_KEY: np.nan}
+        fcc._unapply_responders(connector_prosumer)
+        return fcc.t_m_to_receive(connector_prosumer)
+
+    def _get_zones(self, net):
+        """
+        :return: A tuple (array of the controlled pump ids, array with the position of the pump of each heat
+            consumer in the first array)
+        """
+        pump_ids = np.atleast_1d(self.pump_id)
+        if len(pump_ids) == 1 and "_pandaprosumer_pump_id" not in net.heat_consumer.columns:
+            return pump_ids, np.zeros(len(net.heat_consumer), dtype=np.int64)
+        if "_pandaprosumer_pump_id" not in net.heat_consumer.columns:
+            raise ValueError("With several pumps, the heat_consumer elements must have a "
+                             "'_pandaprosumer_pump_id' attribute")
+        zones = pd.Index(pump_ids).get_indexer(net.heat_consumer["_pandaprosumer_pump_id"].values)
+        if (zones < 0).any():
+            raise ValueError("The pumps of the heat_consumer elements %s are not controlled by this controller"
+                             % list(net.heat_consumer.index[zones < 0]))
+        return pump_ids, zones
+
+    def _update_setpoints(self, net):
+        """
+        Read the results of the last pipeflow and update the setpoints of the pumps and of the bypasses
+
+        :param net: The pandapipes net
+        :return: True if the consumers temperatures are within the tolerance, or if no setpoint can be
+            improved anymore, and no setpoint had to be corrected
+        """
+        consumers = net.heat_consumer.index
+        pump_ids, zones = self._get_zones(net)
+        n_pumps = len(pump_ids)
+        t_set_k = net.heat_consumer["_pandaprosumer_t_feed_c"].values.astype(float) + CELSIUS_TO_K
+        # Read the results once, as arrays
+        t_k, t_return_k, mdot_consumer_kg_per_s = net.res_heat_consumer.loc[
+            consumers, ["t_from_k", "t_outlet_k", "mdot_from_kg_per_s"]].values.T
+        mdot_bypass_kg_per_s = net.res_flow_control.loc[consumers, "mdot_from_kg_per_s"].values
+        min_mdot_bypass_kg_per_s = getcolumn(net.heat_consumer, "_pandaprosumer_min_mdot_dmd_kg_per_s", .05)
+        max_mdot_bypass_kg_per_s = getcolumn(net.heat_consumer, "_pandaprosumer_max_mdot_dmd_kg_per_s", 10000)
+        min_t_return_k = getcolumn(net.heat_consumer, "_pandaprosumer_min_t_dmd_return_k", 10 + CELSIUS_TO_K)
+
+        # Values per pump
+        pumps = net.circ_pump_pressure.loc[pump_ids]
+        t_pump_k = pumps["t_flow_k"].values.astype(float)
+        mdot_pump_kg_per_s = net.res_circ_pump_pressure.loc[pump_ids, "mdot_from_kg_per_s"].values
+        max_t_pump_k = getcolumn(pumps, "_pandaprosumer_max_t_pump_feed_k", 100 + CELSIUS_TO_K)
+        max_mdot_pump_kg_per_s = getcolumn(pumps, "_pandaprosumer_max_mdot_pump_kg_per_s", 100)
+        has_consumers = np.bincount(zones, minlength=n_pumps) > 0
+        # The temperature supplied by a pump must be higher than the maximum temperatures required by its consumers
+        min_t_pump_k = np.full(n_pumps, -np.inf)
+        np.maximum.at(min_t_pump_k, zones, t_set_k)
+        min_t_pump_k[~has_consumers] = t_pump_k[~has_consumers]
+        t_amb_k = self._get_ambient_temperature_k(net)
+
+        corrected = False
+
+        # If the return temperature is too low, reduce the heat consumption of the consumer.
+        # Some demand will not be satisfied
+        # ToDo: If the temperature that the consumer recieves do not match "_pandaprosumer_t_feed_c",
+        # or the mass flow rate through the consumer is changed, the way the consumer react could change,
+        # so maybe should reexecute the consumer prosumer with the new values
+        return_too_cold = t_return_k < min_t_return_k
+        if return_too_cold.any():
+            net.heat_consumer.loc[consumers[return_too_cold], "qext_w"] = (
+                    mdot_consumer_kg_per_s * 4186 * (t_k - min_t_return_k) - 1)[return_too_cold]
+            corrected = True
+
+        # Sensitivity of the consumers temperatures to their pump temperature (exponential heat losses model)
+        t_consumer_pump_k = t_pump_k[zones]
+        pump_slope = np.clip((t_k - t_amb_k) / np.maximum(t_consumer_pump_k - t_amb_k, 1e-3), .1, 1)
+        bypass_slope = self._get_bypass_slope(t_k, t_consumer_pump_k, t_amb_k, pump_slope, mdot_consumer_kg_per_s,
+                                              mdot_bypass_kg_per_s)
+
+        error_k = t_k - t_set_k
+        can_heat = ((mdot_bypass_kg_per_s < max_mdot_bypass_kg_per_s - 1e-6) & (bypass_slope > 1e-6) &
+                    (mdot_pump_kg_per_s[zones] < max_mdot_pump_kg_per_s[zones] - 1e-6))
+        cold_stuck = (error_k < -self.tol) & ~can_heat
+        # Increasing the temperature of the pump feed increase the temperature at the consumers of its zone.
+        # If no consumer of the zone is stuck cold, set the pump temperature so the warmest consumer get the
+        # temperature that it requires, the colder ones are heated by their bypass
+        zone_cold_stuck = np.bincount(zones, weights=cold_stuck, minlength=n_pumps) > 0
+        delta_t_pump_k = np.full(n_pumps, -np.inf)
+        np.maximum.at(delta_t_pump_k, zones, np.where(cold_stuck, -error_k / pump_slope, -np.inf))
+        warmest_k = np.full(n_pumps, -np.inf)
+        np.maximum.at(warmest_k, zones, error_k / pump_slope)
+        delta_t_pump_k = np.where(zone_cold_stuck, delta_t_pump_k, -warmest_k)
+        delta_t_pump_k[~has_consumers] = 0
+        new_t_pump_k = np.clip(t_pump_k + self.damping * delta_t_pump_k, min_t_pump_k, max_t_pump_k)
+        predicted_error_k = error_k + pump_slope * (new_t_pump_k - t_pump_k)[zones]
+
+        # Raising the mass flow rate of the bypass reduce the heat losses in the pipes, lowering it increase them
+        delta_bypass_kg_per_s = np.zeros(len(consumers))
+        to_correct = (np.abs(predicted_error_k) > self.tol) & (bypass_slope > 1e-6)
+        delta_bypass_kg_per_s[to_correct] = -self.damping * predicted_error_k[to_correct] / bypass_slope[to_correct]
+        # Limit the step to the mass flow through the consumer and its bypass
+        max_step_kg_per_s = np.maximum(mdot_consumer_kg_per_s + mdot_bypass_kg_per_s, .1)
+        delta_bypass_kg_per_s = np.clip(delta_bypass_kg_per_s, -max_step_kg_per_s, max_step_kg_per_s)
+        new_mdot_bypass_kg_per_s = np.clip(mdot_bypass_kg_per_s + delta_bypass_kg_per_s,
+                                           min_mdot_bypass_kg_per_s, max_mdot_bypass_kg_per_s)
+        # Cap the increase of the total mass flow of each pump
+        increase_kg_per_s = np.maximum(new_mdot_bypass_kg_per_s - mdot_bypass_kg_per_s, 0)
+        zone_increase_kg_per_s = np.bincount(zones, weights=increase_kg_per_s, minlength=n_pumps)
+        available_kg_per_s = np.maximum(max_mdot_pump_kg_per_s - mdot_pump_kg_per_s, 0)
+        over_cap = zone_increase_kg_per_s > available_kg_per_s
+        if over_cap.any():
+            reduction = np.zeros(n_pumps)
+            reduction[over_cap] = 1 - available_kg_per_s[over_cap] / zone_increase_kg_per_s[over_cap]
+            new_mdot_bypass_kg_per_s -= increase_kg_per_s * reduction[zones]
+
+        # The resulting mass flows only match the setpoints up to the pipeflow tolerance
+        out_of_bounds = ((mdot_bypass_kg_per_s < min_mdot_bypass_kg_per_s - 1e-6) |
+                         (mdot_bypass_kg_per_s > max_mdot_bypass_kg_per_s + 1e-6))
+        corrected |= out_of_bounds.any() or not np.all((min_t_pump_k <= t_pump_k) & (t_pump_k <= max_t_pump_k))
+
+        within_tol = (np.abs(error_k) <= self.tol).all()
+        stalled = (np.all(np.abs(new_t_pump_k - t_pump_k) < 1e-3) and
+                   np.all(np.abs(new_mdot_bypass_kg_per_s - mdot_bypass_kg_per_s) < 1e-4))
+        if not corrected and (within_tol or stalled):
+            # Keep the setpoints of the last pipeflow so the results are consistent with them
+            return True
+
+        self._previous_state = (t_consumer_pump_k, t_k, mdot_bypass_kg_per_s)
+        net.circ_pump_pressure.loc[pump_ids, "t_flow_k"] = new_t_pump_k
+        net.flow_control.loc[consumers, "controlled_mdot_kg_per_s"] = new_mdot_bypass_kg_per_s
+        return False
+
+    def _get_bypass_slope(self, t_k, t_pump_k, t_amb_k, pump_slope, mdot_consumer_kg_per_s, mdot_bypass_kg_per_s):
+        """
+        Sensitivity of the consumers temperatures to the mass flow of their bypass [K/(kg/s)]
+
+        Secant on the previous outer iteration of the control step, with the effect of the pump temperature
+        change removed. If there is no previous iteration or the secant is not usable, use the derivative of the
+        exponential heat losses model t - t_amb = (t_pump - t_amb) * exp(-UA / (mdot * cp)):
+        dt/dmdot = (t - t_amb) * ln((t_pump - t_amb) / (t - t_amb)) / mdot
+        """
+        mdot_path_kg_per_s = np.maximum(mdot_consumer_kg_per_s + mdot_bypass_kg_per_s, 1e-3)
+        ratio = np.maximum((t_pump_k - t_amb_k) / np.maximum(t_k - t_amb_k, 1e-3), 1)
+        slope = (t_k - t_amb_k) * np.log(ratio) / mdot_path_kg_per_s
+
+        if self._previous_state is not None:
+            previous_t_pump_k, previous_t_k, previous_mdot_bypass_kg_per_s = self._previous_state
+            delta_mdot_kg_per_s = mdot_bypass_kg_per_s - previous_mdot_bypass_kg_per_s
+            delta_t_k = t_k - previous_t_k - pump_slope * (t_pump_k - previous_t_pump_k)
+            valid = np.abs(delta_mdot_kg_per_s) > 1e-4
+            secant = np.divide(delta_t_k, delta_mdot_kg_per_s, out=np.zeros_like(slope), where=valid)
+            valid &= secant > 1e-6
+            slope[valid] = secant[valid]
+        return slope
+
+    @staticmethod
+    def _get_ambient_temperature_k(net):
+        """
+        :return: The mean external temperature of the pipes, or the ambient temperature of the pipeflow options
+        """
+        if "text_k" in net.pipe.columns and len(net.pipe) and not net.pipe.text_k.isna().all():
+            return net.pipe.text_k.mean()
+        return net.get("user_pf_options", {}).get("ambient_temperature", 293.15)
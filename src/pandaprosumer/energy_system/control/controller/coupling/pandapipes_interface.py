@@ -6,7 +6,7 @@ class ReadPipeProdControl(MappedController):
     """
         ReadPipeProdControl
 
-        Read the temperature at the first element and the mass flow at the second element in the net.
+        Read the temperature at the return and flow junctions of the element and its mass flow in the net.
         Write these data to the output for mapping
     """
 
@@ -21,14 +21,59 @@ class ReadPipeProdControl(MappedController):
     def control_step(self, net):
         super().control_step(net)
 
-        ret_jct_id = net[self.element_name]['return_junction'].values[0]
-        t_c = net.res_junction.loc[ret_jct_id]['t_k'] - 273.15
-        feed_jct_id = net[self.element_name]['flow_junction'].values[0]
-        tflow_c = net.res_junction.loc[feed_jct_id]['t_k'] - 273.15
-        mdot_kg_per_s = net['res_'+self.element_name].loc[self.element_index, "mdot_from_kg_per_s"].values[0]
+        element_index = self.element_index[0]
+        ret_jct_id = net[self.element_name].at[element_index, 'return_junction']
+        t_c = net.res_junction.at[ret_jct_id, 't_k'] - 273.15
+        feed_jct_id = net[self.element_name].at[element_index, 'flow_junction']
+        tflow_c = net.res_junction.at[feed_jct_id, 't_k'] - 273.15
+        mdot_kg_per_s = net['res_' + self.element_name].at[element_index, "mdot_from_kg_per_s"]
 
         result = np.array([[t_c, tflow_c, mdot_kg_per_s]])
 
         self.finalize(net, result)
 
         self.applied = True
+
+
+class BulkReadPipeProdControl(MappedController):
+    """
+        BulkReadPipeProdControl
+
+        Read, for all the elements at once, the temperature at their return and flow junctions and their mass flow
+        in the net, instead of one ReadPipeProdControl per element.
+        The positions of the elements and of their junctions in the result tables are resolved once at
+        initialization, the results are then extracted as arrays after each pipeflow.
+
+        Result columns: the return temperature (C), the feed temperature (C) and the mass flow (kg/s) of each element,
+        in the order of element_index (e.g. ['t_c_0', 'tfeed_c_0', 'mdot_kg_per_s_0', 't_c_1', ...]), to be mapped
+        to the prosumer controllers of each element
+    """
+
+    @classmethod
+    def name(cls):
+        return "bulk_read_pipe_controller"
+
+    def __init__(self, net, heat_producer_data, in_service=True,
+                 recycle=False, order=0, level=0, **kwargs):
+        super().__init__(net, heat_producer_data, in_service=in_service, order=order, level=level, **kwargs)
+        if len(self.result_columns) != 3 * len(self.element_index):
+            raise ValueError(f"BulkReadPipeProdControl '{self.name}' needs 3 result columns per element, got "
+                             f"{len(self.result_columns)} result columns for {len(self.element_index)} elements")
+        # The result tables of pandapipes have the same index as the element tables
+        elements = net[self.element_name].loc[self.element_index]
+        self._element_positions = net[self.element_name].index.get_indexer(self.element_index)
+        self._return_positions = net.junction.index.get_indexer(elements['return_junction'].values)
+        self._flow_positions = net.junction.index.get_indexer(elements['flow_junction'].values)
+
+    def control_step(self, net):
+        super().control_step(net)
+
+        t_k = net.res_junction['t_k'].values
+        result = np.empty([len(self._element_positions), 3])
+        result[:, 0] = t_k[self._return_positions] - 273.15
+        result[:, 1] = t_k[self._flow_positions] - 273.15
+        result[:, 2] = net['res_' + self.element_name]['mdot_from_kg_per_s'].values[self._element_positions]
+
+        self.finalize(net, result.reshape(1, -1))
+
+        self.applied = True
@@ -1,3 +1,7 @@
+import numpy as np
+
+from pandapower.auxiliary import _detect_read_write_flag, write_to_net
+
 from pandaprosumer.controller.mapped import MappedController
 
 
@@ -31,3 +35,57 @@ class LoadControl(MappedController):
         self.finalize(net, [])
 
         self.applied = True
+
+
+class AggregatedLoadControl(MappedController):
+    """
+        AggregatedLoadControl
+
+        Mapped inputs: one power column (kW) per element, in the order of element_index
+        (e.g. input_columns=['p_in_kw_0', 'p_in_kw_1'] for element_index=[0, 1])
+
+        Control step: Write the powers of all the elements to their 'p_mw' property (converting kW to MW)
+        in a single vectorized write, instead of one LoadControl per element.
+        The elements with no power mapped in the time step keep their value.
+
+        If recycle is True, the controller declares to pandapower that it only changes the bus powers, so the
+        time series can reuse the admittance matrix of the net (see pandapower ConstControl.set_recycle).
+
+        Note: Can directly be used for static generators if element_name is 'sgen' instead of 'load'
+    """
+
+    @classmethod
+    def name(cls):
+        return "pandapower_aggregated_load_controller"
+
+    def __init__(self, net, load_ctrl_object, in_service=True,
+                 recycle=False, order=0, level=0, **kwargs):
+        super().__init__(net, load_ctrl_object, in_service=in_service, order=order, level=level, **kwargs)
+        if len(self.input_columns) != len(self.element_index):
+            raise ValueError(f"AggregatedLoadControl '{self.name}' needs one input column per element, got "
+                             f"{len(self.input_columns)} input columns for {len(self.element_index)} elements")
+        self.write_flag, self.variable = _detect_read_write_flag(net, self.element_name, self.element_index, "p_mw")
+        net.controller.at[self.index, 'recycle'] = recycle
+        self.set_recycle(net)
+
+    def set_recycle(self, net):
+        """
+        Only the bus powers of the net change, unless recycle was set to False when creating the controller
+
+        :param net: The pandapower net
+        """
+        if net.controller.at[self.index, 'recycle'] is False or self.element_name not in ["load", "sgen", "storage"]:
+            net.controller.at[self.index, 'recycle'] = False
+            return
+        net.controller.at[self.index, 'recycle'] = dict(trafo=False, gen=False, bus_pq=True)
+
+    def control_step(self, net):
+        super().control_step(net)
+        p_mw = self.inputs[0] / 1000
+        if np.isnan(p_mw).any():
+            p_mw = np.where(np.isnan(p_mw), net[self.element_name].loc[self.element_index, self.variable].values, p_mw)
+        write_to_net(net, self.element_name, self.element_index, self.variable, p_mw, self.write_flag)
+
+        self.finalize(net, [])
+
+        self.applied = True
@@ -0,0 +1,963 @@
+# Copyright (c) 2020-2025 by Fraunhofer Institute for Energy Economics
+# and Energy System Technology (IEE), Kassel. All rights reserved.
+# Use of this source code is governed by a BSD-style license that can be found in the LICENSE file.
+
+"""
+Partitioned co-simulation of an energy system.
+
+The prosumers of the energy system are distributed over worker processes, where they stay resident for the whole time
+series, while the nets and their controllers stay in the coordinator process that runs the control loop of the
+energy system. In the controller order of the coordinator, the controllers of the prosumers are replaced, level by
+level, by a RemoteLevel that forwards the calls to the workers.
+
+Only the boundary values are exchanged between the processes, through a shared memory buffer:
+
+- the values of the FluidMixMapping/GenericMapping (e.g. FluidMixEnergySystemMapping and GenericEnergySystemMapping)
+  whose initiator and responder are in different processes (temperature, mass flow, power...). They are applied by
+  the process of the responder, in the order in which they were executed, before its next command
+- the demands of the connector prosumers of the PandapipesBalanceControl controllers
+
+The prosumers coupled with each other by energy system mappings are kept in the same worker. The prosumers must not be
+coupled to the nets in any other way, and the energy system must not have controllers in service.
+
+In the pipelined mode, a worker speculates, while the coordinator solves the nets with the demands of its connector
+prosumers, the next cycle of commands: the end of the time step and the beginning of the next one, until the demands
+of the next time step. The cycle is the one of the previous time step, shifted by one time step, with assumed
+boundary values: the connector prosumers are supplied as requested and the other boundary values are the ones of the
+previous time step. The speculation runs in a thread of the worker, on the prosumers, whose state is captured before.
+The next commands of the coordinator are answered with the speculated replies as long as they and their boundary
+values match the speculated ones, within a relative tolerance. Else the state of the prosumers is restored and the
+commands received since the demands are run again.
+"""
+
+import multiprocessing
+import pickle
+import threading
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+from pandapipes.multinet.control.run_control_multinet import _evaluate_multinet, net_initialization_multinet
+from pandapower.control.run_control import control_initialization, control_finalization, control_implementation, \
+    _control_step
+
+from pandaprosumer.energy_system.control.controller.coupling.pandapipes_balance import PandapipesBalanceControl
+from pandaprosumer.energy_system.control.run_control_energy_system import prepare_run_ctrl, \
+    _compute_controller_order_energy_system
+from pandaprosumer.energy_system.create_energy_system import create_empty_energy_system
+from pandaprosumer.mapping import FluidMixMapping, GenericMapping
+from pandaprosumer.run_time_series import time_series_initialization, time_series_finalization, \
+    _restore_controllers_state
+
+try:
+    import pandaplan.core.pplog as logging
+except ImportError:
+    import logging
+
+logger = logging.getLogger(__name__)
+
+# Destination of the boundary values sent by the workers
+COORDINATOR = -1
+# Commands of the coordinator with a time step argument (position in the arguments), shifted to the next time step
+# when a cycle of commands is speculated
+_TIME_ARGUMENTS = {"time_step": 1, "finalize_step": 1}
+# Commands starting or ending a run, the cycles of commands are recorded again from the start after them
+_RUN_COMMANDS = ("time_series_initialization", "time_series_finalization", "collect")
+
+
+class _BoundaryInitiator:
+    """
+    Stand-in for the initiator controller of a boundary mapping, with the mapped results read from the buffer
+    """
+
+    def __init__(self, attributes):
+        self.__dict__.update(attributes)
+
+
+class _Boundary:
+    """
+    An energy system mapping whose initiator and responder are in different processes, and its slot in the shared
+    memory buffer
+
+    :param mapping: The mapping
+    :param responder_id: The index of the responder controller in the responder container
+    :param initiator: The initiator controller
+    :param slot: Position of the values of the mapping in the buffer
+    :param destination: Index of the worker of the responder, or COORDINATOR
+    """
+
+    def __init__(self, mapping, responder_id, initiator, slot, destination):
+        self.order = getattr(mapping, "order", None)
+        self.responder_id = responder_id
+        self.slot = slot
+        self.destination = destination
+        # Attributes of the initiator that the mappings may check
+        self.initiator_attributes = {key: getattr(initiator, key) for key in ("name", "index", "level", "order")
+                                     if hasattr(initiator, key)}
+        if isinstance(mapping, FluidMixMapping):
+            self.columns = None
+            self.size = 2
+        elif isinstance(mapping, GenericMapping):
+            columns = mapping.initiator_column
+            self.columns = list(columns) if isinstance(columns, (list, tuple)) else [columns]
+            self.size = len(self.columns) * getattr(initiator, "_nb_elements", 1)
+        else:
+            raise ValueError("The mapping %s of the controller '%s' can not be partitioned, only the "
+                             "FluidMixMapping and GenericMapping can" % (mapping, initiator.name))
+
+    def extract(self, initiator):
+        """
+        :param initiator: The initiator controller
+        :return: The values mapped by the initiator, as a flat array
+        """
+        if self.columns is None:
+            mix = initiator.result_mass_flow_with_temp[self.order]
+            values = [mix[FluidMixMapping.TEMPERATURE_KEY], mix[FluidMixMapping.MASS_FLOW_KEY]]
+        else:
+            column_indexes = [initiator.result_columns.index(column) for column in self.columns]
+            values = np.asarray(initiator.step_results)[:, column_indexes]
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size != self.size:
+            raise ValueError("The controller '%s' mapped %s values instead of %s through a partitioned mapping"
+                             % (initiator.name, values.size, self.size))
+        return values
+
+    def initiator(self, values):
+        """
+        :param values: The values mapped by the initiator, as a flat array
+        :return: A stand-in for the initiator controller, to apply the mapping in the process of the responder
+        """
+        initiator = _BoundaryInitiator(self.initiator_attributes)
+        if self.columns is None:
+            initiator.result_mass_flow_with_temp = {self.order: {FluidMixMapping.TEMPERATURE_KEY: values[0],
+                                                                 FluidMixMapping.MASS_FLOW_KEY: values[1]}}
+        else:
+            initiator.result_columns = self.columns
+            initiator.step_results = values.reshape(-1, len(self.columns))
+        return initiator
+
+
+class _BoundaryMapping:
+    """
+    Takes the place of a mapping in the mapping table of the container of its initiator when its responder is in
+    another process: the mapped values are sent to the other process instead.
+    Boundary mappings are never chained, since their responder can not be reached.
+    """
+
+    no_chain = True
+    responder_net = None
+
+    def __init__(self, boundary):
+        self.boundary = boundary
+        self.endpoint = None
+
+    def __getstate__(self):
+        return {"boundary": self.boundary, "endpoint": None}
+
+    def map(self, initiator_controller, responder_controller_id):
+        self.endpoint.send(self.boundary, self.boundary.extract(initiator_controller))
+
+
+class _BoundaryEndpoint:
+    """
+    One side of the shared memory buffer: sends the values of the boundary mappings whose initiator is in this
+    process, and applies the received ones to the responders in this process
+
+    :param buffer: The shared memory buffer
+    :param receivers: Dictionary slot -> (boundary, mapping) of the boundary mappings whose responder is in this process
+    :param inline: If True, the values are sent with the entries instead of through the buffer
+    """
+
+    def __init__(self, buffer, receivers, inline=False):
+        self.buffer = buffer
+        self.receivers = receivers
+        self.inline = inline
+        self.outboxes = dict()
+
+    def send(self, boundary, values):
+        outbox = self.outboxes.setdefault(boundary.destination, [])
+        if self.inline or any(slot == boundary.slot for slot, _ in outbox):
+            # Inline, or mapped again before the previous values were applied: these ones are sent with the next message
+            outbox.append((boundary.slot, values))
+        else:
+            self.buffer[boundary.slot:boundary.slot + boundary.size] = values
+            outbox.append((boundary.slot, None))
+
+    def pop(self, destination):
+        """
+        :return: The list of the (slot, values or None if in the buffer) sent to the destination since the last call
+        """
+        return self.outboxes.pop(destination, [])
+
+    def receive(self, entries):
+        """
+        Apply the boundary mappings sent by the other process
+
+        :param entries: List of (slot, values or None if in the buffer)
+        """
+        for slot, values in entries:
+            boundary, mapping = self.receivers[slot]
+            if values is None:
+                values = self.buffer[slot:slot + boundary.size].copy()
+            mapping.map(boundary.initiator(values), boundary.responder_id)
+
+
+def _attach_endpoint(containers, endpoint):
+    for container in containers:
+        if 'mapping' not in container:
+            continue
+        for mapping in container.mapping.object.values:
+            if isinstance(mapping, _BoundaryMapping):
+                mapping.endpoint = endpoint
+
+
+class _RemoteTraceback(Exception):
+    def __init__(self, tb):
+        self.tb = tb
+
+    def __str__(self):
+        return self.tb
+
+
+def _capture_state(prosumers):
+    """
+    Capture the state of the controllers of prosumers, to restore it with _restore_state.
+    The result buffers are not copied, the results of the time steps run again are overwritten, except the stored
+    time step to which the pending results of a result policy are aggregated (see BoundResultPolicy)
+    """
+    rows = []
+    for prosumer in prosumers.values():
+        for ctrl in prosumer.controller.object.values:
+            policy = getattr(ctrl, '_result_policy', None)
+            step = None if policy is None else policy.pending_stored_step
+            if step is not None:
+                rows.append((ctrl, step, ctrl.res[:, step, :].copy()))
+    return {name: prosumer.clone(share_results=True) for name, prosumer in prosumers.items()}, rows
+
+
+def _restore_state(prosumers, state):
+    clones, rows = state
+    for name, prosumer in prosumers.items():
+        _restore_controllers_state(prosumer, clones[name])
+    for ctrl, step, values in rows:
+        ctrl.res[:, step, :] = values
+
+
+def _same_entries(entries, other, rtol):
+    return [slot for slot, _ in entries] == [slot for slot, _ in other] and \
+        all(np.allclose(values, other_values, rtol=rtol, atol=0, equal_nan=True)
+            for (_, values), (_, other_values) in zip(entries, other))
+
+
+class _Speculation(threading.Thread):
+    """
+    Speculative run, in a thread of a worker, of a cycle of commands of the coordinator, with assumed boundary
+    values: the values mapped to the connector controllers by the PandapipesBalanceControl controllers are the
+    demands of the connectors, the other ones are the ones of the previous cycle.
+    The state of the prosumers is captured before the run, to be restored if the speculation is not used.
+
+    :param worker: The _PartitionWorker
+    :param commands: The list of the (command, arguments, boundary values of the previous cycle) to speculate
+    """
+
+    def __init__(self, worker, commands):
+        super().__init__(daemon=True)
+        self.worker = worker
+        self.commands = commands
+        self.steps = []  # (command, arguments, assumed boundary values, reply, demands written) of the run commands
+        self.position = 0  # Number of commands received that matched the speculated ones
+        self.state = None
+        self.error = None
+
+    def run(self):
+        worker = self.worker
+        try:
+            self.state = _capture_state(worker.prosumers)
+        except Exception as err:
+            self.error = err
+            return
+        # The speculated values are kept out of the shared buffer, which the coordinator is reading
+        endpoint = _BoundaryEndpoint(worker.buffer.copy(), worker.endpoint.receivers, inline=True)
+        shared_endpoint, worker.endpoint = worker.endpoint, endpoint
+        _attach_endpoint(worker.prosumers.values(), endpoint)
+        try:
+            for command, args, entries in self.commands:
+                assumed = [(slot, self._assume(slot, values)) for slot, values in entries]
+                reply = worker.run_command(command, args, assumed)
+                written = [(slot, endpoint.buffer[slot:slot + 3].copy())
+                           for slot, _, _ in worker.connectors[args[0]]] if command == "demands" else []
+                self.steps.append((command, args, assumed, reply, written))
+        except Exception as err:
+            # The commands are run again without speculation, which raises the error in the coordinator
+            self.error = err
+        finally:
+            worker.endpoint = shared_endpoint
+            _attach_endpoint(worker.prosumers.values(), shared_endpoint)
+
+    def _assume(self, slot, values):
+        demand_slot = self.worker.requested.get(slot)
+        if demand_slot is None:
+            return values
+        # Supplied at the required feed temperature with the required mass flow
+        return self.worker.endpoint.buffer[[demand_slot, demand_slot + 2]].copy()
+
+    @property
+    def done(self):
+        return self.position == len(self.commands)
+
+    def check(self, command, args, entries, rtol):
+        """
+        Compare a command received from the coordinator with the next speculated one
+
+        :return: The speculated reply, or None if the command or its boundary values do not match
+        """
+        self.join()
+        if self.position >= len(self.steps):
+            return None
+        speculated_command, speculated_args, assumed, reply, written = self.steps[self.position]
+        if command != speculated_command or args != speculated_args or not _same_entries(entries, assumed, rtol):
+            return None
+        self.position += 1
+        for slot, values in written:
+            self.worker.buffer[slot:slot + len(values)] = values
+        return reply
+
+    def restore(self):
+        """
+        Restore the state of the prosumers before the speculation
+        """
+        self.join()
+        if self.state is not None:
+            _restore_state(self.worker.prosumers, self.state)
+
+
+class _PartitionWorker:
+    """
+    The prosumers of one worker process, with the commands of the coordinator
+    """
+
+    def __init__(self, payload, buffer):
+        self.buffer = buffer
+        self.prosumers = payload["prosumers"]
+        energy_system = create_empty_energy_system()
+        energy_system['prosumer'] = self.prosumers
+        levels, self.controller_order = _compute_controller_order_energy_system(energy_system)
+        self.levelorders = {level: levelorder for level, levelorder in zip(levels, self.controller_order)
+                            if len(levelorder)}
+        self.endpoint = _BoundaryEndpoint(buffer, payload["receivers"])
+        _attach_endpoint(self.prosumers.values(), self.endpoint)
+        self.connectors = {balance: [(slot, self.prosumers[name].controller.at[ctrl_index, 'object'],
+                                      self.prosumers[name]) for slot, name, ctrl_index in connectors]
+                           for balance, connectors in payload["connectors"].items()}
+        # Relative tolerance on the speculated boundary values in the pipelined mode, None if not pipelined
+        self.pipeline_tol = payload["pipeline_tol"]
+        # Slot of the values mapped to a connector controller -> slot of the demands of the connector
+        self.requested = payload["requested"]
+        self.speculation_stats = {"accepted": 0, "rolled_back": 0}
+        self._next_time = dict()
+        self._restart_cycles()
+
+    def _restart_cycles(self):
+        # Arguments of the demands command that starts the cycles of commands
+        self._anchor = None
+        # The commands received since the start of the cycle, with their boundary values, None before the first cycle
+        self._cycle = None
+        self._to_speculate = None
+        self._speculation = None
+        self._last_command = None
+        self._last_converged = None
+
+    def handle(self, command, args, entries):
+        """
+        Run a command of the coordinator. In the pipelined mode, the reply of the speculated command is used if the
+        command and its boundary values match it
+
+        :param command: The name of the command
+        :param args: The arguments of the command
+        :param entries: The boundary values sent by the coordinator, list of (slot, values or None if in the buffer)
+        :return: A tuple (result, converged levels, boundary values sent to the coordinator)
+        """
+        entries = [(slot, self.buffer[slot:slot + self.endpoint.receivers[slot][0].size].copy()
+                    if values is None else values) for slot, values in entries]
+        repeated = command == "demands" and not entries and self._last_command == (command, args)
+        self._last_command = (command, args)
+        if self.pipeline_tol is None or repeated and self._speculation is None:
+            return self.run_command(command, args, entries)
+        if repeated:
+            # Demands of the same coupling iteration of the nets, the state of the time step did not change
+            return None, self._last_converged, []
+
+        reply = None
+        if self._speculation is not None:
+            reply = self._speculation.check(command, args, entries, self.pipeline_tol)
+            if reply is None:
+                self._rollback()
+            elif self._speculation.done:
+                self._speculation = None
+                self.speculation_stats["accepted"] += 1
+        if reply is None:
+            reply = self.run_command(command, args, entries)
+        self._last_converged = reply[1]
+        if command in _RUN_COMMANDS:
+            self._restart_cycles()
+            return reply
+        if self._cycle is not None:
+            self._cycle.append((command, args, entries))
+        if command == "demands" and self._anchor in (None, args):
+            self._anchor = args
+            self._to_speculate, self._cycle = self._cycle, []
+        return reply
+
+    def run_command(self, command, args, entries):
+        """
+        :return: A tuple (result, converged levels, boundary values sent to the coordinator)
+        """
+        self.endpoint.receive(entries)
+        result = getattr(self, command)(*args)
+        return result, self.converged_levels(), self.endpoint.pop(COORDINATOR)
+
+    def _rollback(self):
+        """
+        Restore the state of the prosumers before the speculation and run the commands received since then
+        """
+        self._speculation.restore()
+        self._speculation = None
+        self.speculation_stats["rolled_back"] += 1
+        for command, args, entries in self._cycle:
+            self.run_command(command, args, entries)
+
+    def speculate(self):
+        """
+        In the pipelined mode, after the demands of the connector prosumers, start the speculation of the next cycle
+        of commands, the one of the previous time step shifted by one time step
+        """
+        commands, self._to_speculate = self._to_speculate, None
+        if not commands:
+            return
+        shifted = []
+        for command, args, entries in commands:
+            if command in _TIME_ARGUMENTS:
+                position = _TIME_ARGUMENTS[command]
+                if args[position] not in self._next_time:
+                    # Last time step
+                    return
+                args = args[:position] + (self._next_time[args[position]],) + args[position + 1:]
+            shifted.append((command, args, entries))
+        self._speculation = _Speculation(self, shifted)
+        self._speculation.start()
+
+    def speculation_statistics(self):
+        return dict(self.speculation_stats)
+
+    def levels(self):
+        return list(self.levelorders.keys())
+
+    def converged_levels(self):
+        return {level: all(ctrl.is_converged(prosumer) for ctrl, prosumer in levelorder)
+                for level, levelorder in self.levelorders.items()}
+
+    def time_step(self, level, time):
+        for ctrl, prosumer in self.levelorders[level]:
+            ctrl.time_step(prosumer, time)
+
+    def initialize_control(self, level):
+        for ctrl, prosumer in self.levelorders[level]:
+            ctrl.initialize_control(prosumer)
+
+    def level_reset(self, level):
+        for ctrl, prosumer in self.levelorders[level]:
+            ctrl.level_reset(prosumer)
+
+    def control_step(self, level):
+        _control_step(self.levelorders[level], 0)
+
+    def repair_control(self, level):
+        for ctrl, prosumer in self.levelorders[level]:
+            ctrl.repair_control(prosumer)
+
+    def finalize_control(self, level):
+        for ctrl, prosumer in self.levelorders[level]:
+            ctrl.finalize_control(prosumer)
+
+    def finalize_step(self, level, time):
+        for ctrl, prosumer in self.levelorders[level]:
+            ctrl.finalize_step(prosumer, time)
+
+    def time_series_initialization(self, time_steps=None):
+        if time_steps is not None:
+            self._next_time = dict(zip(time_steps[:-1], time_steps[1:]))
+        time_series_initialization(self.controller_order)
+
+    def time_series_finalization(self):
+        time_series_finalization(self.controller_order)
+
+    def demands(self, balance):
+        for slot, fcc, prosumer in self.connectors[balance]:
+            self.endpoint.buffer[slot:slot + 3] = PandapipesBalanceControl._get_connector_demand(fcc, prosumer)
+
+    def collect(self):
+        return self.prosumers
+
+
+def _run_worker(connection, buffer_name, buffer_size, payload):
+    memory = shared_memory.SharedMemory(name=buffer_name)
+    buffer = np.ndarray((buffer_size,), dtype=np.float64, buffer=memory.buf)
+    try:
+        try:
+            worker = _PartitionWorker(pickle.loads(payload), buffer)
+            connection.send(("ok", worker.levels(), worker.converged_levels(), []))
+        except Exception as err:
+            connection.send(("error", err, traceback.format_exc(), []))
+            return
+        while True:
+            command, args, entries = connection.recv()
+            if command == "close":
+                break
+            try:
+                connection.send(("ok", *worker.handle(command, args, entries)))
+            except Exception as err:
+                connection.send(("error", err, traceback.format_exc(), []))
+                continue
+            worker.speculate()
+    finally:
+        del buffer
+        memory.close()
+        connection.close()
+
+
+class RemoteLevel:
+    """
+    Takes the place, in the controller order of the coordinator, of the controllers of one level of the
+    partitioned prosumers, and forwards the calls to the workers that have controllers in this level.
+
+    :param partition: The PartitionedProsumers
+    :param level: The level
+    """
+
+    def __init__(self, partition, level):
+        self.partition = partition
+        self.level = level
+
+    def __str__(self):
+        return "RemoteLevel(%s)" % self.level
+
+    def time_step(self, container, time):
+        self.partition.call("time_step", self.level, time, level=self.level)
+
+    def initialize_control(self, container):
+        self.partition.call("initialize_control", self.level, level=self.level)
+
+    def level_reset(self, container):
+        self.partition.call("level_reset", self.level, level=self.level)
+
+    def is_converged(self, container):
+        return self.partition.is_converged(self.level)
+
+    def control_step(self, container):
+        self.partition.call("control_step", self.level, level=self.level, only_not_converged=True)
+
+    def repair_control(self, container):
+        self.partition.call("repair_control", self.level, level=self.level)
+
+    def finalize_control(self, container):
+        self.partition.call("finalize_control", self.level, level=self.level)
+
+    def finalize_step(self, container, time):
+        self.partition.call("finalize_step", self.level, time, level=self.level)
+
+
+def split_clusters(energy_system, clusters, n_workers):
+    """
+    Distribute clusters of prosumers over workers, balancing their number of controllers
+
+    :param energy_system: The energy system
+    :param clusters: List of lists of prosumer names that must be in the same worker
+    :param n_workers: Maximal number of workers
+    :return: List of lists of prosumer names, one per worker, in the order of the prosumers of the energy system
+    """
+    names = list(energy_system['prosumer'].keys())
+    loads, partitions = np.zeros(max(n_workers, 1)), [[] for _ in range(max(n_workers, 1))]
+    sizes = [sum(len(energy_system['prosumer'][name].get('controller', [])) for name in cluster) + 1
+             for cluster in clusters]
+    for i in np.argsort(sizes, kind="stable")[::-1]:
+        worker = int(np.argmin(loads))
+        partitions[worker] += clusters[i]
+        loads[worker] += sizes[i]
+    return [sorted(partition, key=names.index) for partition in partitions if len(partition)]
+
+
+class PartitionedProsumers:
+    """
+    The prosumers of an energy system distributed over worker processes, for a partitioned co-simulation: the
+    controllers of the prosumers are run by the workers, the nets and their controllers by the coordinator.
+
+    The prosumers of the energy system are copied to the workers when the partition is created. The energy system is
+    left unchanged until collect() replaces its prosumers by the ones of the workers.
+
+    Use it as a context manager, or call close() to stop the workers.
+
+    :param energy_system: energy system with distinct controllers, several pandapipes/pandapower nets and pandaprosumer
+    :type energy_system: pandaprosumer.EnergySystem
+    :param clusters: lists of the names of the prosumers that must run in the same worker, because they are coupled
+        with each other (see get_prosumer_clusters)
+    :type clusters: list
+    :param n_workers: maximal number of worker processes
+    :type n_workers: int
+    :param pipeline: if True, the workers speculate the end of each time step and the beginning of the next one
+        while the nets are solved (see the pipelined mode in the description of the module)
+    :type pipeline: bool, default: False
+    :param pipeline_tol: relative tolerance between the boundary values received by the workers and the speculated
+        ones, beyond which the speculation is rolled back
+    :type pipeline_tol: float, default: 0.01
+    """
+
+    def __init__(self, energy_system, clusters, n_workers, pipeline=False, pipeline_tol=.01):
+        controller = energy_system.get('controller')
+        if controller is not None and controller.in_service.any():
+            raise ValueError("An energy system with controllers in service can not be partitioned, since they may "
+                             "interact with any prosumer")
+        self.energy_system = energy_system
+        self.partitions = split_clusters(energy_system, clusters, n_workers)
+        self._worker_of = {id(energy_system['prosumer'][name]): worker
+                           for worker, names in enumerate(self.partitions) for name in names}
+        self._size = 0
+        self._swaps = []  # (mapping table, index, original mapping, boundary mapping) in the coordinator
+        self._receivers = dict()  # slot -> (boundary, mapping) applied in the coordinator
+        self._outgoing = dict()  # (prosumer name, mapping index) -> original mapping of the boundaries to the coordinator
+        self._balance_boundaries = []  # (worker, slot, balance, prosumer, responder) of the mappings to the connectors
+        worker_receivers = [dict() for _ in self.partitions]
+        self._find_boundaries(worker_receivers)
+        worker_connectors = [dict() for _ in self.partitions]
+        self._find_connectors(worker_connectors)
+        self.pipeline_tol = pipeline_tol if pipeline else None
+
+        self._memory = shared_memory.SharedMemory(create=True, size=max(self._size, 1) * 8)
+        self.buffer = np.ndarray((max(self._size, 1),), dtype=np.float64, buffer=self._memory.buf)
+        self.buffer[:] = np.nan
+        self.endpoint = _BoundaryEndpoint(self.buffer, self._receivers)
+        self._connections, self._processes = [], []
+        self._converged = [dict() for _ in self.partitions]
+        self._worker_levels = []
+        self._order_cache = None
+        try:
+            self._start_workers(worker_receivers, worker_connectors)
+        except BaseException:
+            self.close()
+            raise
+
+        for table, index, _, boundary_mapping in self._swaps:
+            boundary_mapping.endpoint = self.endpoint
+            table.at[index, 'object'] = boundary_mapping
+        for balance in self._balances.values():
+            balance.demand_evaluator = self.get_connectors_demands
+        levels = sorted(set().union(*self._worker_levels))
+        self.remote_levels = {level: RemoteLevel(self, level) for level in levels}
+
+    def _allocate(self, size):
+        slot = self._size
+        self._size += size
+        return slot
+
+    def _find_boundaries(self, worker_receivers):
+        """
+        Find the mappings whose initiator and responder are in different processes
+        """
+        energy_system = self.energy_system
+        coordinator_containers = list(energy_system['nets'].values())
+        if 'mapping' in energy_system:
+            coordinator_containers.append(energy_system)
+        coordinator_ids = {id(container) for container in coordinator_containers}
+
+        for container in coordinator_containers:
+            if 'mapping' not in container:
+                continue
+            for index, row in container.mapping.iterrows():
+                worker = self._worker_of.get(id(getattr(row.object, 'responder_net', None)))
+                if worker is None:
+                    continue
+                initiator = container.controller.at[row.initiator, 'object']
+                boundary = _Boundary(row.object, row.responder, initiator, 0, worker)
+                boundary.slot = self._allocate(boundary.size)
+                worker_receivers[worker][boundary.slot] = (boundary, row.object)
+                if isinstance(initiator, PandapipesBalanceControl) and boundary.columns is None:
+                    self._balance_boundaries.append((worker, boundary.slot, initiator, row.object.responder_net,
+                                                     row.responder))
+                self._swaps.append((container.mapping, index, row.object, _BoundaryMapping(boundary)))
+
+        for worker, names in enumerate(self.partitions):
+            for name in names:
+                prosumer = energy_system['prosumer'][name]
+                if 'mapping' not in prosumer:
+                    continue
+                for index, row in prosumer.mapping.iterrows():
+                    responder_net = getattr(row.object, 'responder_net', None)
+                    if responder_net is prosumer:
+                        continue
+                    if id(responder_net) in self._worker_of:
+                        if self._worker_of[id(responder_net)] != worker:
+                            raise ValueError("The prosumer '%s' is mapped to a prosumer of another cluster" % name)
+                        continue
+                    if id(responder_net) not in coordinator_ids:
+                        continue
+                    initiator = prosumer.controller.at[row.initiator, 'object']
+                    boundary = _Boundary(row.object, row.responder, initiator, 0, COORDINATOR)
+                    boundary.slot = self._allocate(boundary.size)
+                    self._receivers[boundary.slot] = (boundary, row.object)
+                    self._outgoing[(name, index)] = (row.object, _BoundaryMapping(boundary))
+
+    def _find_connectors(self, worker_connectors):
+        """
+        Find the connector prosumers of the PandapipesBalanceControl controllers of the nets
+        """
+        names = {id(prosumer): name for name, prosumer in self.energy_system['prosumer'].items()}
+        self._balances = dict()
+        self._demand_slots = dict()
+        for net in self.energy_system['nets'].values():
+            if 'controller' not in net:
+                continue
+            for balance in net.controller.object.values:
+                if not isinstance(balance, PandapipesBalanceControl):
+                    continue
+                key = len(self._balances)
+                self._balances[key] = balance
+                start = self._allocate(3 * len(balance.connector_prosumers))
+                workers = set()
+                for i, (fcc, prosumer) in enumerate(zip(balance.pandapipes_connector_controllers,
+                                                        balance.connector_prosumers)):
+                    if id(prosumer) not in self._worker_of:
+                        raise ValueError("The connector prosumers of the controller '%s' must be prosumers of the "
+                                         "energy system" % balance.name)
+                    ctrl_index = [idx for idx, ctrl in prosumer.controller.object.items() if ctrl is fcc][0]
+                    worker_connectors[self._worker_of[id(prosumer)]].setdefault(key, []).append(
+                        (start + 3 * i, names[id(prosumer)], ctrl_index))
+                    workers.add(self._worker_of[id(prosumer)])
+                self._demand_slots[id(balance)] = (key, start, len(balance.connector_prosumers), sorted(workers))
+
+    def _find_requested(self):
+        """
+        :return: For each worker, a dictionary slot of the values mapped by a PandapipesBalanceControl to one of its
+            connector controllers -> slot of the demands of the connector
+        """
+        worker_requested = [dict() for _ in self.partitions]
+        for worker, slot, balance, prosumer, responder in self._balance_boundaries:
+            start = self._demand_slots[id(balance)][1]
+            for i, (fcc, connector_prosumer) in enumerate(zip(balance.pandapipes_connector_controllers,
+                                                              balance.connector_prosumers)):
+                if connector_prosumer is prosumer and prosumer.controller.at[responder, 'object'] is fcc:
+                    worker_requested[worker][slot] = start + 3 * i
+        return worker_requested
+
+    def _start_workers(self, worker_receivers, worker_connectors):
+        context = multiprocessing.get_context()
+        worker_requested = self._find_requested()
+        for worker, names in enumerate(self.partitions):
+            prosumers = {name: self.energy_system['prosumer'][name] for name in names}
+            outgoing = [(prosumers[name].mapping, index, original, boundary_mapping)
+                        for (name, index), (original, boundary_mapping) in self._outgoing.items() if name in prosumers]
+            # The mappings to the coordinator are replaced while pickling, so the nets are not copied to the worker
+            for table, index, _, boundary_mapping in outgoing:
+                table.at[index, 'object'] = boundary_mapping
+            try:
+                payload = pickle.dumps({"prosumers": prosumers, "receivers": worker_receivers[worker],
+                                        "connectors": worker_connectors[worker], "pipeline_tol": self.pipeline_tol,
+                                        "requested": worker_requested[worker]})
+            finally:
+                for table, index, original, _ in outgoing:
+                    table.at[index, 'object'] = original
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_run_worker, daemon=True,
+                                      args=(worker_connection, self._memory.name, len(self.buffer), payload))
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+        for worker, levels in enumerate(self._receive(range(len(self.partitions)))):
+            self._worker_levels.append(set(levels))
+
+    def _receive(self, workers):
+        results, error = [], None
+        for worker in workers:
+            status, result, converged, entries = self._connections[worker].recv()
+            if status == "error":
+                error = error or (result, converged)
+                continue
+            self._converged[worker] = converged
+            self.endpoint.receive(entries)
+            results.append(result)
+        if error is not None:
+            raise error[0] from _RemoteTraceback(error[1])
+        return results
+
+    def call(self, command, *args, level=None, only_not_converged=False, workers=None):
+        """
+        Run a command in the workers concurrently
+
+        :param command: The name of the _PartitionWorker method
+        :param args: The arguments of the command
+        :param level: If given, only the workers with controllers in this level run the command
+        :param only_not_converged: If True, only the workers with controllers not converged in the level run the
+            command
+        :param workers: If given, the workers that run the command
+        :return: The list of the results of the workers
+        """
+        if workers is None:
+            workers = [worker for worker in range(len(self.partitions))
+                       if level is None or (level in self._worker_levels[worker] and
+                                            not (only_not_converged and self._converged[worker][level]))]
+        for worker in workers:
+            self._connections[worker].send((command, args, self.endpoint.pop(worker)))
+        return self._receive(workers)
+
+    def is_converged(self, level):
+        """
+        :return: True if all the controllers of the prosumers in the level are converged
+        """
+        return all(converged.get(level, True) for converged in self._converged)
+
+    def get_connectors_demands(self, balance):
+        """
+        Demand evaluator of the PandapipesBalanceControl controllers, evaluating their connector prosumers in the
+        workers
+
+        :param balance: The PandapipesBalanceControl
+        :return: Array of the (feed temperature [C], return temperature [C], mass flow [kg/s]) of its connectors
+        """
+        key, start, n_connectors, workers = self._demand_slots[id(balance)]
+        self.call("demands", key, workers=workers)
+        return self.buffer[start:start + 3 * n_connectors].reshape(-1, 3).copy()
+
+    def get_controller_order(self, levels, controller_order):
+        """
+        Replace, in a controller order of the energy system, the controllers of the prosumers by the RemoteLevel
+        of their level, at the position of the first one.
+
+        :param levels: The levels, as returned by get_controller_order_energy_system
+        :param controller_order: The controller order, as returned by get_controller_order_energy_system
+        :return: The levels and the controller order of the coordinator
+        """
+        if self._order_cache is not None and self._order_cache[0] is controller_order:
+            return self._order_cache[1]
+        remote_ids = {id(self.energy_system['prosumer'][name]) for names in self.partitions for name in names}
+        levelorders = dict()
+        for level, levelorder in zip(levels, controller_order):
+            coordinator_levelorder, position = [], None
+            for ctrl, container in levelorder:
+                if id(container) in remote_ids:
+                    position = len(coordinator_levelorder) if position is None else position
+                else:
+                    coordinator_levelorder.append((ctrl, container))
+            if level in self.remote_levels:
+                position = len(coordinator_levelorder) if position is None else position
+                coordinator_levelorder.insert(position, (self.remote_levels[level], self))
+            levelorders[level] = coordinator_levelorder
+        for level in self.remote_levels:
+            if level not in levelorders:
+                levelorders[level] = [(self.remote_levels[level], self)]
+        new_levels = sorted(levelorders.keys())
+        result = new_levels, [levelorders[level] for level in new_levels]
+        self._order_cache = (controller_order, result)
+        return result
+
+    def run_control(self, energy_system, ctrl_variables=None, max_iter=30, **kwargs):
+        """
+        Same as run_control of the energy system, with the controllers of the prosumers run by the workers
+
+        :param energy_system: The partitioned energy system
+        :type energy_system: pandaprosumer.EnergySystem
+        :param ctrl_variables: contains all relevant information and boundaries required for a successful control run.
+        :type ctrl_variables: dict, default: None
+        :param max_iter: number of iterations for each controller to converge
+        :type max_iter: int, default: 30
+        :param kwargs: additional keyword arguments handed to each run function
+        :type kwargs: dict
+        """
+        ctrl_variables = prepare_run_ctrl(energy_system, ctrl_variables)
+        ctrl_variables['level'], ctrl_variables['controller_order'] = \
+            self.get_controller_order(ctrl_variables['level'], ctrl_variables['controller_order'])
+
+        controller_order = ctrl_variables['controller_order']
+        control_initialization(controller_order)
+        ctrl_variables = net_initialization_multinet(energy_system, ctrl_variables, **kwargs)
+        control_implementation(energy_system, controller_order, ctrl_variables, max_iter,
+                               evaluate_net_fct=_evaluate_multinet, **kwargs)
+        control_finalization(controller_order)
+
+    def time_series_initialization(self, time_steps=None):
+        """
+        Initialize the time series of the controllers of the prosumers
+
+        :param time_steps: The time steps of the run, required to speculate the next time steps in the pipelined mode
+        """
+        self.call("time_series_initialization", time_steps)
+
+    def speculation_statistics(self):
+        """
+        :return: Dictionary with the numbers of speculated cycles of commands of the workers that were "accepted"
+            and "rolled_back", in the pipelined mode
+        """
+        statistics = {"accepted": 0, "rolled_back": 0}
+        for worker_statistics in self.call("speculation_statistics"):
+            for key, value in worker_statistics.items():
+                statistics[key] += value
+        return statistics
+
+    def time_series_finalization(self):
+        """
+        Finalize the time series of the controllers of the prosumers, writing their results in the time_series
+        tables of the prosumers of the workers
+        """
+        self.call("time_series_finalization")
+
+    def collect(self):
+        """
+        Replace the prosumers of the energy system by the ones of the workers, with their results, and update the
+        references of the mappings and PandapipesBalanceControl controllers of the coordinator
+        """
+        prosumers = dict()
+        for worker_prosumers in self.call("collect"):
+            prosumers.update(worker_prosumers)
+        for (name, index), (original, _) in self._outgoing.items():
+            prosumers[name].mapping.at[index, 'object'] = original
+        old_names = {id(prosumer): name for name, prosumer in self.energy_system['prosumer'].items()}
+        for _, _, original, _ in self._swaps:
+            original.responder_net = prosumers[old_names[id(original.responder_net)]]
+        for balance in self._balances.values():
+            for i, (fcc, prosumer) in enumerate(zip(balance.pandapipes_connector_controllers,
+                                                    balance.connector_prosumers)):
+                new_prosumer = prosumers[old_names[id(prosumer)]]
+                ctrl_index = [idx for idx, ctrl in prosumer.controller.object.items() if ctrl is fcc][0]
+                balance.pandapipes_connector_controllers[i] = new_prosumer.controller.at[ctrl_index, 'object']
+                balance.connector_prosumers[i] = new_prosumer
+        self.energy_system['prosumer'].update(prosumers)
+
+    def close(self):
+        """
+        Restore the mappings and controllers of the coordinator, stop the workers and release the shared memory
+        """
+        for table, index, original, _ in self._swaps:
+            table.at[index, 'object'] = original
+        for balance in getattr(self, '_balances', dict()).values():
+            balance.demand_evaluator = None
+        for connection in self._connections:
+            try:
+                connection.send(("close", (), []))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._connections, self._processes = [], []
+        if self._memory is not None:
+            del self.buffer
+            self.endpoint.buffer = None
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -11,6 +11,7 @@ from pandapipes.multinet.control.run_control_multinet import prepare_ctrl_variab
 from pandapower.control.run_control import control_initialization, \
     control_finalization, \
     control_implementation, get_controller_order, NetCalculationNotConverged
+from pandaprosumer.controller.mapped import get_controller_tables_version
 from pandaprosumer.run_control import prepare_run_ctrl as prepare_run_ctrl_ppros
 from pandaprosumer.pandaprosumer_container import pandaprosumerContainer, get_default_prosumer_container_structure
 
@@ -58,6 +59,9 @@ def run_control(energy_system, ctrl_variables=None, max_iter=30, **kwargs):
     :return: runs an entire control loop
     :rtype: None
     """
+    if is_prosumer_only(energy_system):
+        return run_control_prosumers(energy_system, ctrl_variables, max_iter)
+
     ctrl_variables = prepare_run_ctrl(energy_system, ctrl_variables)
 
     controller_order = ctrl_variables['controller_order']
@@ -76,6 +80,66 @@ def run_control(energy_system, ctrl_variables=None, max_iter=30, **kwargs):
     control_finalization(controller_order)
 
 
+def is_prosumer_only(energy_system):
+    """
+    :param energy_system: energy system with energy system controllers, distinct controllers, several pandapipes/pandapower nets and pandaprosumer
+    :type energy_system: pandaprosumer.EnergySystem
+    :return: True if the energy system has no pandapipes/pandapower net
+    :rtype: bool
+    """
+    return not energy_system.get('nets')
+
+
+def run_control_prosumers(energy_system, ctrl_variables=None, max_iter=30):
+    """
+    Control loop of an energy system without net, that only contains prosumers coupled by energy system mappings
+    and energy system controllers.
+
+    Same as run_control, without the initial run and the evaluation of the nets after each controller iteration.
+
+    :param energy_system: energy system with energy system controllers and pandaprosumer, without net
+    :type energy_system: pandaprosumer.EnergySystem
+    :param ctrl_variables: contains all relevant information and boundaries required for a successful control run.
+    :type ctrl_variables: dict, default: None
+    :param max_iter: number of iterations for each controller to converge
+    :type max_iter: int, default: 30
+    :return: runs an entire control loop
+    :rtype: None
+    """
+    ctrl_variables = prepare_run_ctrl(energy_system, ctrl_variables)
+    ctrl_variables['converged'] = True
+
+    controller_order = ctrl_variables['controller_order']
+    control_initialization(controller_order)
+    control_implementation(energy_system, controller_order, ctrl_variables, max_iter,
+                           evaluate_net_fct=_evaluate_prosumers)
+    control_finalization(controller_order)
+
+
+def _evaluate_prosumers(energy_system, levelorder, ctrl_variables, **kwargs):
+    # The prosumers have no calculation to run between the controller iterations
+    return ctrl_variables
+
+
+def _get_controller_tables_signature(energy_system):
+    """
+    Summary of the controller tables of the energy system, that changes if a prosumer is added, if a controller
+    of a prosumer is added or activated/deactivated (see pandaprosumer.controller.mapped.get_controller_tables_version),
+    or if a controller table of the energy system or of a net is replaced or gets another number of controllers.
+
+    It does not read the controller tables of the prosumers, so it costs the same for any number of prosumers.
+
+    :param energy_system: energy system with energy system controllers, distinct controllers, several pandapipes/pandapower nets and pandaprosumer
+    :type energy_system: pandaprosumer.EnergySystem
+    :return: the signature, to be compared with ==
+    :rtype: tuple
+    """
+    containers = [energy_system, *energy_system['nets'].values()]
+    tables = tuple((id(container), id(container.get('controller')), len(container.get('controller', ())))
+                   for container in containers)
+    return get_controller_tables_version(), id(energy_system['prosumer']), len(energy_system['prosumer']), tables
+
+
 def get_controller_order_energy_system(energy_system):
     """
     Defining the controller order per level.
@@ -83,12 +147,31 @@ def get_controller_order_energy_system(energy_system):
     Takes the order and level columns from each controller.
     If levels are specified, the levels and orders are executed in ascending order.
 
+    The order is cached on the energy system and only computed again if a controller or a prosumer was added, or
+    if a controller was activated or deactivated (see _get_controller_tables_signature). After modifying a
+    controller table directly (e.g. removing a controller or changing its in_service, order or level), call
+    pandaprosumer.controller.mapped.notify_controller_tables_changed.
+
     :param energy_system: energy system with energy system controllers, distinct controllers, several pandapipes/pandapower nets and pandaprosumer
     :type energy_system: pandaprosumer.EnergySystem
     :return: nested list of tuples given the correct order of the controllers, respectively for each level
     :rtype: list
     """
+    signature = _get_controller_tables_signature(energy_system)
+    cache = getattr(energy_system, '_controller_order_cache', None)
+    if cache is not None and cache[0] == signature:
+        return cache[1]
 
+    controller_order = _compute_controller_order_energy_system(energy_system)
+    # Stored as an attribute, not as an item, so it is neither copied nor serialized with the energy system
+    energy_system._setattr('_controller_order_cache', (signature, controller_order))
+    return controller_order
+
+
+def _compute_controller_order_energy_system(energy_system):
+    """
+    Compute the controller order per level, see get_controller_order_energy_system
+    """
     comp_list = []
     controller_list = []
 
@@ -132,12 +215,14 @@ def prepare_ctrl_variables_for_prosumer(energy_system, prosumer_name, ctrl_varia
     if prosumer_name not in ctrl_variables['prosumer'].keys():
         ctrl_variables['prosumer'][prosumer_name] = {}
     prosumer = energy_system['prosumer'][prosumer_name]
-    if isinstance(prosumer, pandaprosumerContainer):
-        ctrl_variables_net = prepare_run_ctrl_ppros(prosumer, None, **kwargs)
-    else:
+    if not isinstance(prosumer, pandaprosumerContainer):
         raise ValueError('The given prosumer needs to be a pandaprosumer container')
+    if "errors" in ctrl_variables['prosumer'][prosumer_name]:
+        # Already prepared, e.g. by a previous time step
+        return
+    ctrl_variables_net = prepare_run_ctrl_ppros(prosumer, None, **kwargs)
 
-    ctrl_variables['prosumer'][prosumer_name]['errors'] = ctrl_variables['prosumer'][prosumer_name].get("errors", ctrl_variables_net['errors'])
+    ctrl_variables['prosumer'][prosumer_name]['errors'] = ctrl_variables_net['errors']
 
 
 def prepare_run_ctrl(energy_system, ctrl_variables, **kwargs):
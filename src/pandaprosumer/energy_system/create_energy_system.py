@@ -15,6 +15,7 @@ import pandas as pd
 
 from pandapipes import pandapipesNet
 from pandapower import pandapowerNet
+from pandaprosumer.controller.mapped import notify_controller_tables_changed
 from pandaprosumer.energy_system import EnergySystem
 from pandaprosumer.energy_system import get_default_energy_system_structure
 
@@ -69,6 +70,7 @@ def add_pandaprosumer_to_energy_system(energy_system, pandaprosumer, pandaprosum
         energy_system.update({'prosumer': dict()})
 
     energy_system['prosumer'].update({pandaprosumer_name: pandaprosumer})
+    notify_controller_tables_changed()
 
 
 def add_net_to_energy_system(energy_system, net, net_name='my_network', overwrite=False):
@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import tqdm
 
@@ -8,7 +11,10 @@ from pandapower import pandapowerNet
 from pandapower.control import control_diagnostic
 from pandapower.timeseries.run_time_series import init_default_outputwriter as init_output_writer_pp
 from pandapower.timeseries.run_time_series import run_loop, get_recycle_settings, init_output_writer
-from pandaprosumer.energy_system.control.run_control_energy_system import prepare_run_ctrl, run_control
+from pandaprosumer.energy_system.control.partitioned_prosumers import PartitionedProsumers
+from pandaprosumer.energy_system.control.run_control_energy_system import prepare_run_ctrl, run_control, \
+    run_control_prosumers, is_prosumer_only
+from pandaprosumer.energy_system.create_energy_system import create_empty_energy_system
 from pandaprosumer.run_time_series import control_diagnostic_pandaprosumer
 from pandaprosumer.run_time_series import time_series_initialization, time_series_finalization
 
@@ -21,13 +27,48 @@ logger = logging.getLogger(__name__)
 logger.setLevel(level=logging.WARNING)
 
 
-def run_timeseries(energy_system, period_index, continue_on_divergence=False, verbose=True):
+def run_timeseries(energy_system, period_index, continue_on_divergence=False, verbose=True, n_jobs=1, pipeline=False,
+                   pipeline_tol=.01):
+    """
+    Time series of an energy system.
+
+    An energy system without net is run with a lighter loop without the net machinery (output writers, initial
+    and intermediate pipeflows/power flows). Its independent clusters of prosumers can be run in parallel.
+    The prosumers of an energy system with nets can be run in worker processes while the nets are solved in this
+    process (see run_timeseries_partitioned).
+
+    :param energy_system: energy system with energy system controllers, distinct controllers, several pandapipes/pandapower nets and pandaprosumer
+    :type energy_system: pandaprosumer.EnergySystem
+    :param period_index: index of the period of the energy system to run
+    :type period_index: int
+    :param continue_on_divergence: What to do if loadflow/pipeflow is not converging, fires control_repair
+    :type continue_on_divergence: bool, default: False
+    :param verbose: prints progess bar or logger debug messages
+    :type verbose: bool, default: True
+    :param n_jobs: number of processes running the prosumers: for an energy system without net, the processes
+        run the independent clusters of prosumers (see get_prosumer_clusters), for an energy system with nets, the
+        prosumers are partitioned over the processes (see run_timeseries_partitioned). -1 uses one process per CPU.
+        The prosumers of the energy system are then replaced by the ones run in the processes
+    :type n_jobs: int, default: 1
+    :param pipeline: for an energy system with nets run in several processes, the processes speculate the end of
+        each time step and the beginning of the next one while the nets are solved (see run_timeseries_partitioned)
+    :type pipeline: bool, default: False
+    :param pipeline_tol: relative tolerance on the boundary values of the speculated time steps
+    :type pipeline_tol: float, default: 0.01
+    """
     start = energy_system.period.at[period_index, 'start']
     end = energy_system.period.at[period_index, 'end']
     resol = int(energy_system.period.at[period_index, 'resolution_s'])
     tz = energy_system.period.at[period_index, 'timezone']
     dur = pd.date_range(start, end, freq='%ss' % resol, tz=tz)
 
+    if is_prosumer_only(energy_system):
+        run_timeseries_prosumers(energy_system, dur, continue_on_divergence, verbose, n_jobs)
+        return
+    if (os.cpu_count() if n_jobs == -1 else n_jobs) > 1:
+        run_timeseries_partitioned(energy_system, dur, continue_on_divergence, verbose, n_jobs, pipeline, pipeline_tol)
+        return
+
     ts_variables = init_time_series(energy_system, dur, continue_on_divergence, verbose)
 
     for net_name in energy_system['nets'].keys():
@@ -93,3 +134,158 @@ def init_time_series(energy_system, time_steps, continue_on_divergence=False, ve
         ts_variables['progress_bar'] = tqdm.tqdm(total=len(time_steps))
 
     return ts_variables
+
+
+def get_prosumer_clusters(energy_system):
+    """
+    Group the prosumers of the energy system in clusters that are not coupled with each other by any energy
+    system mapping.
+
+    If the energy system has a controller in service, it can interact with all the prosumers, so all of them are in
+    one cluster.
+
+    :param energy_system: energy system with energy system controllers, distinct controllers, several pandapipes/pandapower nets and pandaprosumer
+    :type energy_system: pandaprosumer.EnergySystem
+    :return: list of clusters, each one a list of prosumer names
+    :rtype: list
+    """
+    names = list(energy_system['prosumer'].keys())
+    if not len(names):
+        return []
+    controller = energy_system.get('controller')
+    if controller is not None and controller.in_service.any():
+        return [names]
+
+    # Union-find on the prosumers, by identity of the containers
+    parent = {id(energy_system['prosumer'][name]): id(energy_system['prosumer'][name]) for name in names}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for name in names:
+        prosumer = energy_system['prosumer'][name]
+        if 'mapping' not in prosumer:
+            continue
+        for mapping in prosumer.mapping.object.values:
+            responder_net = getattr(mapping, 'responder_net', None)
+            if responder_net is not None and id(responder_net) in parent:
+                parent[find(id(prosumer))] = find(id(responder_net))
+
+    clusters = dict()
+    for name in names:
+        clusters.setdefault(find(id(energy_system['prosumer'][name])), []).append(name)
+    return list(clusters.values())
+
+
+def run_timeseries_prosumers(energy_system, time_steps, continue_on_divergence=False, verbose=True, n_jobs=1):
+    """
+    Time series of an energy system without net, with a minimal loop: no output writer, no net diagnostic and no
+    pipeflow/power flow.
+
+    :param energy_system: energy system with energy system controllers and pandaprosumer, without net
+    :type energy_system: pandaprosumer.EnergySystem
+    :param time_steps: the time steps to calculate
+    :type time_steps: pandas.DatetimeIndex
+    :param continue_on_divergence: What to do if a controller is not converging
+    :type continue_on_divergence: bool, default: False
+    :param verbose: prints progess bar or logger debug messages
+    :type verbose: bool, default: True
+    :param n_jobs: number of processes running the independent clusters of prosumers. -1 uses one process per CPU
+    :type n_jobs: int, default: 1
+    """
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    clusters = get_prosumer_clusters(energy_system) if n_jobs > 1 else []
+    if len(clusters) <= 1:
+        _run_timeseries_prosumers(energy_system, time_steps, continue_on_divergence, verbose)
+        return
+
+    sub_energy_systems = []
+    for cluster in clusters:
+        sub_energy_system = create_empty_energy_system(name=energy_system.get('name', 'my_energy_system'))
+        sub_energy_system['period'] = energy_system['period']
+        sub_energy_system['prosumer'] = {name: energy_system['prosumer'][name] for name in cluster}
+        sub_energy_systems.append(sub_energy_system)
+
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(clusters))) as executor:
+        results = executor.map(_run_timeseries_cluster, sub_energy_systems,
+                               [time_steps] * len(clusters), [continue_on_divergence] * len(clusters))
+        for prosumers in results:
+            # The prosumers were pickled to the worker processes, get back the ones with the results
+            energy_system['prosumer'].update(prosumers)
+
+
+def run_timeseries_partitioned(energy_system, time_steps, continue_on_divergence=False, verbose=True, n_jobs=-1,
+                               pipeline=False, pipeline_tol=.01):
+    """
+    Partitioned time series of an energy system with nets: its prosumers are distributed over worker processes,
+    where they stay resident, while the nets and their controllers are run in this process. At each coupling
+    iteration, only the boundary values of the energy system mappings and of the connectors of the
+    PandapipesBalanceControl controllers are exchanged with the workers, through shared memory
+    (see pandaprosumer.energy_system.control.partitioned_prosumers).
+
+    :param energy_system: energy system with distinct controllers, several pandapipes/pandapower nets and pandaprosumer
+    :type energy_system: pandaprosumer.EnergySystem
+    :param time_steps: the time steps to calculate
+    :type time_steps: pandas.DatetimeIndex
+    :param continue_on_divergence: What to do if loadflow/pipeflow is not converging, fires control_repair
+    :type continue_on_divergence: bool, default: False
+    :param verbose: prints progess bar or logger debug messages
+    :type verbose: bool, default: True
+    :param n_jobs: maximal number of worker processes. -1 uses one process per CPU
+    :type n_jobs: int, default: -1
+    :param pipeline: if True, while the nets are solved with the demands of the connector prosumers of a time step,
+        the workers speculate the end of the time step and the beginning of the next one, assuming that the
+        connector prosumers are supplied as requested and that the other boundary values are the ones of the
+        previous time step. A speculation is rolled back, and the time step run again, if the boundary values
+        received by a worker differ from the assumed ones beyond pipeline_tol
+    :type pipeline: bool, default: False
+    :param pipeline_tol: relative tolerance between the received and the assumed boundary values. With 0, only
+        exact speculations are used and the results are the ones of the run without pipelining
+    :type pipeline_tol: float, default: 0.01
+    """
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    with PartitionedProsumers(energy_system, get_prosumer_clusters(energy_system), n_jobs, pipeline,
+                              pipeline_tol) as partition:
+        ts_variables = init_time_series(energy_system, time_steps, continue_on_divergence, verbose)
+        ts_variables['level'], ts_variables['controller_order'] = \
+            partition.get_controller_order(ts_variables['level'], ts_variables['controller_order'])
+
+        for net_name in energy_system['nets'].keys():
+            control_diagnostic(energy_system['nets'][net_name])
+        time_series_initialization(ts_variables['controller_order'])
+        partition.time_series_initialization(time_steps)
+        run_loop(energy_system, ts_variables, output_writer_fct=_call_output_writer,
+                 run_control_fct=partition.run_control)
+        time_series_finalization(ts_variables['controller_order'])
+        partition.time_series_finalization()
+        if pipeline:
+            statistics = partition.speculation_statistics()
+            logger.info("Pipelined time steps: %s speculations accepted, %s rolled back"
+                        % (statistics["accepted"], statistics["rolled_back"]))
+        partition.collect()
+
+
+def _run_timeseries_cluster(energy_system, time_steps, continue_on_divergence):
+    _run_timeseries_prosumers(energy_system, time_steps, continue_on_divergence, verbose=False)
+    return energy_system['prosumer']
+
+
+def _run_timeseries_prosumers(energy_system, time_steps, continue_on_divergence, verbose):
+    ts_variables = prepare_run_ctrl(energy_system, None)
+    ts_variables["time_steps"] = time_steps
+    ts_variables["continue_on_divergence"] = continue_on_divergence
+    ts_variables["verbose"] = verbose
+    if logger.level != 10 and verbose:
+        ts_variables['progress_bar'] = tqdm.tqdm(total=len(time_steps))
+
+    time_series_initialization(ts_variables['controller_order'])
+    run_loop(energy_system, ts_variables, output_writer_fct=_no_output_writer, run_control_fct=run_control_prosumers)
+    time_series_finalization(ts_variables['controller_order'])
+
+
+def _no_output_writer(energy_system, time_step, pf_converged, ctrl_converged, ts_variables):
+    # The prosumers results are stored by their controllers
+    pass
@@ -0,0 +1,215 @@
+"""
+Module containing the binary save and load of prosumers.
+
+The prosumers are pickled with the following compact representations:
+
+- The element, controller and mapping tables are stored as columnar numpy blocks (pickled DataFrames)
+- The controllers are stored as descriptors (class and attributes) without their runtime caches, the time index
+  of their period and their result buffer if it is empty, which are rebuilt on load
+- The library fluids are stored by name and taken from the fluid registry on load
+- An object referenced by several prosumers (e.g. a profile DataFrame) is stored once and is still shared
+  after loading
+
+The files store the module paths of the classes of the saved objects. On load, only an allow-list of classes and
+functions, referenced by their exact module and qualified name, can be referenced (see _RestrictedUnpickler): the
+classes of the pandaprosumer controllers, data, mappings and containers, the numpy, pandas, pandapower, pandapipes
+and standard classes of their attributes, and the functions needed to rebuild them. This limits, but does not
+remove, the risk of loading a malicious file: only load files from trusted sources.
+"""
+
+import collections
+import dataclasses
+import datetime
+import importlib
+import pickle
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from dateutil import tz
+from pandapipes import Fluid
+from pandapipes.properties.fluids import FluidProperty, FluidPropertyConstant, FluidPropertyLinear, \
+    FluidPropertyInterExtra
+from pandapower.auxiliary import ADict
+from pandapower.io_utils import JSONSerializableClass
+from pandapower.timeseries import DFData
+from scipy.interpolate import interp1d
+
+from pandaprosumer import __version__
+from pandaprosumer.controller.mapped import MappedController
+from pandaprosumer.controller.result_policy import ResultPolicy, BoundResultPolicy
+from pandaprosumer.library.fluids import get_fluid, get_fluid_arguments
+
+BINARY_FORMAT_VERSION = 2
+
+_TIME_INDEX_KEY = "_binary_time_index"
+_ZERO_RES_SHAPE_KEY = "_binary_zero_res_shape"
+
+
+def to_binary(prosumers, filename):
+    """
+    Save prosumers to a binary file.
+
+    :param prosumers: A prosumer, or a list or dict of prosumers, to save
+    :param filename: The path of the file, or a file-like object opened in binary write mode
+    """
+    if hasattr(filename, "write"):
+        _dump(prosumers, filename)
+    else:
+        with open(filename, "wb") as f:
+            _dump(prosumers, f)
+
+
+def from_binary(filename):
+    """
+    Load prosumers saved with to_binary.
+
+    .. warning:: Loading a file can execute code referenced by the file. Only the classes and functions allowed
+        by _RestrictedUnpickler can be referenced, but only load files from trusted sources.
+
+    :param filename: The path of the file, or a file-like object opened in binary read mode
+    :return: The saved prosumer, or list or dict of prosumers
+    """
+    if hasattr(filename, "read"):
+        return _load(filename, filename)
+    with open(filename, "rb") as f:
+        return _load(f, filename)
+
+
+def _dump(prosumers, f):
+    # The header is a separate pickle, so that the format is checked before the prosumers are loaded
+    pickle.dump({"format_version": BINARY_FORMAT_VERSION, "version": __version__}, f,
+                protocol=pickle.HIGHEST_PROTOCOL)
+    _CompactPickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(prosumers)
+
+
+def _load(f, filename):
+    header = _RestrictedUnpickler(f).load()
+    if not isinstance(header, dict) or header.get("format_version") != BINARY_FORMAT_VERSION:
+        raise ValueError("%s is not a pandaprosumer binary file of format version %s"
+                         % (filename, BINARY_FORMAT_VERSION))
+    return _RestrictedUnpickler(f).load()
+
+
+_ALLOWED_BUILTINS = {"bool", "int", "float", "complex", "str", "bytes", "bytearray", "list", "tuple", "dict",
+                     "set", "frozenset", "slice", "range", "object"}
+# The classes of the attributes of the saved objects, besides the pandaprosumer classes (see _is_pandaprosumer_class)
+_ALLOWED_CLASSES = [
+    np.ndarray, np.dtype, *set(np.sctypeDict.values()),
+    pd.DataFrame, pd.Series, pd.Index, pd.RangeIndex, pd.DatetimeIndex, pd.TimedeltaIndex, pd.PeriodIndex,
+    pd.MultiIndex, pd.CategoricalIndex, pd.Categorical, pd.arrays.DatetimeArray, pd.arrays.TimedeltaArray,
+    pd.arrays.PeriodArray, pd.DatetimeTZDtype, pd.CategoricalDtype, pd.PeriodDtype, pd.Timestamp, pd.Timedelta,
+    pd.core.internals.BlockManager, pd.core.internals.SingleBlockManager,
+    *[obj for obj in vars(pd.offsets).values() if isinstance(obj, type) and issubclass(obj, pd.offsets.BaseOffset)],
+    DFData, Fluid, FluidProperty, FluidPropertyConstant, FluidPropertyLinear, FluidPropertyInterExtra,
+    datetime.datetime, datetime.date, datetime.time, datetime.timedelta, datetime.timezone, tz.tzutc, tz.tzoffset,
+    collections.OrderedDict, collections.defaultdict,
+]
+# The functions needed to rebuild the saved objects
+_ALLOWED_FUNCTIONS = {
+    ("copyreg", "_reconstructor"),
+    ("numpy.core.multiarray", "_reconstruct"), ("numpy.core.multiarray", "scalar"),
+    ("numpy.core.numeric", "_frombuffer"),
+    ("numpy._core.multiarray", "_reconstruct"), ("numpy._core.multiarray", "scalar"),
+    ("numpy._core.numeric", "_frombuffer"),
+    ("pandas._libs.arrays", "__pyx_unpickle_NDArrayBacked"), ("pandas._libs.internals", "_unpickle_block"),
+    ("pandas._libs.tslibs.nattype", "__nat_unpickle"),
+    ("pandas._libs.tslibs.timestamps", "_unpickle_timestamp"),
+    ("pandas._libs.tslibs.timedeltas", "_timedelta_unpickle"),
+    ("pandas.core.indexes.base", "_new_Index"), ("pandas.core.indexes.datetimes", "_new_DatetimeIndex"),
+    ("pandas.core.indexes.period", "_new_PeriodIndex"),
+    ("pytz", "_p"), ("pytz", "_UTC"), ("zoneinfo", "ZoneInfo._unpickle"),
+    ("pandaprosumer.file_io", "_new_controller"), ("pandaprosumer.file_io", "_set_controller_state"),
+    ("pandaprosumer.library.fluids", "get_fluid"),
+}
+# Former module paths of renamed classes and functions, to load the files saved before the renaming:
+# (former module, former name) -> (module, name)
+_RENAMED = {}
+
+
+# The (module, qualified name) of the classes of _ALLOWED_CLASSES
+_ALLOWED_CLASS_NAMES = frozenset((cls.__module__, cls.__qualname__) for cls in _ALLOWED_CLASSES)
+
+
+def _is_pandaprosumer_class(module, name):
+    """
+    :return: True if name is a data class, controller, mapping or container defined in the pandaprosumer module
+    """
+    if not module.startswith("pandaprosumer.") or not name.isidentifier() or name.startswith("_"):
+        return False
+    cls = vars(importlib.import_module(module)).get(name)
+    return isinstance(cls, type) and cls.__module__ == module and cls.__qualname__ == name and \
+        (dataclasses.is_dataclass(cls) or issubclass(cls, (JSONSerializableClass, ADict, ResultPolicy,
+                                                           BoundResultPolicy)))
+
+
+class _RestrictedUnpickler(pickle.Unpickler):
+    """
+    Unpickler only allowing the exact module and qualified names of the allowed classes and functions, so that no
+    other attribute of an allowed module or class can be referenced
+    """
+
+    def find_class(self, module, name):
+        module, name = _RENAMED.get((module, name), (module, name))
+        if (module, name) in _ALLOWED_FUNCTIONS or (module, name) in _ALLOWED_CLASS_NAMES or \
+                module == "builtins" and name in _ALLOWED_BUILTINS or _is_pandaprosumer_class(module, name):
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError("%s.%s is not allowed in a pandaprosumer binary file" % (module, name))
+
+
+class _CompactPickler(pickle.Pickler):
+    """
+    Pickler replacing the controllers and the library fluids by their compact representation
+    """
+
+    def reducer_override(self, obj):
+        if isinstance(obj, MappedController):
+            return _new_controller, (type(obj),), _get_controller_state(obj), None, None, _set_controller_state
+        if isinstance(obj, Fluid):
+            return _reduce_fluid(obj)
+        if type(obj) is FluidPropertyInterExtra and type(obj.prop_getter) is interp1d:
+            # Rebuilt from its values, so that the methods of interp1d are not referenced by the file
+            getter = obj.prop_getter
+            method = "interpolate_extrapolate" if getter._extrapolate else "interpolate"
+            return FluidPropertyInterExtra, (getter.x, getter.y, method)
+        return NotImplemented
+
+
+def _get_controller_state(controller):
+    state = {key: value for key, value in controller.__dict__.items() if key not in controller.json_excludes}
+    time_index = state.get("time_index")
+    if time_index is not None and len(time_index) and \
+            _get_time_index(state["start"], state["end"], state["resol"], state["tz"]).equals(time_index):
+        del state["time_index"]
+        state[_TIME_INDEX_KEY] = True
+    res = state.get("res")
+    if isinstance(res, np.ndarray) and res.dtype == np.float64 and not res.any():
+        del state["res"]
+        state[_ZERO_RES_SHAPE_KEY] = res.shape
+    return state
+
+
+def _new_controller(cls):
+    return cls.__new__(cls)
+
+
+def _set_controller_state(controller, state):
+    zero_res_shape = state.pop(_ZERO_RES_SHAPE_KEY, None)
+    if state.pop(_TIME_INDEX_KEY, False):
+        state["time_index"] = _get_time_index(state["start"], state["end"], state["resol"], state["tz"])
+    if zero_res_shape is not None:
+        state["res"] = np.zeros(zero_res_shape)
+    controller.__dict__.update(state)
+
+
+@lru_cache(maxsize=64)
+def _get_time_index(start, end, resol, tz):
+    """
+    :return: The time index of a period, shared by all the controllers of the same period
+    """
+    return pd.date_range(start, end, freq='%ss' % resol, tz=tz)
+
+
+def _reduce_fluid(fluid):
+    arguments = get_fluid_arguments(fluid)
+    return NotImplemented if arguments is None else (get_fluid, arguments)
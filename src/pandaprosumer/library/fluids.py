@@ -0,0 +1,66 @@
+"""
+Module containing the process-wide registry of the library fluids.
+"""
+
+import copy
+from functools import lru_cache
+
+from pandapipes import call_lib
+
+
+@lru_cache(maxsize=None)
+def _load_fluid(fluid_name):
+    return call_lib(fluid_name)
+
+
+def get_fluid(fluid_name, shared=True):
+    """
+    Return the pandapipes fluid of the library with default fluid properties.
+
+    The property files of a fluid are read from disk only on the first call for its name.
+    If shared, the same Fluid instance is returned by all the calls and must not be modified.
+    Otherwise, a new Fluid is returned which property tables are shared with the registry, so that properties can
+    be added to it or replaced without changing the other fluids.
+
+    :param fluid_name: Name of the fluid in the pandapipes library (e.g. 'water' or 'air')
+    :type fluid_name: str
+    :param shared: If True, return the fluid of the registry, else a copy of it
+    :type shared: bool, default True
+    :return: The fluid with default fluid properties
+    :rtype: Fluid
+    """
+    fluid = _load_fluid(fluid_name)
+    if shared:
+        return fluid
+    fluid = copy.copy(fluid)
+    fluid.all_properties = dict(fluid.all_properties)
+    return fluid
+
+
+def get_fluid_arguments(fluid):
+    """
+    Return the arguments of get_fluid returning an equivalent fluid: the fluid of the registry itself, or a copy
+    of it whose properties have not been changed.
+
+    :param fluid: The fluid
+    :type fluid: Fluid
+    :return: The tuple (fluid_name, shared), or None if the fluid is not a library fluid with default properties
+    :rtype: tuple
+    """
+    try:
+        registry_fluid = get_fluid(fluid.name)
+    except AttributeError:  # Not a library fluid
+        return None
+    if fluid is registry_fluid:
+        return fluid.name, True
+    if fluid.all_properties.keys() == registry_fluid.all_properties.keys() and \
+            all(prop is registry_fluid.all_properties[name] for name, prop in fluid.all_properties.items()):
+        return fluid.name, False
+    return None
+
+
+def clear_fluid_registry():
+    """
+    Clear the registry so that the fluids are read again from the library on their next use.
+    """
+    _load_fluid.cache_clear()
@@ -1,4 +1,10 @@
 import logging
+
+import numpy as np
+import pandas as pd
+
+from pandapower.auxiliary import _preserve_dtypes
+from pandapower.create import _get_multiple_index_with_check
 from pandapower.io_utils import JSONSerializableClass
 
 logger = logging.getLogger("PandaProsumer")
@@ -29,11 +35,57 @@ class BaseMapping(JSONSerializableClass):
         self.initiator_column = initiator_column
         self.responder_column = responder_column
 
-        added_index = super().add_to_net(net=container, element='mapping', index=index, overwrite=False,
-                                         fill_dict=fill_dict, preserve_dtypes=True)
+        pending_rows = getattr(container, '_pending_mapping_rows', None)
+        if pending_rows is None:
+            added_index = super().add_to_net(net=container, element='mapping', index=index, overwrite=False,
+                                             fill_dict=fill_dict, preserve_dtypes=True)
+        else:
+            # The mapping is created by create_many, its row is appended to the table with the others
+            pending_rows.append({"object": self, **fill_dict})
+            added_index = index
         self.index = added_index
         self.no_chain = no_chain
 
+    @classmethod
+    def create_many(cls, container, initiator_id, responder_id, index=None, **kwargs):
+        """
+        Creates one mapping per pair of initiator and responder and extends the mapping table of the
+        container once, instead of appending the rows one by one.
+
+        The other arguments of the constructor (e.g. initiator_column, responder_column, order, responder_net)
+        are given as keyword arguments. Each one is either a single value used for all the mappings or a list, tuple,
+        array or Series with one value per mapping (so a list of columns of a single mapping must be given inside a
+        list with one entry per mapping).
+
+        :param container: The container in which table the mappings are added
+        :param initiator_id: The initiating controller of each mapping
+        :param responder_id: The responding controller of each mapping
+        :param index: The indices of the mappings. If None, the next free indices are used
+        :param kwargs: The other arguments of the constructor
+        :return: The list of the created mappings
+        """
+        initiator_id = list(initiator_id)
+        number = len(initiator_id)
+        kwargs = {key: _broadcast(key, value, number) for key, value in kwargs.items()}
+        responder_id = _broadcast('responder_id', responder_id, number)
+        if 'mapping' not in container:
+            container['mapping'] = pd.DataFrame(columns=['object'])
+        index = _get_multiple_index_with_check(container, 'mapping', index, number)
+
+        pending_rows = []
+        container._setattr('_pending_mapping_rows', pending_rows)
+        try:
+            mappings = [cls(container=container, initiator_id=initiator_id[i], responder_id=responder_id[i],
+                            index=int(idx), **{key: values[i] for key, values in kwargs.items()})
+                        for i, idx in enumerate(index)]
+        finally:
+            container._setattr('_pending_mapping_rows', None)
+
+        dtypes = container.mapping.dtypes
+        container.mapping = pd.concat([container.mapping, pd.DataFrame(pending_rows, index=index)], sort=False)
+        _preserve_dtypes(container.mapping, dtypes)
+        return mappings
+
     def _validate(self):
         """
         Validates the mapping.
@@ -63,3 +115,14 @@ class BaseMapping(JSONSerializableClass):
                 f"Controller order error: Initiator '{initiator_ctrl.name}' (order: {initiator_ctrl.order}) "
                 f"must be executed before responder '{responder_ctrl.name}' (order: {responder_ctrl.order})."
             )
+
+
+def _broadcast(name, value, number):
+    """
+    Return a list with one value per mapping from a single value or a sequence of values
+    """
+    if isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+        if len(value) != number:
+            raise ValueError(f"{name} has {len(value)} values instead of one per mapping ({number})")
+        return list(value)
+    return [value] * number
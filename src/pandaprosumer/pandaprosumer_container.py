@@ -1,10 +1,14 @@
 import copy
 
+import numpy as np
 import pandas as pd
 from numpy import dtype
 
+from pandapipes import Fluid
 from pandapower.auxiliary import ADict
+from pandapower.timeseries import DFData
 from pandaprosumer import __version__
+from pandaprosumer.library.fluids import get_fluid, get_fluid_arguments
 
 import logging
 
@@ -22,6 +26,60 @@ class pandaprosumerContainer(ADict):
     def deepcopy(self):
         return copy.deepcopy(self)
 
+    def clone(self, share_profiles=True, share_results=False):
+        """
+        Return a copy of the container sharing its read-only data, which costs much less time and memory than
+        deepcopy for many variants of the same prosumer.
+
+        The time indexes of the controllers and the library fluids are always shared.
+        The tables are deep copies, as with the default pandas options a table sharing its data would be modified
+        with the table of this container. Only if the copy_on_write mode of pandas is enabled by the user
+        (pd.options.mode.copy_on_write = True), the tables are shallow copies which pandas copies on their first
+        modification.
+
+        :param share_profiles: If True, the profiles (DFData) of the controllers are shared with this container \
+            and must not be modified, else they are copied
+        :param share_results: If True, the results are shared with this container and the result buffers of the \
+            controllers are copied only when the clone is run, else the clone starts without results
+        :return: The cloned container
+        """
+        memo = dict()
+        controllers = self.controller.object.values if 'controller' in self else []
+        for controller in controllers:
+            for value in vars(controller).values():
+                if id(value) in memo:
+                    continue
+                if isinstance(value, Fluid):
+                    memo[id(value)] = _share_fluid(value)
+                elif isinstance(value, pd.DatetimeIndex) or share_profiles and isinstance(value, DFData):
+                    memo[id(value)] = value
+            res = getattr(controller, 'res', None)
+            if isinstance(res, np.ndarray):
+                if share_results:
+                    memo[id(res)] = res.view()
+                    memo[id(res)].flags.writeable = False
+                else:
+                    memo[id(res)] = np.zeros(res.shape, dtype=res.dtype)
+            # Controller.__getstate__ deep copies the attributes without the memo, which would copy the shared data
+            memo[id(controller)] = controller.__class__.__new__(controller.__class__)
+        for key, value in self.items():
+            # See ADict.__deepcopy__. Without the copy_on_write mode of pandas (the default), the data is copied
+            if isinstance(value, pd.DataFrame) and 'object' not in value.columns:
+                if key == 'time_series' and not share_results:
+                    memo[id(value)] = value.iloc[:0].copy()
+                else:
+                    memo[id(value)] = value.copy(deep=not pd.options.mode.copy_on_write)
+            elif isinstance(value, Fluid) and id(value) not in memo:
+                memo[id(value)] = _share_fluid(value)
+        for controller in controllers:
+            state = {key: value for key, value in vars(controller).items() if key not in controller.json_excludes}
+            cloned_controller = memo[id(controller)]
+            cloned_controller.__dict__.update(copy.deepcopy(state, memo))
+            if not share_results and getattr(cloned_controller, '_result_policy', None) is not None:
+                # The empty results of an aggregation are not zeros (e.g. NaN for the max)
+                cloned_controller.res = cloned_controller._result_policy.allocate(controller.res.shape[0])
+        return copy.deepcopy(self, memo)
+
     def __repr__(self):  # pragma: no cover
         r = "Following constraints are included:"
         par = []
@@ -40,6 +98,14 @@ class pandaprosumerContainer(ADict):
         return r
 
 
+def _share_fluid(fluid):
+    """
+    :return: The fluid of the registry if the fluid is a library fluid with default properties, else a copy
+    """
+    arguments = get_fluid_arguments(fluid)
+    return copy.deepcopy(fluid) if arguments is None else get_fluid(*arguments)
+
+
 def get_default_prosumer_container_structure():
     default_structure = {
         "name": "",
@@ -1,3 +1,7 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 import tqdm
 
@@ -5,6 +9,7 @@ from pandapower.control import get_controller_order
 from pandapower.create import _get_multiple_index_with_check
 from pandapower.timeseries import DFData
 from pandapower.timeseries.run_time_series import run_loop
+from pandaprosumer.file_io import to_binary, from_binary
 from pandaprosumer.run_control import run_control, prepare_run_ctrl
 
 try:
@@ -16,18 +21,271 @@ logger = pplog.getLogger(__name__)
 logger.setLevel(level=pplog.WARNING)
 
 
-def run_timeseries(prosumer, period_index, verbose=True):
-    start = prosumer.period.at[period_index, 'start']
-    end = prosumer.period.at[period_index, 'end']
-    resol = int(prosumer.period.at[period_index, 'resolution_s'])
-    dur = pd.date_range(start, end, freq='%ss' % resol, tz=prosumer.period.at[period_index, 'timezone'])
+def run_timeseries(prosumer, period_index, verbose=True, checkpoint_file=None, checkpoint_interval=10000,
+                   n_windows=1, warm_up_steps=0, max_matching_passes=None, n_jobs=1):
+    """
+    Run the controllers of a prosumer for all the time steps of a period.
+
+    If a checkpoint file is given, the prosumer (state and partial results of the controllers) and the index of the
+    next time step are saved to it every checkpoint_interval time steps, so that an interrupted run can be continued
+    with resume_timeseries. The checkpoint file is removed when the run is completed.
+
+    If n_windows > 1, the period is split in time windows run in parallel (see run_timeseries_windows).
+
+    :param prosumer: The prosumer
+    :param period_index: The index of the period in prosumer.period
+    :param verbose: If True, print a progress bar
+    :param checkpoint_file: The path of the checkpoint file. If None, no checkpoint is saved
+    :param checkpoint_interval: The number of time steps between two checkpoints
+    :param n_windows: The number of time windows of the period
+    :param warm_up_steps: The number of time steps run before each window to warm up the state of its controllers
+    :param max_matching_passes: The maximum number of passes matching the states at the window boundaries. If None,
+        n_windows - 1 passes at most, so that the results are the ones of a sequential run
+    :param n_jobs: The number of processes running the windows. -1 uses one process per CPU
+    """
+    dur = _get_period_time_steps(prosumer, period_index)
+    if n_windows > 1:
+        if checkpoint_file is not None:
+            raise ValueError("The checkpoints are not supported for a run split in time windows")
+        run_timeseries_windows(prosumer, dur, n_windows, warm_up_steps, max_matching_passes, n_jobs)
+        return
 
     #control_diagnostic_pandaprosumer(prosumer, start, end, resol)
     ts_variables = init_time_series(prosumer, dur, verbose)
     time_series_initialization(ts_variables['controller_order'])
+    _run_loop(prosumer, ts_variables, period_index, 0, checkpoint_file, checkpoint_interval)
+
+
+def run_timeseries_periods(prosumer, period_indexes=None, verbose=True, restore_initial_state=False):
+    """
+    Run the controllers of a prosumer for several periods in one call, binding the controllers to each period in
+    turn (see MappedController.set_period) instead of rebuilding them, so that all their caches and the controller
+    order are reused.
+
+    The results of all the periods are written to the time_series table of the prosumer, with their period_index.
+    By default, the state of the controllers (e.g. the state of charge of the storages) is carried from one period
+    to the next, for consecutive periods.
+
+    :param prosumer: The prosumer
+    :param period_indexes: The indexes of the periods in prosumer.period, in the order of the runs. If None, all
+        the periods are run
+    :param verbose: If True, print a progress bar for each period
+    :param restore_initial_state: If True, the controllers are restored to their state before the first period
+        before each period, for independent periods (e.g. typical weeks)
+    """
+    period_indexes = prosumer.period.index if period_indexes is None else period_indexes
+    ctrl_variables = prepare_run_ctrl(prosumer)
+    initial_prosumer = prosumer.clone() if restore_initial_state else None
+    for i, period_index in enumerate(period_indexes):
+        if restore_initial_state and i > 0:
+            _restore_controllers_state(prosumer, initial_prosumer.clone())
+        set_period(prosumer, period_index)
+        ts_variables = init_time_series(prosumer, _get_period_time_steps(prosumer, period_index), verbose,
+                                        ctrl_variables=dict(ctrl_variables))
+        time_series_initialization(ts_variables['controller_order'])
+        _run_loop(prosumer, ts_variables, period_index, 0, None, None)
+
+
+def _restore_controllers_state(prosumer, initial_prosumer):
+    """
+    Restore the state of the controllers of a prosumer to the one of the controllers of its clone initial_prosumer,
+    keeping their runtime caches and result buffers
+    """
+    for ctrl, initial_ctrl in zip(prosumer.controller.object.values, initial_prosumer.controller.object.values):
+        excludes = set(getattr(ctrl, 'json_excludes', [])) | {'res'}
+        ctrl.__dict__.update({key: value for key, value in vars(initial_ctrl).items() if key not in excludes})
+
+
+def set_period(prosumer, period_index):
+    """
+    Bind all the controllers with a period of a prosumer to another period (see MappedController.set_period)
+
+    :param prosumer: The prosumer
+    :param period_index: The index of the period in prosumer.period
+    """
+    for ctrl in prosumer.controller.object.values:
+        if hasattr(ctrl, 'set_period'):
+            ctrl.set_period(prosumer, period_index)
+
+
+def resume_timeseries(checkpoint_file, verbose=True, checkpoint_interval=10000):
+    """
+    Continue a run of run_timeseries from its last checkpoint, without running again the previous time steps.
+
+    The hooks registered on the controllers are not saved in the checkpoint and must be registered again on the
+    returned prosumer to be called for the remaining time steps.
+
+    .. warning:: Loading the checkpoint file can execute code referenced by the file (see from_binary), only
+        resume from checkpoint files from trusted sources.
+
+    :param checkpoint_file: The path of the checkpoint file saved by run_timeseries
+    :param verbose: If True, print a progress bar
+    :param checkpoint_interval: The number of time steps between two checkpoints
+    :return: The prosumer with the results of the whole period
+    """
+    checkpoint = from_binary(checkpoint_file)
+    prosumer, period_index, first_step = checkpoint["prosumer"], checkpoint["period_index"], checkpoint["next_step"]
+    dur = _get_period_time_steps(prosumer, period_index)
+
+    ts_variables = init_time_series(prosumer, dur[first_step:], verbose)
+    _run_loop(prosumer, ts_variables, period_index, first_step, checkpoint_file, checkpoint_interval)
+    return prosumer
+
+
+def run_timeseries_windows(prosumer, time_steps, n_windows, warm_up_steps=0, max_matching_passes=None, n_jobs=1):
+    """
+    Run the time steps of a period split in consecutive time windows, which are run independently (in parallel if
+    n_jobs > 1) on clones of the prosumer, and write their stitched results to the time_series table of the prosumer.
+
+    This is meant for prosumers whose only state carried from one time step to the next is the state of their
+    storages. Each window but the first starts from the initial state of the prosumer, which is warmed up by running
+    the warm_up_steps time steps preceding the window, whose results are discarded.
+    Then each matching pass runs again every window whose previous window got different results in the previous
+    pass, starting from the state at the end of the previous window. Two runs of a window are the same if they got
+    the same results and the same state of the controllers at the end of the window. The results of the first windows
+    are thus exact after each pass, and the results of all the windows are the ones of a sequential run after
+    n_windows - 1 passes at most.
+
+    Without warm-up steps nor matching passes, the windows but the first start from the initial state of the
+    prosumer, which gives the results of a sequential run only for prosumers without state (a warning is logged).
+
+    Each window run is a clone of the prosumer (see pandaprosumerContainer.clone), whose tables are deep copies
+    unless the copy_on_write mode of pandas is enabled.
+    At the end, the controllers of the prosumer get the state of the controllers at the end of the last window.
+    The hooks of the controllers are not called for the steps run in the windows.
+
+    :param prosumer: The prosumer
+    :param time_steps: The time steps of the period
+    :type time_steps: pandas.DatetimeIndex
+    :param n_windows: The number of time windows
+    :param warm_up_steps: The number of time steps run before each window to warm up the state of its controllers
+    :param max_matching_passes: The maximum number of passes matching the states at the window boundaries. If None,
+        n_windows - 1 passes at most
+    :param n_jobs: The number of processes running the windows. -1 uses one process per CPU
+    """
+    if max_matching_passes is None:
+        max_matching_passes = n_windows - 1
+    if warm_up_steps < 0 or max_matching_passes < 0:
+        raise ValueError("warm_up_steps and max_matching_passes must not be negative")
+    if warm_up_steps == 0 and max_matching_passes == 0:
+        logger.warning("The time windows are run without warm-up steps nor matching passes, they start from the "
+                       "initial state of the prosumer: the results are exact only for a prosumer without state")
+    if any(getattr(ctrl, '_result_policy', None) is not None for ctrl in prosumer.controller.object.values):
+        raise ValueError("A run split in time windows stores the results of every time step, it does not support "
+                         "the result policies")
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    windows = [window for window in np.array_split(np.arange(len(time_steps)), n_windows) if len(window)]
+
+    starts = [max(0, window[0] - warm_up_steps) for window in windows]
+    window_prosumers = _run_windows([prosumer.clone() for _ in windows],
+                                    [time_steps[start:window[-1] + 1] for start, window in zip(starts, windows)],
+                                    n_jobs)
+
+    changed = [True] * len(windows)
+    for _ in range(max_matching_passes):
+        rerun = [k for k in range(1, len(windows)) if changed[k - 1]]
+        changed = [False] * len(windows)
+        if not rerun:
+            break
+        # A window starts from the state at the end of the previous window in the previous pass
+        results = _run_windows([window_prosumers[k - 1].clone(share_results=True) for k in rerun],
+                               [time_steps[windows[k][0]:windows[k][-1] + 1] for k in rerun], n_jobs)
+        for k, window_prosumer in zip(rerun, results):
+            changed[k] = not _same_window_results(window_prosumers[k], window_prosumer, windows[k])
+            window_prosumers[k] = window_prosumer
+
+    for idx, ctrl in prosumer.controller.object.items():
+        res = getattr(ctrl, 'res', None)
+        if isinstance(res, np.ndarray) and res.ndim == 3:
+            if not res.flags.writeable:
+                ctrl.res = res = res.copy()
+            for window, window_prosumer in zip(windows, window_prosumers):
+                res[:, window, :] = window_prosumer.controller.object.at[idx].res[:, window, :]
+        last_ctrl = window_prosumers[-1].controller.object.at[idx]
+        ctrl.__dict__.update({key: value for key, value in vars(last_ctrl).items()
+                              if key not in ctrl.json_excludes and key != 'res'})
+    time_series_finalization(prepare_run_ctrl(prosumer)['controller_order'])
+
+
+def _run_windows(prosumers, time_steps, n_jobs):
+    if n_jobs > 1 and len(prosumers) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(prosumers))) as executor:
+            # The prosumers are pickled to the worker processes, get back the ones with the results
+            return list(executor.map(_run_window, prosumers, time_steps))
+    return [_run_window(prosumer, steps) for prosumer, steps in zip(prosumers, time_steps)]
+
+
+def _run_window(prosumer, time_steps):
+    ts_variables = init_time_series(prosumer, time_steps, verbose=False)
     run_loop(prosumer, ts_variables, output_writer_fct=output_writer_fct, evaluate_net_fct=evaluate_prosumer_fct,
              run_control_fct=run_control)
+    return prosumer
+
+
+def _same_window_results(prosumer, other, window):
+    """
+    :return: True if the controllers of two runs of a window got the same results and the same state at its end
+    """
+    for ctrl, other_ctrl in zip(prosumer.controller.object.values, other.controller.object.values):
+        res = getattr(ctrl, 'res', None)
+        if isinstance(res, np.ndarray) and res.ndim == 3 and \
+                not np.allclose(res[:, window, :], other_ctrl.res[:, window, :], equal_nan=True):
+            return False
+        excludes = set(getattr(ctrl, 'json_excludes', [])) | {'res'}
+        if not _same_state({key: value for key, value in vars(ctrl).items() if key not in excludes},
+                           {key: value for key, value in vars(other_ctrl).items() if key not in excludes}):
+            return False
+    return True
+
+
+def _same_state(value, other):
+    """
+    Compare the state values of two controllers (storage layers, previous temperatures, accumulated values...).
+    The objects referenced by the controllers (data, fluids, profiles) are not state and are not compared
+    """
+    if isinstance(value, np.ndarray):
+        if not isinstance(other, np.ndarray) or value.shape != other.shape:
+            return False
+        if value.dtype.kind in "fc":
+            return np.allclose(value, other, equal_nan=True)
+        return np.array_equal(value, other)
+    if isinstance(value, dict):
+        return isinstance(other, dict) and value.keys() == other.keys() and \
+            all(_same_state(value[key], other[key]) for key in value)
+    if isinstance(value, (list, tuple)):
+        return isinstance(other, (list, tuple)) and len(value) == len(other) and \
+            all(_same_state(item, other_item) for item, other_item in zip(value, other))
+    if isinstance(value, float):
+        return isinstance(other, (float, int)) and bool(np.isclose(value, other, equal_nan=True))
+    if hasattr(value, '__dict__'):
+        return True
+    return bool(value == other)
+
+
+def _get_period_time_steps(prosumer, period_index):
+    start = prosumer.period.at[period_index, 'start']
+    end = prosumer.period.at[period_index, 'end']
+    resol = int(prosumer.period.at[period_index, 'resolution_s'])
+    return pd.date_range(start, end, freq='%ss' % resol, tz=prosumer.period.at[period_index, 'timezone'])
+
+
+def _run_loop(prosumer, ts_variables, period_index, first_step, checkpoint_file, checkpoint_interval):
+    """
+    Run the time steps of ts_variables, which start at the step first_step of the period, and finalize the run
+    """
+    writer_fct = output_writer_fct
+    if checkpoint_file is not None:
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be a positive number of time steps, got %s"
+                             % checkpoint_interval)
+        ts_variables['checkpoint'] = {'file': checkpoint_file, 'interval': checkpoint_interval,
+                                      'period_index': period_index, 'first_step': first_step}
+        writer_fct = checkpoint_writer_fct
+    run_loop(prosumer, ts_variables, output_writer_fct=writer_fct, evaluate_net_fct=evaluate_prosumer_fct,
+             run_control_fct=run_control)
     time_series_finalization(ts_variables['controller_order'])
+    if checkpoint_file is not None and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
 
 
 def time_series_initialization(controller_order):
@@ -52,7 +310,9 @@ def retrieve_data(controller_order, fct_name):
                 if fct is None or 'time_series' not in prosumer:
                     continue
                 res = fct(prosumer)
-                data = [DFData(pd.DataFrame(entry, columns=ctrl.result_columns, index=ctrl.time_index)) for entry in res]
+                res_columns = getattr(ctrl, 'res_columns', ctrl.result_columns)
+                res_time_index = getattr(ctrl, 'res_time_index', ctrl.time_index)
+                data = [DFData(pd.DataFrame(entry, columns=res_columns, index=res_time_index)) for entry in res]
                 index = _get_multiple_index_with_check(prosumer, 'time_series', None, len(data))
                 columns = ['name', 'element', 'element_index', 'period_index', 'data_source']
                 for i, idx in enumerate(index):
@@ -79,6 +339,20 @@ def output_writer_fct(prosumer, time_step, pf_converged, ctrl_converged, ts_vari
     pass
 
 
+def checkpoint_writer_fct(prosumer, time_step, pf_converged, ctrl_converged, ts_variables):
+    """
+    Save the prosumer and the index of the next time step to the checkpoint file every checkpoint interval
+    """
+    checkpoint = ts_variables['checkpoint']
+    next_step = checkpoint['first_step'] + ts_variables['time_steps'].get_loc(time_step) + 1
+    if next_step % checkpoint['interval'] == 0:
+        # Write to a temporary file first so that an interruption while saving does not corrupt the last checkpoint
+        temporary_file = "%s.tmp" % checkpoint['file']
+        to_binary({"prosumer": prosumer, "period_index": checkpoint['period_index'], "next_step": next_step},
+                  temporary_file)
+        os.replace(temporary_file, checkpoint['file'])
+
+
 def evaluate_prosumer_fct(prosumer, levelorder, ctrl_variables, **kwargs):
     return ctrl_variables
 
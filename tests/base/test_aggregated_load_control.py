@@ -0,0 +1,65 @@
+import numpy as np
+import pandapower as pp
+import pytest
+
+from pandaprosumer.energy_system.control.controller.coupling.pandapower_interface import AggregatedLoadControl, \
+    LoadControl
+from pandaprosumer.energy_system.control.controller.data_model.net_interface import NetControllerData
+
+
+def _create_net(n_loads):
+    net = pp.create_empty_network()
+    bus_0 = pp.create_bus(net, vn_kv=0.4)
+    pp.create_ext_grid(net, bus_0)
+    for i in range(n_loads):
+        bus = pp.create_bus(net, vn_kv=0.4)
+        pp.create_line(net, bus_0, bus, length_km=0.1, std_type="NAYY 4x50 SE")
+        pp.create_load(net, bus, p_mw=0.005)
+    return net
+
+
+def _load_data(element_index, input_columns):
+    return NetControllerData(element_index=element_index, element_name='load', input_columns=input_columns,
+                             result_columns=[])
+
+
+class TestAggregatedLoadControl:
+    """
+    Tests the aggregation of the powers of several prosumers to the loads of a pandapower net
+    """
+
+    def test_same_as_load_controls(self):
+        net, reference = _create_net(3), _create_net(3)
+        p_in_kw = np.array([2., 7., 11.])
+        aggregated = AggregatedLoadControl(net, _load_data([0, 1, 2], ['p_in_kw_0', 'p_in_kw_1', 'p_in_kw_2']))
+        aggregated.inputs[0] = p_in_kw
+        aggregated.control_step(net)
+        for load_index, p_kw in enumerate(p_in_kw):
+            load_control = LoadControl(reference, _load_data([load_index], ['p_in_kw']))
+            load_control.inputs[0] = p_kw
+            load_control.control_step(reference)
+
+        assert aggregated.applied
+        assert np.allclose(net.load.p_mw.values, reference.load.p_mw.values)
+        pp.runpp(net)
+        pp.runpp(reference)
+        assert np.allclose(net.res_bus.vm_pu.values, reference.res_bus.vm_pu.values)
+
+    def test_unmapped_elements_keep_their_value(self):
+        net = _create_net(3)
+        aggregated = AggregatedLoadControl(net, _load_data([0, 2], ['p_in_kw_0', 'p_in_kw_2']))
+        aggregated.inputs[0, 0] = 3.
+        aggregated.control_step(net)
+        assert np.allclose(net.load.p_mw.values, [0.003, 0.005, 0.005])
+
+    def test_recycle(self):
+        net = _create_net(2)
+        columns = ['p_in_kw_0', 'p_in_kw_1']
+        aggregated = AggregatedLoadControl(net, _load_data([0, 1], columns), recycle=True)
+        assert net.controller.at[aggregated.index, 'recycle'] == dict(trafo=False, gen=False, bus_pq=True)
+        not_recycled = AggregatedLoadControl(net, _load_data([0, 1], columns))
+        assert net.controller.at[not_recycled.index, 'recycle'] is False
+
+    def test_one_input_column_per_element(self):
+        with pytest.raises(ValueError):
+            AggregatedLoadControl(_create_net(2), _load_data([0, 1], ['p_in_kw']))
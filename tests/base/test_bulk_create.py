@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandaprosumer import *
+from tests.data_sources.define_period import define_and_get_period_and_data_source
+
+
+def _create_prosumer():
+    prosumer = create_empty_prosumer_container()
+    define_and_get_period_and_data_source(prosumer)
+    return prosumer
+
+
+class TestBulkCreate:
+    """
+    Tests the creation of many elements and controllers at once
+    """
+
+    def test_same_tables_as_single_creation(self):
+        max_p_comp_kw = [100., 200., np.nan]
+        scaling = pd.Series([1., .5, 2.])
+        tank_height_m = [10., 8., 6.]
+
+        reference = _create_prosumer()
+        for i in range(3):
+            create_controlled_heat_demand(reference, scaling=scaling[i], name=f"dmd_{i}")
+            create_controlled_heat_pump(reference, max_p_comp_kw=max_p_comp_kw[i], evap_fluid="air",
+                                        name=f"hp_{i}", order=1)
+            create_controlled_stratified_heat_storage(reference, tank_height_m[i], .6, name=f"shs_{i}")
+
+        prosumer = _create_prosumer()
+        names = [f"dmd_{i}" for i in range(3)]
+        assert list(create_controlled_heat_demands(prosumer, 3, scaling=scaling, name=names)) == [0, 1, 2]
+        create_controlled_heat_pumps(prosumer, 3, max_p_comp_kw=max_p_comp_kw, evap_fluid="air",
+                                     name=[f"hp_{i}" for i in range(3)], order=1)
+        create_controlled_stratified_heat_storages(prosumer, 3, tank_height_m, .6,
+                                                   name=[f"shs_{i}" for i in range(3)])
+
+        for element in ["heat_demand", "heat_pump", "stratified_heat_storage"]:
+            pd.testing.assert_frame_equal(prosumer[element], reference[element], check_like=True)
+        assert prosumer.heat_pump.evap_fluid.tolist() == ["air"] * 3
+        assert prosumer.heat_pump.cond_fluid.tolist() == ["water"] * 3
+
+        def controller_rows(container):
+            return {(type(row.object).__name__, row.object.element_index[0]):
+                    (row.object.name, row.in_service, row.order, row.level) for _, row in container.controller.iterrows()}
+
+        assert controller_rows(prosumer) == controller_rows(reference)
+        assert all(row.object.index == idx for idx, row in prosumer.controller.iterrows())
+        assert prosumer.controller.dtypes.equals(reference.controller.dtypes)
+
+    def test_invalid_storage(self):
+        prosumer = _create_prosumer()
+        with pytest.raises(ValueError):
+            create_controlled_stratified_heat_storages(prosumer, 2, 10., [.6, .6], tank_external_radius_m=[.7, .5])
+        assert len(prosumer.controller) == 0
@@ -0,0 +1,40 @@
+import numpy as np
+import pandapipes
+import pytest
+
+from pandaprosumer.energy_system.control.controller.coupling.pandapipes_interface import BulkReadPipeProdControl, \
+    ReadPipeProdControl
+from pandaprosumer.energy_system.control.controller.data_model.net_interface import NetControllerData
+
+from tests.fixtures.district_heating import create_ladder_pandapipes_net
+
+
+def _pump_data(element_index, result_columns):
+    return NetControllerData(element_index=element_index, element_name='circ_pump_pressure', input_columns=[],
+                             result_columns=result_columns)
+
+
+class TestBulkReadPipeProdControl:
+    """
+    Tests the reading of the results of several producers of a pandapipes net at once
+    """
+
+    def test_same_as_read_controls(self):
+        net = create_ladder_pandapipes_net(4, n_plants=3)
+        pandapipes.pipeflow(net)
+        pumps = list(net.circ_pump_pressure.index[::-1])
+        columns = [column % i for i in range(len(pumps)) for column in ('t_c_%s', 'tfeed_c_%s', 'mdot_kg_per_s_%s')]
+        bulk = BulkReadPipeProdControl(net, _pump_data(pumps, columns))
+        bulk.control_step(net)
+
+        assert bulk.applied
+        assert bulk.step_results.shape == (1, 3 * len(pumps))
+        for i, pump in enumerate(pumps):
+            read_control = ReadPipeProdControl(net, _pump_data([pump], ['t_c', 'tfeed_c', 'mdot_kg_per_s']))
+            read_control.control_step(net)
+            assert np.allclose(bulk.step_results[0, 3 * i:3 * i + 3], read_control.step_results[0])
+
+    def test_three_result_columns_per_element(self):
+        net = create_ladder_pandapipes_net(2, n_plants=2)
+        with pytest.raises(ValueError):
+            BulkReadPipeProdControl(net, _pump_data([0, 1], ['t_c', 'tfeed_c', 'mdot_kg_per_s']))
@@ -0,0 +1,61 @@
+import pytest
+
+from pandaprosumer.controller.hooks import ControllerHook
+from pandaprosumer.run_time_series import run_timeseries, resume_timeseries
+
+from tests.fixtures.prosumers import run_copy, assert_same_results
+from tests.fixtures.topologies import TOPOLOGIES
+
+
+class _Interruption(Exception):
+    pass
+
+
+class _InterruptingHook(ControllerHook):
+    """
+    Interrupt the run before the time step number 'step'
+    """
+
+    def __init__(self, step):
+        self.step = step
+        self.nb_steps = 0
+
+    def before(self, controller, event, container):
+        if event == "time_step":
+            if self.nb_steps == self.step:
+                raise _Interruption()
+            self.nb_steps += 1
+
+
+class TestCheckpoint:
+    """
+    Tests the checkpoint and resume of run_timeseries
+    """
+
+    @pytest.mark.parametrize("topology", ["hp_shs_dmd", "chp_bhp_hs_dmd"])
+    def test_resume_after_interruption(self, tmp_path, topology):
+        prosumer = TOPOLOGIES[topology]("1d", 3600)
+        reference = run_copy(prosumer)
+
+        checkpoint_file = tmp_path / "checkpoint.bin"
+        prosumer.controller.object.at[0].add_hook(_InterruptingHook(17))
+        with pytest.raises(_Interruption):
+            run_timeseries(prosumer, 0, checkpoint_file=checkpoint_file, checkpoint_interval=5)
+        assert checkpoint_file.exists()
+
+        resumed = resume_timeseries(checkpoint_file, checkpoint_interval=5)
+        assert resumed.controller.object.at[0].time == reference.controller.object.at[0].time
+        assert_same_results(reference, resumed)
+        assert not checkpoint_file.exists()
+
+    def test_checkpoint_does_not_change_results(self, tmp_path):
+        prosumer = TOPOLOGIES["2hp_dmd"]("1d", 3600)
+        reference = run_copy(prosumer)
+        run_timeseries(prosumer, 0, checkpoint_file=tmp_path / "checkpoint.bin", checkpoint_interval=1)
+        assert_same_results(reference, prosumer)
+        assert not (tmp_path / "checkpoint.bin").exists()
+
+    def test_invalid_interval(self, tmp_path):
+        prosumer = TOPOLOGIES["2hp_dmd"]("1d", 3600)
+        with pytest.raises(ValueError):
+            run_timeseries(prosumer, 0, checkpoint_file=tmp_path / "checkpoint.bin", checkpoint_interval=0)
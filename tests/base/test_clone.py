@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from pandaprosumer.run_time_series import run_timeseries
+
+from tests.fixtures.prosumers import create_prosumer_with_all_components, assert_same_prosumer, run_copy, \
+    assert_same_results
+from tests.fixtures.topologies import TOPOLOGIES
+
+
+class TestClone:
+    """
+    Tests the clone of prosumer containers sharing their read-only data
+    """
+
+    def test_clone_all_components(self):
+        prosumer = create_prosumer_with_all_components()
+        clone = prosumer.clone()
+        assert_same_prosumer(prosumer, clone)
+
+        for controller, cloned_controller in zip(prosumer.controller.object, clone.controller.object):
+            assert cloned_controller is not controller
+            assert cloned_controller.time_index is controller.time_index
+            assert getattr(cloned_controller, "df_data", None) is getattr(controller, "df_data", None)
+        assert all(mapping.responder_net is clone for mapping in clone.mapping.object)
+        assert clone.fluid is not prosumer.fluid
+        assert clone.fluid.all_properties["density"] is prosumer.fluid.all_properties["density"]
+
+    def test_independent_tables_and_controllers(self):
+        prosumer = create_prosumer_with_all_components()
+        clone = prosumer.clone(share_profiles=False)
+        assert clone.controller.object.at[0].df_data is not prosumer.controller.object.at[0].df_data
+
+        clone.heat_pump.loc[0, "max_p_comp_kw"] = 1000
+        clone.controller.object.at[1].t_keep_return_c = 20.
+        assert prosumer.heat_pump.at[0, "max_p_comp_kw"] == 500
+        assert prosumer.controller.object.at[1].t_keep_return_c != 20.
+
+    def test_tables_copy_on_write(self):
+        prosumer = create_prosumer_with_all_components()
+        # With the default pandas options, the tables are deep copies
+        clone = prosumer.clone()
+        assert not np.shares_memory(clone.heat_pump.max_p_comp_kw.values, prosumer.heat_pump.max_p_comp_kw.values)
+        with pd.option_context("mode.copy_on_write", True):
+            clone = prosumer.clone()
+            assert np.shares_memory(clone.heat_pump.max_p_comp_kw.values, prosumer.heat_pump.max_p_comp_kw.values)
+            clone.heat_pump.loc[0, "max_p_comp_kw"] = 1000
+            assert prosumer.heat_pump.at[0, "max_p_comp_kw"] == 500
+
+    def test_same_results(self):
+        for topology, create_prosumer in TOPOLOGIES.items():
+            prosumer = create_prosumer("1d", 3600, name=topology)
+            clone = prosumer.clone()
+            run_timeseries(clone, 0, verbose=False)
+            assert len(prosumer.time_series) == 0
+            assert_same_results(run_copy(prosumer), clone)
+
+    def test_share_results(self):
+        prosumer = TOPOLOGIES["hp_shs_dmd"]("1d", 3600)
+        run_timeseries(prosumer, 0)
+        results = [controller.res.copy() for controller in prosumer.controller.object]
+
+        assert len(prosumer.clone().time_series) == 0
+        assert not any(controller.res.any() for controller in prosumer.clone().controller.object)
+
+        clone = prosumer.clone(share_results=True)
+        assert len(clone.time_series) == len(prosumer.time_series)
+        assert not clone.controller.object.at[0].res.flags.writeable
+
+        # Running the clone copies the shared result buffers, the results of the original are not changed
+        run_timeseries(clone, 0)
+        for controller, cloned_controller, res in zip(prosumer.controller.object, clone.controller.object, results):
+            assert np.array_equal(controller.res, res, equal_nan=True)
+            assert cloned_controller.res.flags.writeable
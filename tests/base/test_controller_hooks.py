@@ -0,0 +1,96 @@
+import copy
+import json
+
+import pandas as pd
+
+from pandaprosumer import *
+from pandaprosumer.controller.hooks import (CumulativeTimingSink, LatencyHistogramSink, ChromeTraceSink,
+                                            enable_profiling, disable_profiling, HOOKED_EVENTS)
+from pandaprosumer.mapping import GenericMapping, FluidMixMapping
+from pandaprosumer.run_time_series import run_timeseries
+
+
+def _create_prosumer():
+    prosumer = create_empty_prosumer_container()
+    data = pd.DataFrame({"Tin_evap": [25, 25, 25],
+                         "demand_1_kw": [50, 200, 0],
+                         "tdmd_feed1_c": [76.85, 76.85, 76.85],
+                         "tdmd_return1_c": [30, 30, 30]})
+    start = '2020-01-01 00:00:00'
+    resol = 3600
+    end = pd.Timestamp(start) + len(data) * pd.Timedelta(f"00:00:{resol}") - pd.Timedelta("00:00:01")
+    period = create_period(prosumer, resol, start, end, 'utc', 'default')
+    data.index = pd.date_range(start, end, freq='%ss' % resol, tz='utc')
+
+    cp_idx = create_controlled_const_profile(prosumer, ["Tin_evap", "demand_1_kw", "tdmd_feed1_c", "tdmd_return1_c"],
+                                             ["t_evap_in_c", "qdemand_kw", "tdmd_feed_c", "tdmd_return_c"],
+                                             period, DFData(data), level=0, order=0)
+    hp_idx = create_controlled_heat_pump(prosumer, level=1, order=0, period=period, carnot_efficiency=0.5,
+                                         pinch_c=0, delta_t_evap_c=5, max_p_comp_kw=100)
+    hd_idx = create_controlled_heat_demand(prosumer, level=1, order=1, period=period,
+                                           t_in_set_c=76.85, t_out_set_c=30)
+    GenericMapping(prosumer, cp_idx, "t_evap_in_c", hp_idx, "t_evap_in_c", order=0)
+    GenericMapping(prosumer, cp_idx, ["qdemand_kw", "tdmd_feed_c", "tdmd_return_c"],
+                   hd_idx, ["q_demand_kw", "t_feed_demand_c", "t_return_demand_c"], order=1)
+    FluidMixMapping(prosumer, hp_idx, hd_idx, order=0)
+    return prosumer, period
+
+
+class TestControllerHooks:
+    """
+    Tests the profiling hooks of the MappedControllers
+    """
+
+    def test_disabled_by_default(self):
+        prosumer, _ = _create_prosumer()
+        for ctrl in prosumer.controller.object.values:
+            for event in HOOKED_EVENTS:
+                assert event not in ctrl.__dict__
+
+    def test_sinks(self, tmp_path):
+        prosumer, period = _create_prosumer()
+        timing, histogram, trace = CumulativeTimingSink(), LatencyHistogramSink(), ChromeTraceSink()
+        enable_profiling(prosumer, timing, histogram, trace)
+        run_timeseries(prosumer, period)
+
+        df = timing.to_dataframe()
+        assert set(df.controller_index) == {0, 1, 2}
+        assert set(df.event) == set(HOOKED_EVENTS)
+        hp = df[(df.controller_index == 1) & (df.event == "time_step")]
+        assert hp.calls.iloc[0] == 3
+        assert (df.total_s >= 0).all()
+
+        assert histogram.to_dataframe().sum(axis=1).sum() == df.calls.sum()
+
+        assert len(trace.events) == df.calls.sum()
+        trace.save(tmp_path / "trace.json")
+        with open(tmp_path / "trace.json") as f:
+            assert len(json.load(f)["traceEvents"]) == len(trace.events)
+
+    def test_results_unchanged(self):
+        prosumer_ref, period_ref = _create_prosumer()
+        run_timeseries(prosumer_ref, period_ref)
+        prosumer, period = _create_prosumer()
+        enable_profiling(prosumer)
+        run_timeseries(prosumer, period)
+        for idx in prosumer_ref.time_series.index:
+            pd.testing.assert_frame_equal(prosumer.time_series.data_source[idx].df,
+                                          prosumer_ref.time_series.data_source[idx].df)
+
+    def test_disable_and_copy(self):
+        prosumer, _ = _create_prosumer()
+        hook = CumulativeTimingSink()
+        enable_profiling(prosumer, hook)
+        ctrl = prosumer.controller.object.at[1]
+        assert "control_step" in ctrl.__dict__
+        ctrl_copy = copy.deepcopy(ctrl)
+        assert "control_step" not in ctrl_copy.__dict__
+        assert not ctrl_copy._hooks
+
+        ctrl.remove_hook(hook)
+        assert "control_step" not in ctrl.__dict__
+        enable_profiling(prosumer, hook)
+        disable_profiling(prosumer)
+        for ctrl in prosumer.controller.object.values:
+            assert not ctrl._hooks
+            assert "finalize" not in ctrl.__dict__
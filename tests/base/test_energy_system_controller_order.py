@@ -0,0 +1,61 @@
+import copy
+
+from pandaprosumer import create_controlled_heat_demand
+from pandaprosumer.controller.mapped import notify_controller_tables_changed
+from pandaprosumer.energy_system.control.run_control_energy_system import get_controller_order_energy_system, \
+    prepare_run_ctrl, _get_controller_tables_signature
+
+from tests.fixtures.district_heating import create_district_heating_energy_system
+
+
+class TestEnergySystemControllerOrder:
+    """
+    Tests the cache of the controller order of the energy system
+    """
+
+    def test_cached_order(self):
+        energy_system = create_district_heating_energy_system(2, "1d", 6 * 3600)
+        levels, order = get_controller_order_energy_system(energy_system)
+
+        # The order is not computed again if no controller table changed
+        assert get_controller_order_energy_system(energy_system)[1] is order
+        ctrl_variables = prepare_run_ctrl(energy_system, None)
+        assert prepare_run_ctrl(energy_system, ctrl_variables)['controller_order'] is order
+
+        # Changing the level of a controller directly invalidates the cache once notified
+        prosumer = energy_system['prosumer']['prosumer_dmd_0']
+        prosumer.controller.loc[prosumer.controller.index[-1], 'level'] = max(levels) + 1
+        notify_controller_tables_changed()
+        new_levels, new_order = get_controller_order_energy_system(energy_system)
+        assert new_order is not order
+        assert max(new_levels) == max(levels) + 1
+
+        # Disabling a controller invalidates the cache
+        ctrl = prosumer.controller.object.at[prosumer.controller.index[-1]]
+        ctrl.set_active(prosumer, False)
+        assert get_controller_order_energy_system(energy_system)[1] is not new_order
+
+    def test_signature_without_prosumer_tables(self):
+        energy_system = create_district_heating_energy_system(2, "1d", 6 * 3600)
+        prosumer = energy_system['prosumer']['prosumer_dmd_0']
+        signature = _get_controller_tables_signature(energy_system)
+        # The controller tables of the prosumers are not read at each step, a direct change must be notified
+        prosumer.controller.loc[prosumer.controller.index[-1], 'order'] = 9
+        assert _get_controller_tables_signature(energy_system) == signature
+        notify_controller_tables_changed()
+        assert _get_controller_tables_signature(energy_system) != signature
+
+        # Adding a controller to a prosumer invalidates the cache
+        signature = _get_controller_tables_signature(energy_system)
+        create_controlled_heat_demand(prosumer, period=0, order=9)
+        assert _get_controller_tables_signature(energy_system) != signature
+
+    def test_copied_energy_system(self):
+        energy_system = create_district_heating_energy_system(2, "1d", 6 * 3600)
+        _, order = get_controller_order_energy_system(energy_system)
+
+        # The copy has its own controllers, so its order is computed again
+        energy_system_copy = copy.deepcopy(energy_system)
+        _, order_copy = get_controller_order_energy_system(energy_system_copy)
+        controllers = {id(ctrl) for level_order in order for ctrl, _ in level_order}
+        assert not controllers & {id(ctrl) for level_order in order_copy for ctrl, _ in level_order}
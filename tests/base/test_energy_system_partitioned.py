@@ -0,0 +1,115 @@
+import logging
+import re
+
+import numpy as np
+import pytest
+
+from pandaprosumer.controller.result_policy import ResultPolicy, set_result_policy
+from pandaprosumer.energy_system.control.controller.coupling.pandapipes_balance import PandapipesBalanceControl
+from pandaprosumer.energy_system.control.partitioned_prosumers import PartitionedProsumers
+from pandaprosumer.energy_system.timeseries import run_time_series_energy_system
+from pandaprosumer.energy_system.timeseries.run_time_series_energy_system import run_timeseries, \
+    get_prosumer_clusters
+
+from tests.fixtures.district_heating import create_district_heating_energy_system
+
+
+def _results(prosumer):
+    return {row.element: row.data_source.df.values for _, row in prosumer.time_series.iterrows()}
+
+
+class TestEnergySystemPartitioned:
+    """
+    Tests the partitioned co-simulation of energy systems, with the prosumers in worker processes
+    """
+
+    def test_same_results_as_serial(self):
+        energy_system = create_district_heating_energy_system(3, "1d", 6 * 3600)
+        run_timeseries(energy_system, 0, verbose=False, n_jobs=2)
+
+        reference = create_district_heating_energy_system(3, "1d", 6 * 3600)
+        run_timeseries(reference, 0, verbose=False)
+        for name, prosumer in reference.prosumer.items():
+            results = _results(energy_system.prosumer[name])
+            assert results.keys() == _results(prosumer).keys()
+            for element, values in _results(prosumer).items():
+                assert np.allclose(results[element], values, equal_nan=True)
+        output = energy_system.nets['hydro'].output_writer.iat[0, 0].output
+        for key, values in reference.nets['hydro'].output_writer.iat[0, 0].output.items():
+            if key.startswith("res_"):
+                assert np.allclose(output[key].values, values.values, equal_nan=True)
+
+        # The coupling objects of the net refer to the prosumers with the results
+        net = energy_system.nets['hydro']
+        balance = net.controller.at[0, 'object']
+        assert balance.demand_evaluator is None
+        for fcc, prosumer in zip(balance.pandapipes_connector_controllers, balance.connector_prosumers):
+            assert prosumer is energy_system.prosumer[prosumer.name]
+            assert any(ctrl is fcc for ctrl in prosumer.controller.object.values)
+        for mapping in net.mapping.object.values:
+            assert any(mapping.responder_net is prosumer for prosumer in energy_system.prosumer.values())
+
+    def test_connector_demands(self, monkeypatch):
+        # The demands of the connector prosumers evaluated by the workers are the ones of the serial evaluation,
+        # in the order of the heat consumers of the balance controller
+        demands = {False: [], True: []}
+        serial_demands = PandapipesBalanceControl._get_connectors_demands
+        partitioned_demands = PartitionedProsumers.get_connectors_demands
+
+        def record_serial(balance):
+            result = serial_demands(balance)
+            if balance.demand_evaluator is None:
+                demands[False].append(np.column_stack(result))
+            return result
+
+        def record_partitioned(partition, balance):
+            result = partitioned_demands(partition, balance)
+            demands[True].append(result)
+            return result
+
+        monkeypatch.setattr(PandapipesBalanceControl, "_get_connectors_demands", record_serial)
+        monkeypatch.setattr(PartitionedProsumers, "get_connectors_demands", record_partitioned)
+        run_timeseries(create_district_heating_energy_system(3, "1d", 6 * 3600), 0, verbose=False, n_jobs=2)
+        run_timeseries(create_district_heating_energy_system(3, "1d", 6 * 3600), 0, verbose=False)
+
+        assert len(demands[True]) == len(demands[False]) > 0
+        for partitioned, serial in zip(demands[True], demands[False]):
+            assert np.allclose(partitioned, serial, equal_nan=True)
+
+    def test_pipelined(self, caplog):
+        def run(pipeline_tol=None):
+            energy_system = create_district_heating_energy_system(3, "1d", 6 * 3600)
+            for prosumer in energy_system.prosumer.values():
+                set_result_policy(prosumer, ResultPolicy(resolution_s=12 * 3600, aggregation="sum"))
+            with caplog.at_level(logging.INFO, logger=run_time_series_energy_system.__name__):
+                caplog.clear()
+                if pipeline_tol is None:
+                    run_timeseries(energy_system, 0, verbose=False)
+                else:
+                    run_timeseries(energy_system, 0, verbose=False, n_jobs=2, pipeline=True,
+                                   pipeline_tol=pipeline_tol)
+            return energy_system, [int(n) for n in re.findall(r"(\d+) speculations accepted, (\d+) rolled back",
+                                                               caplog.text)[0]] if pipeline_tol is not None else None
+
+        reference, _ = run()
+        # The consumers are supplied slightly above their required feed temperature, the speculations are rolled
+        # back and the time steps run again from the restored state, with the results of the run without pipelining
+        energy_system, (accepted, rolled_back) = run(pipeline_tol=0)
+        assert accepted == 0 and rolled_back > 0
+        for name, prosumer in reference.prosumer.items():
+            for element, values in _results(prosumer).items():
+                assert np.allclose(_results(energy_system.prosumer[name])[element], values, equal_nan=True)
+
+        # The speculations of the worker with only consumer prosumers are used
+        energy_system, (accepted, rolled_back) = run(pipeline_tol=.05)
+        assert accepted > 0
+        for name, prosumer in reference.prosumer.items():
+            for element, values in _results(prosumer).items():
+                assert np.allclose(_results(energy_system.prosumer[name])[element], values, rtol=.05, atol=.05,
+                                   equal_nan=True)
+
+    def test_energy_system_controller(self):
+        energy_system = create_district_heating_energy_system(2, "1d", 6 * 3600)
+        energy_system.controller.loc[0, ['object', 'in_service', 'order', 'level']] = [None, True, 0, 0]
+        with pytest.raises(ValueError):
+            PartitionedProsumers(energy_system, get_prosumer_clusters(energy_system), 2)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from pandaprosumer.energy_system.timeseries.run_time_series_energy_system import run_timeseries, \
+    get_prosumer_clusters
+from pandaprosumer.mapping import GenericEnergySystemMapping
+from pandaprosumer.run_time_series import run_timeseries as run_timeseries_prosumer
+
+from tests.fixtures.topologies import create_energy_system_of_prosumers, create_hp_shs_demand_prosumer
+
+
+def _results(prosumer):
+    return {row.element: row.data_source.df.values for _, row in prosumer.time_series.iterrows()}
+
+
+class TestEnergySystemProsumerOnly:
+    """
+    Tests the runs of energy systems without net
+    """
+
+    def test_same_results_as_prosumers(self):
+        energy_system = create_energy_system_of_prosumers("hp_shs_dmd", 2, "1d", 6 * 3600)
+        run_timeseries(energy_system, 0, verbose=False)
+
+        for name, prosumer in energy_system.prosumer.items():
+            reference = create_hp_shs_demand_prosumer("1d", 6 * 3600, seed=int(name[-1]), name=name)
+            run_timeseries_prosumer(reference, 0, verbose=False)
+            results, reference_results = _results(prosumer), _results(reference)
+            assert results.keys() == reference_results.keys()
+            for element, values in reference_results.items():
+                assert np.allclose(results[element], values, equal_nan=True)
+
+    def test_clusters(self):
+        energy_system = create_energy_system_of_prosumers("hp_shs_dmd", 3, "1d", 6 * 3600)
+        assert sorted(map(sorted, get_prosumer_clusters(energy_system))) == \
+            [["hp_shs_dmd_0"], ["hp_shs_dmd_1"], ["hp_shs_dmd_2"]]
+
+        prosumer_0, prosumer_2 = energy_system.prosumer["hp_shs_dmd_0"], energy_system.prosumer["hp_shs_dmd_2"]
+        GenericEnergySystemMapping(prosumer_0, initiator_id=0, initiator_column="qdemand_kw",
+                                   responder_net=prosumer_2, responder_id=3, responder_column="q_demand_kw", order=1)
+        assert sorted(map(sorted, get_prosumer_clusters(energy_system))) == \
+            [["hp_shs_dmd_0", "hp_shs_dmd_2"], ["hp_shs_dmd_1"]]
+
+    def test_parallel_clusters(self):
+        energy_system = create_energy_system_of_prosumers("hp_shs_dmd", 2, "1d", 6 * 3600)
+        run_timeseries(energy_system, 0, verbose=False, n_jobs=2)
+
+        reference = create_energy_system_of_prosumers("hp_shs_dmd", 2, "1d", 6 * 3600)
+        run_timeseries(reference, 0, verbose=False)
+        for name, prosumer in reference.prosumer.items():
+            results = _results(energy_system.prosumer[name])
+            for element, values in _results(prosumer).items():
+                assert np.allclose(results[element], values, equal_nan=True)
@@ -0,0 +1,105 @@
+import io
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from pandaprosumer import *
+from pandaprosumer.file_io import BINARY_FORMAT_VERSION
+from pandaprosumer.library.fluids import get_fluid
+
+from tests.fixtures.prosumers import create_prosumer_with_all_components, assert_same_prosumer, run_copy, \
+    assert_same_results
+from tests.fixtures.topologies import TOPOLOGIES
+
+
+def _round_trip(prosumers):
+    buffer = io.BytesIO()
+    to_binary(prosumers, buffer)
+    buffer.seek(0)
+    return from_binary(buffer)
+
+
+class TestFileIO:
+    """
+    Tests the binary save and load of prosumers
+    """
+
+    def test_round_trip_all_components(self, tmp_path):
+        prosumer = create_prosumer_with_all_components()
+        to_binary(prosumer, tmp_path / "prosumer.bin")
+        loaded = from_binary(tmp_path / "prosumer.bin")
+        assert_same_prosumer(prosumer, loaded)
+
+        # The mappings refer to the loaded prosumer, the library fluids to the fluid registry
+        assert all(mapping.responder_net is loaded for mapping in loaded.mapping.object)
+        hp_controller = loaded.controller.object.at[1]
+        assert hp_controller.evap_fluid is get_fluid("air")
+        assert loaded.fluid is not get_fluid("water")
+        assert loaded.fluid.all_properties["density"] is get_fluid("water").all_properties["density"]
+
+    def test_shared_objects(self):
+        prosumers = [TOPOLOGIES["hp_shs_dmd"]("1d", 3600, seed=i, name="hp_shs_dmd_%s" % i) for i in range(2)]
+        shared_profile = prosumers[0].controller.object.at[0].df_data
+        prosumers[1].controller.object.at[0].df_data = shared_profile
+
+        loaded = _round_trip({prosumer.name: prosumer for prosumer in prosumers})
+        assert list(loaded) == ["hp_shs_dmd_0", "hp_shs_dmd_1"]
+        assert loaded["hp_shs_dmd_0"].controller.object.at[0].df_data is \
+            loaded["hp_shs_dmd_1"].controller.object.at[0].df_data
+        time_indexes = [ctrl.time_index for prosumer in loaded.values() for ctrl in prosumer.controller.object]
+        assert all(time_index is time_indexes[0] for time_index in time_indexes)
+
+    def test_same_results(self):
+        for topology, create_prosumer in TOPOLOGIES.items():
+            prosumer = create_prosumer("1d", 3600, name=topology)
+            loaded = _round_trip([prosumer])[0]
+            assert_same_prosumer(prosumer, loaded)
+            reference = run_copy(prosumer)
+            assert_same_results(reference, run_copy(loaded))
+
+            # The results of a run are saved
+            assert_same_prosumer(reference, _round_trip(reference))
+
+    def test_restricted_load(self):
+        class Malicious:
+            def __reduce__(self):
+                return os.system, ("echo unsafe",)
+
+        buffer = io.BytesIO()
+        pickle.dump({"format_version": BINARY_FORMAT_VERSION}, buffer)
+        pickle.dump(Malicious(), buffer)
+        buffer.seek(0)
+        with pytest.raises(pickle.UnpicklingError, match="is not allowed"):
+            from_binary(buffer)
+
+    def test_attribute_of_allowed_class(self):
+        # The global DataFrame.__init__.__builtins__.get would give eval, only exact class names are allowed
+        buffer = io.BytesIO()
+        pickle.dump({"format_version": BINARY_FORMAT_VERSION}, buffer)
+        buffer.write(b"\x80\x04cpandas.core.frame\nDataFrame.__init__.__builtins__.get\n(Veval\ntR(V'unsafe'\ntR.")
+        buffer.seek(0)
+        with pytest.raises(pickle.UnpicklingError, match="is not allowed"):
+            from_binary(buffer)
+
+    def test_modified_fluid(self):
+        prosumer = create_empty_prosumer_container()
+        # The fluid is not a library fluid anymore, it is saved with its interpolated properties
+        prosumer.fluid.add_property("viscosity_copy", prosumer.fluid.all_properties["viscosity"])
+        loaded = _round_trip(prosumer)
+        assert np.allclose(loaded.fluid.get_property("viscosity_copy", 300.),
+                           prosumer.fluid.get_property("viscosity", 300.))
+        # The interpolations are rebuilt from their values, their methods are not referenced by the file
+        buffer = io.BytesIO()
+        to_binary(prosumer, buffer)
+        assert b"interp1d" not in buffer.getvalue()
+
+    def test_format_checked_before_loading(self):
+        buffer = io.BytesIO()
+        pickle.dump({"format_version": 1}, buffer)
+        # The content is not loaded if the format does not match
+        buffer.write(b"not a pickle")
+        buffer.seek(0)
+        with pytest.raises(ValueError, match="format version"):
+            from_binary(buffer)
@@ -0,0 +1,35 @@
+import pandapipes
+import pytest
+
+from pandaprosumer import create_empty_prosumer_container
+from pandaprosumer.library.fluids import get_fluid, clear_fluid_registry
+
+
+class TestFluidRegistry:
+    """
+    Tests the process-wide registry of the library fluids
+    """
+
+    def test_shared_fluid(self, monkeypatch):
+        clear_fluid_registry()
+        calls = []
+        call_lib = pandapipes.call_lib
+        monkeypatch.setattr("pandaprosumer.library.fluids.call_lib", lambda name: calls.append(name) or call_lib(name))
+
+        fluid = get_fluid("air")
+        assert get_fluid("air") is fluid
+        assert calls == ["air"]
+        assert fluid.get_heat_capacity(293) == pytest.approx(1007)
+        clear_fluid_registry()
+
+    def test_prosumer_fluid(self):
+        prosumer = create_empty_prosumer_container()
+        other_prosumer = create_empty_prosumer_container()
+        assert prosumer.fluid is not get_fluid("water")
+        assert prosumer.fluid.get_density(293) == pytest.approx(998.21)
+        assert prosumer.fluid.all_properties["density"] is get_fluid("water").all_properties["density"]
+
+        # Adding a property to the fluid of a prosumer does not change the shared fluid
+        prosumer.fluid.add_property("thermal_conductivity_1_bar", pandapipes.FluidPropertyConstant(0.6))
+        assert "thermal_conductivity_1_bar" not in get_fluid("water").all_properties
+        assert "thermal_conductivity_1_bar" not in other_prosumer.fluid.all_properties
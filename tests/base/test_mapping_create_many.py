@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from pandaprosumer import *
+from pandaprosumer.mapping import GenericMapping, FluidMixMapping, FluidMixEnergySystemMapping
+from tests.data_sources.define_period import define_and_get_period_and_data_source
+
+
+def _create_prosumer(n):
+    prosumer = create_empty_prosumer_container()
+    define_and_get_period_and_data_source(prosumer)
+    create_controlled_heat_pumps(prosumer, n, order=0)
+    create_controlled_heat_demands(prosumer, n, order=1)
+    return prosumer
+
+
+class TestMappingCreateMany:
+    """
+    Tests the creation of many mappings at once
+    """
+
+    def test_same_mappings_as_single_creation(self):
+        reference = _create_prosumer(3)
+        for i in range(3):
+            GenericMapping(reference, i, "q_cond_kw", 3 + i, "q_demand_kw", order=i)
+            FluidMixMapping(reference, i, 3 + i, order=0)
+            GenericMapping(reference, i, ["q_cond_kw", "t_cond_c"], 3 + i, ["q_demand_kw", "t_feed_demand_c"],
+                           order=1)
+
+        prosumer = _create_prosumer(3)
+        generic = GenericMapping.create_many(prosumer, [0, 1, 2], [3, 4, 5], initiator_column="q_cond_kw",
+                                             responder_column="q_demand_kw", order=[0, 1, 2], index=[0, 3, 6])
+        FluidMixMapping.create_many(prosumer, [0, 1, 2], [3, 4, 5], order=0, index=[1, 4, 7])
+        GenericMapping.create_many(prosumer, [0, 1, 2], [3, 4, 5], initiator_column=[["q_cond_kw", "t_cond_c"]] * 3,
+                                   responder_column=[["q_demand_kw", "t_feed_demand_c"]] * 3, order=1,
+                                   index=[2, 5, 8])
+        assert [mapping.index for mapping in generic] == [0, 3, 6]
+
+        prosumer.mapping = prosumer.mapping.sort_index()
+        pd.testing.assert_frame_equal(prosumer.mapping.drop(columns="object"),
+                                      reference.mapping.drop(columns="object"))
+        for mapping, reference_mapping in zip(prosumer.mapping.object, reference.mapping.object):
+            assert type(mapping) is type(reference_mapping)
+            assert mapping.responder_net is prosumer
+            attributes = {k: v for k, v in vars(mapping).items() if k != "responder_net"}
+            assert attributes == {k: v for k, v in vars(reference_mapping).items() if k != "responder_net"}
+
+    def test_energy_system_mappings(self):
+        container = _create_prosumer(1)
+        responders = [_create_prosumer(1) for _ in range(2)]
+        mappings = FluidMixEnergySystemMapping.create_many(container, [0, 0], [1, 1], responder_net=responders,
+                                                           order=[0, 1])
+        assert all(mapping.responder_net is responder for mapping, responder in zip(mappings, responders))
+        assert container.mapping.order.tolist() == [0, 1]
+
+    def test_invalid_length(self):
+        prosumer = _create_prosumer(2)
+        with pytest.raises(ValueError):
+            GenericMapping.create_many(prosumer, [0, 1], [2, 3], initiator_column="q_cond_kw",
+                                       responder_column="q_demand_kw", order=[0, 1, 2])
+        assert len(prosumer.mapping) == 0
@@ -0,0 +1,100 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandaprosumer import create_period
+from pandaprosumer.run_time_series import run_timeseries_periods, set_period
+
+from tests.fixtures.prosumers import run_copy, get_results
+from tests.fixtures.topologies import TOPOLOGIES, START
+
+
+def _create_prosumer_with_days(topology):
+    """
+    Prosumer with profiles for a year, and the periods 1: first day, 2: second day, 3: first two days
+    """
+    prosumer = TOPOLOGIES[topology]("1y", 3600)
+    day = pd.Timedelta(days=1)
+    for start, duration in [(pd.Timestamp(START), day), (pd.Timestamp(START) + day, day),
+                            (pd.Timestamp(START), 2 * day)]:
+        create_period(prosumer, 3600, str(start), start + duration - pd.Timedelta("00:00:01"), 'utc')
+    return prosumer
+
+
+class TestMultiPeriod:
+    """
+    Tests the run of several periods without rebuilding the controllers
+    """
+
+    @pytest.mark.parametrize("topology", ["hp_shs_dmd", "chp_bhp_hs_dmd"])
+    def test_consecutive_periods(self, topology):
+        prosumer = _create_prosumer_with_days(topology)
+        controllers = list(prosumer.controller.object)
+        run_timeseries_periods(prosumer, [1, 2], verbose=False)
+        assert list(prosumer.controller.object) == controllers
+        assert len(prosumer.controller.object.at[0].time_index) == 24
+
+        # The first period is the same as the first day of a new prosumer
+        reference = run_copy(TOPOLOGIES[topology]("1d", 3600))
+        for df, reference_df in zip(get_results(prosumer, 1), get_results(reference, 0)):
+            assert np.allclose(df.values, reference_df.values, equal_nan=True)
+
+        # The state is carried from a period to the next one: two consecutive days are the same as one run
+        two_days = _create_prosumer_with_days(topology)
+        run_timeseries_periods(two_days, [3], verbose=False)
+        for df_1, df_2, df in zip(get_results(prosumer, 1), get_results(prosumer, 2), get_results(two_days, 3)):
+            assert np.allclose(pd.concat([df_1, df_2]).values, df.values, equal_nan=True)
+            assert pd.concat([df_1, df_2]).index.equals(df.index)
+
+    def test_set_period(self):
+        prosumer = _create_prosumer_with_days("2hp_dmd")
+        run_timeseries_periods(prosumer, [1], verbose=False)
+        results = get_results(prosumer, 1)[0].copy()
+
+        set_period(prosumer, 2)
+        for ctrl in prosumer.controller.object:
+            assert ctrl.period_index == 2
+            assert ctrl.obj.period_index == 2
+            assert ctrl.time_index[0] == pd.Timestamp(START, tz='utc') + pd.Timedelta(days=1)
+            assert ctrl.res.shape[1] == 24 and not ctrl.res.any()
+        # The results of the previous period are kept
+        assert get_results(prosumer, 1)[0].equals(results)
+
+    def test_set_period_shared_data(self):
+        prosumer = _create_prosumer_with_days("2hp_dmd")
+        ctrl, other_ctrl = prosumer.controller.object.at[1], prosumer.controller.object.at[2]
+        # Two controllers of the same element sharing their data object
+        other_ctrl.obj = ctrl.obj
+        ctrl.set_period(prosumer, 2)
+        assert ctrl.obj.period_index == 2 and ctrl.period_index == 2
+        assert other_ctrl.obj.period_index == 0 and other_ctrl.period_index == 0
+        assert other_ctrl.obj is not ctrl.obj
+
+    def test_restore_initial_state(self):
+        prosumer = _create_prosumer_with_days("hp_shs_dmd")
+        run_timeseries_periods(prosumer, [1, 2], verbose=False, restore_initial_state=True)
+
+        # Each period is the same as a run of the period alone, from the initial state of the storage
+        for period_index in [1, 2]:
+            reference = _create_prosumer_with_days("hp_shs_dmd")
+            run_timeseries_periods(reference, [period_index], verbose=False)
+            for df, reference_df in zip(get_results(prosumer, period_index), get_results(reference, period_index)):
+                assert np.allclose(df.values, reference_df.values, equal_nan=True)
+        assert prosumer.controller.object.at[2].period_index == 2
+
+    def test_controller_order_reused(self, monkeypatch):
+        calls = []
+
+        def get_controller_order(*args, **kwargs):
+            calls.append(args)
+            return controller_order_fct(*args, **kwargs)
+
+        # The module is shadowed by the run_control function in the pandaprosumer namespace
+        run_control_module = importlib.import_module("pandaprosumer.run_control")
+        controller_order_fct = run_control_module.get_controller_order
+        monkeypatch.setattr(run_control_module, "get_controller_order", get_controller_order)
+        prosumer = _create_prosumer_with_days("2hp_dmd")
+        run_timeseries_periods(prosumer, [1, 2, 3], verbose=False)
+        assert len(calls) == 1
@@ -0,0 +1,123 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandaprosumer import *
+from pandaprosumer.controller.result_policy import BoundResultPolicy
+from pandaprosumer.run_time_series import run_timeseries
+
+from tests.fixtures.prosumers import run_copy, get_results
+from tests.fixtures.topologies import TOPOLOGIES
+
+
+@pytest.fixture(scope="module")
+def full_results():
+    prosumer = TOPOLOGIES["2hp_dmd"]("1d", 600)
+    return prosumer, get_results(run_copy(prosumer))
+
+
+def _run(prosumer, policy):
+    prosumer = copy.deepcopy(prosumer)
+    set_result_policy(prosumer, policy)
+    run_timeseries(prosumer, 0, verbose=False)
+    return [data_source.df for data_source in prosumer.time_series.data_source]
+
+
+class TestResultPolicy:
+    """
+    Tests the reduction of the stored results of the controllers
+    """
+
+    @pytest.mark.parametrize("aggregation", ["mean", "sum", "max", "min", "last"])
+    def test_aggregation(self, full_results, aggregation):
+        prosumer, results = full_results
+        for df, full_df in zip(_run(prosumer, ResultPolicy(3600, aggregation)), results):
+            expected = getattr(full_df.resample("3600s"), aggregation)()
+            assert df.shape == (24, full_df.shape[1])
+            assert df.index.equals(expected.index)
+            assert np.allclose(df.values, expected.values)
+
+    @pytest.mark.parametrize("aggregation", ["mean", "sum", "max"])
+    def test_finalized_again(self, aggregation):
+        # The storage is finalized several times in some time steps, each time step is aggregated once
+        prosumer = TOPOLOGIES["hp_shs_dmd"]("1d", 3600)
+        results = get_results(run_copy(prosumer))
+        for df, full_df in zip(_run(prosumer, ResultPolicy(3 * 3600, aggregation)), results):
+            assert np.allclose(df.values, getattr(full_df.resample("10800s"), aggregation)().values)
+
+    def test_rerun_and_clone(self, full_results):
+        prosumer = copy.deepcopy(full_results[0])
+        set_result_policy(prosumer, ResultPolicy(3600, {"q_cond_kw": "max", "p_comp_kw": "sum"}))
+        clone = prosumer.clone()
+        run_timeseries(prosumer, 0, verbose=False)
+        results = [df.copy() for df in get_results(prosumer)]
+
+        # The results of a new run do not aggregate the results of the previous run
+        run_timeseries(prosumer, 0, verbose=False)
+        for df, first_df in zip(get_results(prosumer)[len(results):], results):
+            assert np.allclose(df.values, first_df.values)
+
+        # A clone without results starts from empty aggregations, not from zeros
+        assert np.isnan(clone.controller.object.at[1].res[..., list(clone.controller.object.at[1].res_columns)
+                                                                .index("q_cond_kw")]).all()
+        run_timeseries(clone, 0, verbose=False)
+        for df, first_df in zip(get_results(clone), results):
+            assert np.allclose(df.values, first_df.values)
+
+    @pytest.mark.parametrize("aggregation", ["mean", "sum", "max", "min", "last"])
+    def test_nan_skipped(self, aggregation):
+        # As pandas resample, all the aggregations skip the NaN results
+        time_index = pd.date_range("2020-01-01", periods=6, freq="3600s", tz="utc")
+        values = np.array([1., np.nan, 3., np.nan, np.nan, np.nan])
+        bound_policy = ResultPolicy(3 * 3600, aggregation).bind(["x"], time_index, 3600)
+        assert isinstance(bound_policy, BoundResultPolicy)
+        res = bound_policy.allocate(1)
+        for time_step_idx, value in enumerate(values):
+            bound_policy.write(res, time_step_idx, np.array([[value]]))
+        bound_policy.flush(res)
+        expected = getattr(pd.Series(values, index=time_index).resample("10800s"), aggregation)()
+        assert np.allclose(res[0, :, 0], expected.values, equal_nan=True)
+
+    def test_columns(self, full_results):
+        prosumer, results = full_results
+        policy = ResultPolicy(7 * 3600, {"q_cond_kw": "max"}, columns=["q_cond_kw", "p_comp_kw"])
+        heat_pump_index = prosumer.controller.index[[type(ctrl).__name__ == "HeatPumpController"
+                                                     for ctrl in prosumer.controller.object]][0]
+        prosumer = copy.deepcopy(prosumer)
+        set_result_policy(prosumer, policy, heat_pump_index)
+        run_timeseries(prosumer, 0, verbose=False)
+
+        df = prosumer.time_series.data_source.at[0].df
+        full_df = results[0]
+        assert list(df.columns) == ["q_cond_kw", "p_comp_kw"]
+        # The last stored time step aggregates the 3 last hours
+        assert len(df) == 4
+        assert np.allclose(df.q_cond_kw.values, full_df.q_cond_kw.resample("25200s").max().values)
+        assert np.allclose(df.p_comp_kw.values, full_df.p_comp_kw.resample("25200s").mean().values)
+        # The other controllers store all their results
+        assert all(data_source.df.shape == full_df.shape for data_source, full_df in
+                   zip(prosumer.time_series.data_source[1:], results[1:]))
+
+    def test_set_period_keeps_policy(self, full_results):
+        prosumer = copy.deepcopy(full_results[0])
+        set_result_policy(prosumer, ResultPolicy(3600, columns=["q_cond_kw"]), 1)
+        ctrl = prosumer.controller.object.at[1]
+        assert ctrl.res.shape == (1, 24, 1)
+        ctrl.set_period(prosumer, 0)
+        assert ctrl.res.shape == (1, 24, 1)
+        ctrl.set_result_policy(None)
+        assert ctrl.res.shape == (1, 144, len(ctrl.result_columns))
+
+    def test_invalid_policies(self, full_results):
+        prosumer = copy.deepcopy(full_results[0])
+        with pytest.raises(ValueError):
+            ResultPolicy(3600, "median")
+        with pytest.raises(ValueError):
+            set_result_policy(prosumer, ResultPolicy(900))
+        with pytest.raises(ValueError):
+            set_result_policy(prosumer, ResultPolicy(3600, columns=["unknown_column"]))
+        set_result_policy(prosumer, ResultPolicy(3600))
+        with pytest.raises(ValueError):
+            run_timeseries(prosumer, 0, n_windows=2)
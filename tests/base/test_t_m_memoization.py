@@ -0,0 +1,61 @@
+import numpy as np
+
+from pandaprosumer.controller.base import BasicProsumerController
+from pandaprosumer.energy_system.timeseries.run_time_series_energy_system import run_timeseries
+
+from tests.fixtures.district_heating import create_demander_prosumer, create_district_heating_energy_system
+
+
+def _results(prosumer):
+    return {row.element: row.data_source.df.values for _, row in prosumer.time_series.iterrows()}
+
+
+def _prepare_first_time_step(prosumer):
+    const_profile, heat_exchanger, heat_demand = prosumer.controller.object.values
+    time = const_profile.time_index[0]
+    for ctrl in (const_profile, heat_exchanger, heat_demand):
+        ctrl.time_step(prosumer, time)
+    const_profile.control_step(prosumer)
+    return heat_exchanger, heat_demand
+
+
+class TestTMMemoization:
+    """
+    Tests the memoization of the t_m methods of the prosumer controllers
+    """
+
+    def test_reuse_and_invalidation(self, monkeypatch):
+        prosumer = create_demander_prosumer("1d", 3600)
+        heat_exchanger, heat_demand = _prepare_first_time_step(prosumer)
+        calls = []
+        calculate = heat_exchanger.calculate_heat_exchanger
+
+        def counted_calculate(*args, **kwargs):
+            calls.append(args)
+            return calculate(*args, **kwargs)
+
+        monkeypatch.setattr(heat_exchanger, "calculate_heat_exchanger", counted_calculate)
+        t_m = heat_exchanger.t_m_to_receive(prosumer)
+        assert heat_exchanger.t_m_to_receive(prosumer) == t_m
+        assert len(calls) == 1
+
+        # A change in the state of a responder invalidates the memoized results of its initiators
+        heat_demand.inputs[0, heat_demand.input_columns.index("q_demand_kw")] *= 2
+        t_m_changed = heat_exchanger.t_m_to_receive(prosumer)
+        assert len(calls) == 2
+        assert t_m_changed[2] > t_m[2]
+
+        monkeypatch.setattr(BasicProsumerController, "t_m_memoization", False)
+        assert heat_exchanger.t_m_to_receive(prosumer) == t_m_changed
+
+    def test_same_results_without_memoization(self, monkeypatch):
+        energy_system = create_district_heating_energy_system(2, "1d", 6 * 3600)
+        run_timeseries(energy_system, 0, verbose=False)
+
+        monkeypatch.setattr(BasicProsumerController, "t_m_memoization", False)
+        reference = create_district_heating_energy_system(2, "1d", 6 * 3600)
+        run_timeseries(reference, 0, verbose=False)
+        for name, prosumer in reference.prosumer.items():
+            results = _results(energy_system.prosumer[name])
+            for element, values in _results(prosumer).items():
+                assert np.array_equal(results[element], values, equal_nan=True)
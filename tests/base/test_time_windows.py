@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from pandaprosumer.run_time_series import _same_window_results
+
+from tests.fixtures.prosumers import run_copy, max_result_difference
+from tests.fixtures.topologies import TOPOLOGIES
+
+
+def _run(topology, **kwargs):
+    return run_copy(TOPOLOGIES[topology]("1d", 3600), **kwargs)
+
+
+class TestTimeWindows:
+    """
+    Tests the run of a period split in time windows
+    """
+
+    def test_stateless_prosumer(self, caplog):
+        reference = _run("2hp_dmd")
+        for max_matching_passes in [None, 0]:
+            prosumer = _run("2hp_dmd", n_windows=5, max_matching_passes=max_matching_passes)
+            assert max_result_difference(reference, prosumer) == 0
+            assert reference.time_series.drop(columns="data_source").equals(
+                prosumer.time_series.drop(columns="data_source"))
+        # Without warm-up nor matching, the results are exact only for a prosumer without state
+        assert "without warm-up steps nor matching passes" in caplog.text
+
+    @pytest.mark.parametrize("topology", ["hp_shs_dmd", "chp_bhp_hs_dmd"])
+    def test_matching_passes(self, topology):
+        reference = _run(topology)
+        # Without matching, the windows start from the initial state of the storage
+        assert max_result_difference(reference, _run(topology, n_windows=4, max_matching_passes=0)) > 1
+        # By default, the windows are matched until the results are the ones of a sequential run
+        prosumer = _run(topology, n_windows=4)
+        assert max_result_difference(reference, prosumer) < 1e-9
+
+        # The controllers get the state at the end of the period
+        for ctrl, other_ctrl in zip(reference.controller.object, prosumer.controller.object):
+            assert ctrl.time == other_ctrl.time
+            assert np.array_equal(getattr(ctrl, "_soc", np.nan), getattr(other_ctrl, "_soc", np.nan),
+                                  equal_nan=True)
+
+    def test_same_window_state(self):
+        prosumer = _run("hp_shs_dmd")
+        other = prosumer.clone(share_results=True)
+        window = np.arange(len(prosumer.controller.object.at[0].time_index))
+        assert _same_window_results(prosumer, other, window)
+        # The windows are different if the carried state is different, even with the same results
+        storage = other.controller.object.at[2]
+        storage._layer_temps_c = list(np.array(storage._layer_temps_c) - 1)
+        assert not _same_window_results(prosumer, other, window)
+
+    def test_processes(self):
+        reference = _run("chp_bhp_hs_dmd")
+        prosumer = _run("chp_bhp_hs_dmd", n_windows=3, max_matching_passes=2, n_jobs=2)
+        assert max_result_difference(reference, prosumer) < 1e-9
+
+    def test_invalid_arguments(self, tmp_path):
+        prosumer = TOPOLOGIES["2hp_dmd"]("1d", 3600)
+        with pytest.raises(ValueError):
+            run_copy(prosumer, n_windows=2, checkpoint_file=tmp_path / "checkpoint.bin")
+        with pytest.raises(ValueError):
+            run_copy(prosumer, n_windows=2, warm_up_steps=-1)
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import List
+
+import pytest
+
+from pandaprosumer import set_validation_mode, get_validation_mode, validation_mode
+from pandaprosumer.controller.data_model import HeatPumpControllerData
+from pandaprosumer.element.element_toolbox import enforce_types
+
+
+def _create_data_class():
+    @enforce_types
+    @dataclass
+    class Data:
+        element_index: List[int]
+        element_name: str = 'element'
+        period_index: int = None
+
+    return Data
+
+
+class TestValidationMode:
+    """
+    Tests the modes of the type checks of the data classes
+    """
+
+    def test_strict(self):
+        assert get_validation_mode() == "strict"
+        Data = _create_data_class()
+        assert Data([0], period_index=None).element_index == [0]
+        with pytest.raises(TypeError):
+            Data(0)
+        with pytest.raises(TypeError):
+            Data([0], element_name=1)
+        with pytest.raises(TypeError):
+            HeatPumpControllerData(element_index=[0], period_index="0")
+
+    def test_once(self):
+        Data = _create_data_class()
+        with validation_mode("once"):
+            with pytest.raises(TypeError):
+                Data(0)
+            Data([0])
+            # Only the first valid construction of the class is checked
+            assert Data(0).element_index == 0
+            with pytest.raises(TypeError):
+                _create_data_class()(0)
+        assert get_validation_mode() == "strict"
+
+    def test_off(self):
+        with validation_mode("off"):
+            assert HeatPumpControllerData(element_index=0).element_index == 0
+        with pytest.raises(TypeError):
+            HeatPumpControllerData(element_index=0)
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            set_validation_mode("lazy")
+        assert get_validation_mode() == "strict"
@@ -0,0 +1,138 @@
+"""
+Helpers to measure, record and compare the benchmarks.
+
+The scale of the benchmarks is configured with environment variables:
+
+- PANDAPROSUMER_BENCHMARK: "full" to run the complete grid (1 day/1 year, 1 minute/1 hour, 1/10/100 prosumers),
+  otherwise only a small smoke scale is run so the benchmarks can be part of the regular test suite
+- PANDAPROSUMER_BENCHMARK_DURATIONS, PANDAPROSUMER_BENCHMARK_RESOLUTIONS, PANDAPROSUMER_BENCHMARK_PROSUMERS:
+  comma separated lists overriding the grid (e.g. "1d", "60,3600", "1,10")
+- PANDAPROSUMER_BENCHMARK_NETWORK_RESOLUTIONS, PANDAPROSUMER_BENCHMARK_CONSUMERS: same for the district heating
+  benchmarks, which run one day with n heat consumers
+- PANDAPROSUMER_BENCHMARK_MAPPINGS: same for the numbers of mappings of the wiring benchmark
+- PANDAPROSUMER_BENCHMARK_MEMORY: "1" or "0" to enable or disable the measure of the peak memory, which
+  requires a second run with tracemalloc (enabled by default only for the full grid)
+- PANDAPROSUMER_BENCHMARK_OUTPUT: path of a JSON file where the results are written
+- PANDAPROSUMER_BENCHMARK_BASELINE: path of a JSON file written by a previous run. A benchmark fails if its
+  time per step is more than PANDAPROSUMER_BENCHMARK_TOLERANCE (default 1.5) times the baseline one
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter
+
+import pytest
+
+FULL_GRID = {"durations": ["1d", "1y"], "resolutions": [60, 3600], "prosumers": [1, 10, 100],
+             "network_resolutions": [3600], "consumers": [1, 10, 100, 500], "mappings": [100, 1000, 5000],
+             "memory": True}
+SMOKE_GRID = {"durations": ["1d"], "resolutions": [3600], "prosumers": [1],
+              "network_resolutions": [6 * 3600], "consumers": [1, 2], "mappings": [10], "memory": False}
+
+
+def get_grid():
+    """
+    :return: The durations, resolutions and numbers of prosumers to benchmark
+    """
+    grid = dict(FULL_GRID if os.environ.get("PANDAPROSUMER_BENCHMARK", "") == "full" else SMOKE_GRID)
+    for key, cast in [("durations", str), ("resolutions", int), ("prosumers", int),
+                      ("network_resolutions", int), ("consumers", int), ("mappings", int)]:
+        env = os.environ.get("PANDAPROSUMER_BENCHMARK_%s" % key.upper())
+        if env:
+            grid[key] = [cast(v) for v in env.split(",")]
+    if os.environ.get("PANDAPROSUMER_BENCHMARK_MEMORY"):
+        grid["memory"] = os.environ["PANDAPROSUMER_BENCHMARK_MEMORY"] == "1"
+    return grid
+
+
+def get_cases(grid, *params):
+    """
+    :param grid: The grid returned by get_grid
+    :param params: Tuples of parameters (e.g. (topology,)) combined with every point of the grid
+    :return: The list of pytest parameters
+    """
+    return [pytest.param(*p, d, r, n, id="-".join(map(str, [*p, d, r, n])))
+            for p in params
+            for d in grid["durations"]
+            for r in grid["resolutions"]
+            for n in grid["prosumers"]]
+
+
+def measure_time(fct, *args, **kwargs):
+    """
+    :return: The wall time of the function call [s]
+    """
+    start_s = perf_counter()
+    fct(*args, **kwargs)
+    return perf_counter() - start_s
+
+
+def measure_peak_memory(fct, *args, **kwargs):
+    """
+    Measure the peak of memory allocated by python during the function call.
+    tracemalloc slows down the execution, so the time and the memory should be measured in separate runs.
+
+    :return: The peak of allocated memory [MB]
+    """
+    tracemalloc.start()
+    try:
+        fct(*args, **kwargs)
+        _, peak_b = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_b / 1e6
+
+
+def measure_import_time(module="pandaprosumer", repeat=3):
+    """
+    Measure the import time of a module in fresh interpreters.
+
+    :return: The minimal import time over the repetitions [s]
+    """
+    code = "import time; t = time.perf_counter(); import %s; print(time.perf_counter() - t)" % module
+    times = [float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                  check=True).stdout.strip().splitlines()[-1]) for _ in range(repeat)]
+    return min(times)
+
+
+class BenchmarkRecorder:
+    """
+    Collect the results of the benchmarks, write them to PANDAPROSUMER_BENCHMARK_OUTPUT and compare them to
+    PANDAPROSUMER_BENCHMARK_BASELINE
+    """
+
+    def __init__(self):
+        self.results = dict()
+        self.output_path = os.environ.get("PANDAPROSUMER_BENCHMARK_OUTPUT")
+        self.tolerance = float(os.environ.get("PANDAPROSUMER_BENCHMARK_TOLERANCE", 1.5))
+        self.baseline = dict()
+        baseline_path = os.environ.get("PANDAPROSUMER_BENCHMARK_BASELINE")
+        if baseline_path:
+            with open(baseline_path) as f:
+                self.baseline = json.load(f)["results"]
+
+    def record(self, name, **metrics):
+        """
+        Record the metrics of a benchmark and check the time per step against the baseline
+
+        :param name: Unique name of the benchmark
+        :param metrics: The measured values
+        """
+        self.results[name] = metrics
+        reference = self.baseline.get(name, {}).get("time_per_step_s")
+        if reference and "time_per_step_s" in metrics:
+            assert metrics["time_per_step_s"] <= reference * self.tolerance, \
+                "Benchmark '%s' regressed: %.3e s per step instead of %.3e s" % (name, metrics["time_per_step_s"],
+                                                                                reference)
+
+    def save(self):
+        if not self.output_path or not self.results:
+            return
+        with open(self.output_path, "w") as f:
+            json.dump({"machine": platform.node(),
+                       "python": platform.python_version(),
+                       "results": self.results}, f, indent=2)
@@ -0,0 +1,10 @@
+import pytest
+
+from tests.benchmarks.benchmark_tools import BenchmarkRecorder
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder():
+    recorder = BenchmarkRecorder()
+    yield recorder
+    recorder.save()
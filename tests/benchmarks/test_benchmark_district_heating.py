@@ -0,0 +1,57 @@
+import pytest
+
+from pandapower.control import ControllerNotConverged
+from pandaprosumer.energy_system.timeseries.run_time_series_energy_system import run_timeseries
+
+from tests.benchmarks.benchmark_tools import get_grid, measure_time, measure_peak_memory
+from tests.fixtures.district_heating import create_district_heating_energy_system, count_pipeflows
+from tests.fixtures.topologies import get_time_index
+
+GRID = get_grid()
+
+
+def _run(energy_system):
+    try:
+        run_timeseries(energy_system, 0, verbose=False)
+    except ControllerNotConverged:
+        return False
+    return True
+
+
+@pytest.mark.benchmark
+class TestBenchmarkDistrictHeating:
+    """
+    Benchmark the pandapipes coupling layer (PandapipesBalanceControl, PandapipesConnectorController) on
+    synthetic district heating networks with a growing number of heat consumers:
+    number of pipeflow calls, time per step and peak memory allocated during the run
+    """
+
+    @pytest.mark.parametrize("resol_s", GRID["network_resolutions"])
+    @pytest.mark.parametrize("n_consumers", GRID["consumers"])
+    def test_run(self, benchmark_recorder, n_consumers, resol_s):
+        n_steps = len(get_time_index("1d", resol_s)[2])
+
+        energy_systems = []
+        build_s = measure_time(lambda: energy_systems.append(create_district_heating_energy_system(n_consumers,
+                                                                                                   "1d", resol_s)))
+        with count_pipeflows() as counter:
+            converged = []
+            run_s = measure_time(lambda: converged.append(_run(energy_systems[0])))
+
+        peak_mb = measure_peak_memory(_run, create_district_heating_energy_system(n_consumers, "1d", resol_s)) \
+            if GRID["memory"] else None
+
+        if converged[0]:
+            res_consumers = energy_systems[0]["nets"]["hydro"].res_heat_consumer
+            assert len(res_consumers) == n_consumers
+            assert (res_consumers.mdot_from_kg_per_s > 0).all()
+
+        benchmark_recorder.record("district_heating-%s-%s" % (n_consumers, resol_s),
+                                  n_steps=n_steps,
+                                  converged=converged[0],
+                                  build_s=build_s,
+                                  run_s=run_s,
+                                  time_per_step_s=run_s / n_steps,
+                                  pipeflow_calls=counter.count,
+                                  pipeflow_calls_per_step=counter.count / n_steps,
+                                  peak_run_memory_mb=peak_mb)
@@ -0,0 +1,52 @@
+import pytest
+
+from pandaprosumer import *
+from pandaprosumer.mapping import GenericMapping, FluidMixMapping
+
+from tests.benchmarks.benchmark_tools import get_grid, measure_time
+from tests.data_sources.define_period import define_and_get_period_and_data_source
+
+GRID = get_grid()
+
+
+def _create_prosumer(n_pairs):
+    prosumer = create_empty_prosumer_container()
+    define_and_get_period_and_data_source(prosumer)
+    create_controlled_heat_pumps(prosumer, n_pairs, order=0)
+    create_controlled_heat_demands(prosumer, n_pairs, order=1)
+    return prosumer
+
+
+def _wire_one_by_one(prosumer, n_pairs):
+    for i in range(n_pairs):
+        GenericMapping(prosumer, i, "q_cond_kw", n_pairs + i, "q_demand_kw", order=0)
+    for i in range(n_pairs):
+        FluidMixMapping(prosumer, i, n_pairs + i, order=1)
+
+
+def _wire_at_once(prosumer, n_pairs):
+    initiators, responders = list(range(n_pairs)), list(range(n_pairs, 2 * n_pairs))
+    GenericMapping.create_many(prosumer, initiators, responders, initiator_column="q_cond_kw",
+                               responder_column="q_demand_kw", order=0)
+    FluidMixMapping.create_many(prosumer, initiators, responders, order=1)
+
+
+@pytest.mark.benchmark
+class TestBenchmarkMapping:
+    """
+    Benchmark the wiring time of a growing number of mappings, created one by one or with create_many
+    """
+
+    @pytest.mark.parametrize("n_mappings", GRID["mappings"])
+    def test_wiring(self, benchmark_recorder, n_mappings):
+        n_pairs = n_mappings // 2
+        prosumer, reference = _create_prosumer(n_pairs), _create_prosumer(n_pairs)
+        at_once_s = measure_time(_wire_at_once, prosumer, n_pairs)
+        one_by_one_s = measure_time(_wire_one_by_one, reference, n_pairs)
+        assert prosumer.mapping.drop(columns="object").equals(reference.mapping.drop(columns="object"))
+
+        benchmark_recorder.record("mapping-%s" % n_mappings,
+                                  n_mappings=2 * n_pairs,
+                                  one_by_one_s=one_by_one_s,
+                                  at_once_s=at_once_s,
+                                  time_per_mapping_s=at_once_s / (2 * n_pairs))
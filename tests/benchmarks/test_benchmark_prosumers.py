@@ -0,0 +1,68 @@
+import pytest
+
+from pandaprosumer.run_time_series import run_timeseries
+
+from tests.benchmarks.benchmark_tools import get_grid, get_cases, measure_time, measure_peak_memory, \
+    measure_import_time
+from tests.fixtures.topologies import TOPOLOGIES, get_time_index
+
+GRID = get_grid()
+
+
+def _build(topology, duration, resol_s, n_prosumers):
+    return [TOPOLOGIES[topology](duration, resol_s, seed=i, name="%s_%s" % (topology, i))
+            for i in range(n_prosumers)]
+
+
+_WARMED_UP = set()
+
+
+def _warm_up(topology):
+    """
+    Run a small prosumer once so the numba compilation is not accounted in the benchmark
+    """
+    if topology not in _WARMED_UP:
+        _run(_build(topology, "1d", 3600, 1))
+        _WARMED_UP.add(topology)
+
+
+def _run(prosumers):
+    for prosumer in prosumers:
+        run_timeseries(prosumer, 0)
+
+
+@pytest.mark.benchmark
+class TestBenchmarkProsumers:
+    """
+    Benchmark the canonical topologies of tests/integrations at scale:
+    build time, time per step (for all the prosumers), peak memory allocated during the run and import time
+    """
+
+    @pytest.mark.parametrize("topology, duration, resol_s, n_prosumers", get_cases(GRID, *[(t,) for t in TOPOLOGIES]))
+    def test_run(self, benchmark_recorder, topology, duration, resol_s, n_prosumers):
+        n_steps = len(get_time_index(duration, resol_s)[2])
+        _warm_up(topology)
+
+        prosumers = []
+        build_s = measure_time(lambda: prosumers.extend(_build(topology, duration, resol_s, n_prosumers)))
+        run_s = measure_time(_run, prosumers)
+        for prosumer in prosumers:
+            assert len(prosumer.time_series)
+            for data_source in prosumer.time_series.data_source:
+                assert len(data_source.df) == n_steps
+
+        peak_mb = measure_peak_memory(_run, _build(topology, duration, resol_s, n_prosumers)) \
+            if GRID["memory"] else None
+
+        benchmark_recorder.record("prosumers-%s-%s-%s-%s" % (topology, duration, resol_s, n_prosumers),
+                                  n_steps=n_steps,
+                                  build_s=build_s,
+                                  run_s=run_s,
+                                  time_per_step_s=run_s / n_steps,
+                                  time_per_prosumer_step_s=run_s / n_steps / n_prosumers,
+                                  peak_run_memory_mb=peak_mb)
+
+    def test_import_time(self, benchmark_recorder):
+        import_s = measure_import_time("pandaprosumer")
+        assert import_s > 0
+        benchmark_recorder.record("import-pandaprosumer", import_s=import_s)
@@ -0,0 +1,264 @@
+"""
+Generator of synthetic district heating energy systems, shared by the tests and the benchmarks of the pandapipes
+coupling layer.
+
+The network is a ladder: a feed main and a return main along which N heat consumers (each with its demander
+bypass flow control) are connected. A single circulation pump closes the loop at the plant. Every heat consumer
+is coupled to a demander prosumer (Heat Exchanger -> Heat Demand) through a PandapipesConnectorController,
+and the plant is coupled to a producer prosumer (Heat Pump) through a ReadPipeProdControl,
+as in tests/network_balance.
+"""
+
+import sys
+from contextlib import contextmanager
+
+import numpy as np
+import pandapipes
+import pandas as pd
+
+from pandapower.timeseries.data_sources.frame_data import DFData
+from pandapower.timeseries.output_writer import OutputWriter
+
+from pandaprosumer import *
+from pandaprosumer.energy_system.control.controller import NetControllerData
+from pandaprosumer.energy_system.control.controller.coupling.heat_demand_energy_system import \
+    HeatDemandEnergySystemController
+from pandaprosumer.energy_system.control.controller.coupling.pandapipes_balance import PandapipesBalanceControl
+from pandaprosumer.energy_system.control.controller.coupling import pandapipes_balance
+from pandaprosumer.energy_system.control.controller.coupling.pandapipes_connector import \
+    PandapipesConnectorController
+from pandaprosumer.energy_system.control.controller.coupling.pandapipes_interface import ReadPipeProdControl
+from pandaprosumer.energy_system.control.controller.data_model.pandapipes_connector import \
+    PandapipesConnectorControllerData
+from pandaprosumer.energy_system.create_energy_system import create_empty_energy_system, add_net_to_energy_system, \
+    add_pandaprosumer_to_energy_system
+from pandaprosumer.mapping import GenericMapping, FluidMixMapping, FluidMixEnergySystemMapping, \
+    GenericEnergySystemMapping
+
+from tests.fixtures.topologies import get_time_index
+
+LEVEL_DMD = 1
+LEVEL_READ_PIPE_TO_PROD = 2
+LEVEL_PROD = 3
+ORDER_BALANCE_NET = -2
+ORDER_PP_CONNECTOR = -1
+ORDER_PROD_FAKE_DMD = 100
+
+
+def create_ladder_pandapipes_net(n_consumers, t_feed_prod_k=390, p_feed_prod_bar=10, p_return_prod_bar=5,
+                                 segment_length_km=.1, t_amb_k=293, n_plants=1):
+    """
+    Create a pandapipes network with a feed and a return main and n heat consumers in parallel between them
+
+    :param n_consumers: Number of heat consumers
+    :param n_plants: Number of plants. Each plant has its own circulation pump and mains (pressure zone), feeding
+        a contiguous block of heat consumers
+    :return: The pandapipes network. The index of the heat consumers and of their bypass flow controls are 0..n-1,
+        the zone of each heat consumer is given by its "_pandaprosumer_pump_id" attribute
+    """
+    net = pandapipes.create_empty_network(fluid="water", name='net_pipes')
+    pandapipes.set_user_pf_options(net, ambient_temperature=t_amb_k, mode='all')
+
+    consumers_junctions = []
+    for plant_consumers in np.array_split(np.arange(n_consumers), n_plants):
+        n_plant_consumers = len(plant_consumers)
+        # The main pipes are sized for the total mass flow at the plant
+        diameter_m = .05 * np.sqrt(max(n_plant_consumers, 1))
+        feed_junctions = pandapipes.create_junctions(net, n_plant_consumers + 1, pn_bar=p_feed_prod_bar,
+                                                     tfluid_k=350)
+        return_junctions = pandapipes.create_junctions(net, n_plant_consumers + 1, pn_bar=p_return_prod_bar,
+                                                       tfluid_k=350)
+        pandapipes.create_pipes_from_parameters(net, from_junctions=feed_junctions[:-1],
+                                                to_junctions=feed_junctions[1:], length_km=segment_length_km,
+                                                diameter_m=diameter_m, u_w_per_m2k=10, text_k=t_amb_k)
+        pandapipes.create_pipes_from_parameters(net, from_junctions=return_junctions[1:],
+                                                to_junctions=return_junctions[:-1], length_km=segment_length_km,
+                                                diameter_m=diameter_m, u_w_per_m2k=10, text_k=t_amb_k)
+
+        pump_id = pandapipes.create_circ_pump_const_pressure(
+            net, return_junctions[0], feed_junctions[0], p_flow_bar=p_feed_prod_bar,
+            plift_bar=p_feed_prod_bar - p_return_prod_bar, t_flow_k=t_feed_prod_k,
+            _pandaprosumer_max_t_pump_feed_k=100 + 273.15, _pandaprosumer_min_t_pump_feed_k=20 + 273.15,
+            _pandaprosumer_max_mdot_pump_kg_per_s=100 * max(n_plant_consumers, 1))
+        consumers_junctions += [(pump_id, feed_junction, return_junction)
+                                for feed_junction, return_junction in zip(feed_junctions[1:], return_junctions[1:])]
+
+    for pump_id, feed_junction, return_junction in consumers_junctions:
+        pandapipes.create_heat_consumer(net, from_junction=feed_junction, to_junction=return_junction,
+                                        qext_w=100e3, controlled_mdot_kg_per_s=1,
+                                        _pandaprosumer_max_mdot_dmd_kg_per_s=10000,
+                                        _pandaprosumer_min_mdot_dmd_kg_per_s=.05,
+                                        _pandaprosumer_min_t_dmd_return_k=10 + 273.15,
+                                        _pandaprosumer_pump_id=pump_id)
+    for _, feed_junction, return_junction in consumers_junctions:
+        pandapipes.create_flow_control(net, from_junction=feed_junction, to_junction=return_junction,
+                                       controlled_mdot_kg_per_s=.1, role="demander_bypass")
+    return net
+
+
+def create_demander_prosumer(duration, resol_s, seed=0, name="prosumer_dmd"):
+    """
+    Demander prosumer: ConstProfile -> Heat Exchanger -> Heat Demand, with a synthetic demand of 100 to 300 kW
+    """
+    prosumer = create_empty_prosumer_container(name=name, check_order=False)
+    start, end, time_index = get_time_index(duration, resol_s)
+    period = create_period(prosumer, resol_s, start, end, 'utc', 'default')
+    hours = (time_index.hour + time_index.minute / 60).to_numpy()
+    noise = np.random.RandomState(seed).uniform(-10, 10, len(time_index))
+    data = pd.DataFrame({"demand_1": 200 + 100 * np.sin(2 * np.pi * (hours - 6) / 24) + noise}, index=time_index)
+
+    cp_idx = create_controlled_const_profile(prosumer, ["demand_1"], ["demand_kw"], period, DFData(data), 0)
+    hx_idx = create_controlled_heat_exchanger(prosumer, period=period, level=LEVEL_DMD, order=0, t_1_in_nom_c=45,
+                                              t_1_out_nom_c=30, t_2_in_nom_c=20, t_2_out_nom_c=40,
+                                              mdot_2_nom_kg_per_s=3.58)
+    hd_idx = create_controlled_heat_demand(prosumer, period=period, level=LEVEL_DMD, order=1, t_in_set_c=40,
+                                           t_out_set_c=20)
+    GenericMapping(prosumer, cp_idx, "demand_kw", hd_idx, "q_demand_kw", order=0)
+    FluidMixMapping(prosumer, hx_idx, hd_idx, order=0)
+    return prosumer
+
+
+def create_producer_prosumer(duration, resol_s, name="prosumer_prod"):
+    """
+    Producer prosumer: ConstProfile -> Heat Pump
+    """
+    prosumer = create_empty_prosumer_container(name=name, check_order=False)
+    start, end, time_index = get_time_index(duration, resol_s)
+    period = create_period(prosumer, resol_s, start, end, 'utc', 'default')
+    data = pd.DataFrame({"Tin,evap": 11.}, index=time_index)
+
+    cp_idx = create_controlled_const_profile(prosumer, ["Tin,evap"], ["Tin,evap"], period, DFData(data), 0)
+    hp_idx = create_controlled_heat_pump(prosumer, period=period, level=LEVEL_PROD, order=0, carnot_efficiency=.5,
+                                         pinch_c=5, delta_t_evap_c=8, max_p_comp_kw=1000e3)
+    GenericMapping(prosumer, cp_idx, "Tin,evap", hp_idx, "t_evap_in_c", order=0)
+    return prosumer
+
+
+def create_district_heating_energy_system(n_consumers, duration="1d", resol_s=3600, tol=1., warm_start=True,
+                                          n_plants=1):
+    """
+    Create an energy system with a district heating network of n heat consumers, each one coupled to a demander
+    prosumer, and a producer prosumer coupled to the circulation pump
+
+    :param n_consumers: Number of heat consumers (and demander prosumers)
+    :param duration: Key of tests.fixtures.topologies.DURATIONS
+    :param resol_s: Time resolution [s]
+    :param tol: Tolerance of the PandapipesBalanceControl on the consumers feed temperatures [K]
+    :param warm_start: If True, the pipeflows of the PandapipesBalanceControl are warm-started
+    :param n_plants: Number of plants (circulation pumps) of the network, all controlled by the
+        PandapipesBalanceControl. Only the first one is coupled to the producer prosumer
+    :return: The energy system
+    """
+    start, end, time_index = get_time_index(duration, resol_s)
+    energy_system = create_empty_energy_system()
+    create_period(energy_system, resol_s, start, end, 'utc', 'default')
+
+    net = create_ladder_pandapipes_net(n_consumers, n_plants=n_plants)
+    OutputWriter(net, time_index, output_path=None,
+                 log_variables=[('res_junction', 't_k'),
+                                ('res_heat_consumer', 'mdot_from_kg_per_s'),
+                                ('res_circ_pump_pressure', 'mdot_from_kg_per_s')])
+    add_net_to_energy_system(energy_system, net, net_name='hydro')
+    pandapipes.pipeflow(net)
+
+    prosumer_prod = create_producer_prosumer(duration, resol_s)
+    add_pandaprosumer_to_energy_system(energy_system, prosumer_prod, pandaprosumer_name='prosumer_prod')
+
+    dmd_prosumers, connector_controllers = [], []
+    for i in range(n_consumers):
+        prosumer_dmd = create_demander_prosumer(duration, resol_s, seed=i, name="prosumer_dmd_%s" % i)
+        add_pandaprosumer_to_energy_system(energy_system, prosumer_dmd, pandaprosumer_name=prosumer_dmd.name)
+        connector = PandapipesConnectorController(prosumer_dmd, PandapipesConnectorControllerData(period_index=0),
+                                                  order=ORDER_PP_CONNECTOR, level=LEVEL_DMD,
+                                                  name='pandapipes_connector_controller')
+        hx_index = 1
+        FluidMixMapping(prosumer_dmd, connector.index, hx_index, order=0)
+        dmd_prosumers.append(prosumer_dmd)
+        connector_controllers.append(connector)
+
+    balance = PandapipesBalanceControl(net=net,
+                                       pandapipes_connector_controllers=connector_controllers,
+                                       hc_element_indexes=list(range(n_consumers)),
+                                       connector_prosumers=dmd_prosumers,
+                                       basic_prosumer_object=ConstProfileControllerData(input_columns=[],
+                                                                                        result_columns=[]),
+                                       pump_id=list(net.circ_pump_pressure.index) if n_plants > 1 else 0,
+                                       tol=tol,
+                                       warm_start=warm_start,
+                                       level=LEVEL_DMD,
+                                       name='net_temp_control',
+                                       order=ORDER_BALANCE_NET)
+    FluidMixEnergySystemMapping.create_many(net, [balance.index] * n_consumers,
+                                            [connector.index for connector in connector_controllers],
+                                            responder_net=dmd_prosumers, order=list(range(n_consumers)),
+                                            no_chain=False)
+
+    # Connect the plant to the producer prosumer through a demand acting as a network connector
+    heat_demand_index = create_heat_demand(prosumer_prod, t_in_set_c=76.85, t_out_set_c=30)
+    hd_controller = HeatDemandEnergySystemController(prosumer_prod,
+                                                     HeatDemandControllerData(element_name='heat_demand',
+                                                                              element_index=[heat_demand_index],
+                                                                              period_index=0),
+                                                     order=ORDER_PROD_FAKE_DMD,
+                                                     level=LEVEL_PROD,
+                                                     name='heat_demand_connector_controller')
+    hp_index = 1
+    FluidMixMapping(prosumer_prod, hp_index, hd_controller.index, order=0)
+
+    pump_data = NetControllerData(input_columns=[],
+                                  result_columns=['t_c', 'tfeed_c', 'mdot_kg_per_s'],
+                                  element_name='circ_pump_pressure',
+                                  element_index=[0])
+    read_control = ReadPipeProdControl(net, pump_data, level=LEVEL_READ_PIPE_TO_PROD)
+    GenericEnergySystemMapping(container=net, initiator_id=read_control.index,
+                               initiator_column=["t_c", "tfeed_c", "mdot_kg_per_s"],
+                               responder_net=prosumer_prod, responder_id=hd_controller.index,
+                               responder_column=["t_return_demand_c", "t_feed_demand_c", "mdot_demand_kg_per_s"],
+                               order=0)
+    return energy_system
+
+
+class PipeflowCounter:
+    """
+    Count the calls to pandapipes.pipeflow, wherever the function has been imported, and to the warm-started
+    pipeflow of the coupling controllers
+    """
+
+    def __init__(self):
+        self.count = 0
+
+
+@contextmanager
+def count_pipeflows():
+    """
+    Context manager counting the calls to pandapipes.pipeflow made in its block
+
+    :return: A PipeflowCounter
+    """
+    original = pandapipes.pipeflow
+    counter = PipeflowCounter()
+
+    def counted_pipeflow(*args, **kwargs):
+        counter.count += 1
+        return original(*args, **kwargs)
+
+    # The defining module is not patched since pandapipes inspects the signature of the function there
+    patched = [module for module in list(sys.modules.values())
+               if module is not None and getattr(module, "pipeflow", None) is original
+               and module.__name__ != original.__module__]
+    for module in patched:
+        module.pipeflow = counted_pipeflow
+
+    original_warm_start = pandapipes_balance.pipeflow_warm_start
+
+    def counted_pipeflow_warm_start(*args, **kwargs):
+        counter.count += 1
+        return original_warm_start(*args, **kwargs)
+
+    pandapipes_balance.pipeflow_warm_start = counted_pipeflow_warm_start
+    try:
+        yield counter
+    finally:
+        for module in patched:
+            module.pipeflow = original
+        pandapipes_balance.pipeflow_warm_start = original_warm_start
@@ -0,0 +1,131 @@
+"""
+Helpers shared by the unit tests: a prosumer with all the components, and the comparison of prosumers and of the
+results of their runs.
+"""
+
+import copy
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+from pandapipes import Fluid
+from pandapower.timeseries import DFData
+
+from pandaprosumer import *
+from pandaprosumer.mapping import GenericMapping, FluidMixMapping
+from pandaprosumer.run_time_series import run_timeseries
+
+from tests.data_sources.define_period import define_and_get_period_and_data_source
+
+
+def create_prosumer_with_all_components():
+    """
+    Prosumer with a controller of each component, on the period of tests/data_sources
+    """
+    prosumer = create_empty_prosumer_container(name="all_components")
+    period, data_source = define_and_get_period_and_data_source(prosumer)
+    create_controlled_const_profile(prosumer, ["Tin,evap"], ["t_evap_in_c"], period, data_source)
+    hp_index = create_controlled_heat_pump(prosumer, max_p_comp_kw=500, evap_fluid="air", period=period, order=1)
+    create_controlled_heat_pumps(prosumer, 2, max_p_comp_kw=[100, 200], period=period, order=1)
+    shs_index = create_controlled_stratified_heat_storage(prosumer, 10, .6, period=period, order=2)
+    create_controlled_heat_exchanger(prosumer, period=period, order=3)
+    create_controlled_electric_boiler(prosumer, max_p_kw=100, period=period, order=4)
+    create_controlled_gas_boiler(prosumer, max_q_kw=100, period=period, order=5)
+    create_controlled_dry_cooler(prosumer, n_nom_rpm=730, p_fan_nom_kw=9.38, qair_nom_m3_per_h=138200,
+                                 period=period, order=6)
+    create_controlled_booster_heat_pump(prosumer, hp_type="water-water1", period=period, order=7)
+    create_controlled_booster_heat_pump_sdewes(prosumer, hp_type="water-water1", period=period, order=8)
+    create_controlled_ice_chp(prosumer, size=350, fuel="ng", altitude=0, period=period, order=9)
+    create_controlled_chiller(prosumer, period=period, order=10)
+    create_controlled_heat_storage(prosumer, q_capacity_kwh=100, period=period, order=11)
+    dmd_index = create_controlled_heat_demand(prosumer, period=period, order=12)
+    GenericMapping(prosumer, 0, "t_evap_in_c", hp_index, "t_evap_in_c", order=0)
+    FluidMixMapping(prosumer, hp_index, shs_index, order=0)
+    FluidMixMapping(prosumer, shs_index, dmd_index, order=0)
+    return prosumer
+
+
+def assert_equal(value, other):
+    """
+    Assert that two values are equal, recursively for the containers. The values of other objects are not compared
+    """
+    assert type(value) is type(other)
+    if isinstance(value, np.ndarray):
+        assert np.array_equal(value, other, equal_nan=value.dtype.kind == "f")
+    elif isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        assert value.equals(other)
+    elif isinstance(value, DFData):
+        assert value.df.equals(other.df)
+    elif isinstance(value, Fluid):
+        assert value.name == other.name
+    elif isinstance(value, dict):
+        assert value.keys() == other.keys()
+        for key in value:
+            assert_equal(value[key], other[key])
+    elif isinstance(value, (list, tuple)):
+        assert len(value) == len(other)
+        for item, other_item in zip(value, other):
+            assert_equal(item, other_item)
+    elif dataclasses.is_dataclass(value):
+        assert_equal(dataclasses.asdict(value), dataclasses.asdict(other))
+    elif isinstance(value, float) and np.isnan(value):
+        assert np.isnan(other)
+    elif not hasattr(value, "__dict__"):
+        assert value == other
+
+
+def assert_same_prosumer(prosumer, other):
+    """
+    Assert that two prosumers have the same tables and controllers, except the runtime caches of the controllers
+    """
+    assert prosumer.keys() == other.keys()
+    for key, value in prosumer.items():
+        if key in ("controller", "mapping"):
+            assert_equal(value.drop(columns="object"), other[key].drop(columns="object"))
+            for obj, other_obj in zip(value.object, other[key].object):
+                assert type(obj) is type(other_obj)
+                excludes = set(getattr(obj, "json_excludes", [])) | {"responder_net"}
+                assert_equal({k: v for k, v in vars(obj).items() if k not in excludes},
+                             {k: v for k, v in vars(other_obj).items() if k not in excludes})
+        elif key != "comp_list":
+            assert_equal(value, other[key])
+
+
+def run_copy(prosumer, period_index=0, **kwargs):
+    """
+    Run a deep copy of a prosumer, the prosumer itself is not changed
+
+    :return: The copy of the prosumer, with the results of the run
+    """
+    prosumer = copy.deepcopy(prosumer)
+    run_timeseries(prosumer, period_index, verbose=False, **kwargs)
+    return prosumer
+
+
+def get_results(prosumer, period_index=None):
+    """
+    :return: The result DataFrames of the time_series table of a prosumer, of a period or of all the periods
+    """
+    time_series = prosumer.time_series
+    if period_index is not None:
+        time_series = time_series[time_series.period_index == period_index]
+    return [data_source.df for data_source in time_series.data_source]
+
+
+def max_result_difference(prosumer, other):
+    """
+    :return: The maximal absolute difference between the results of two prosumers
+    """
+    assert len(prosumer.time_series) == len(other.time_series)
+    return max(np.nanmax(np.abs(df.values - other_df.values))
+               for df, other_df in zip(get_results(prosumer), get_results(other)))
+
+
+def assert_same_results(prosumer, other):
+    """
+    Assert that two prosumers have the same results
+    """
+    assert len(prosumer.time_series) == len(other.time_series)
+    for df, other_df in zip(get_results(prosumer), get_results(other)):
+        assert np.allclose(df.values, other_df.values, equal_nan=True)
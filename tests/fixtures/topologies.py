@@ -0,0 +1,156 @@
+"""
+Builders of the canonical prosumer topologies of tests/integrations, for any duration and resolution.
+Shared by the unit tests and the benchmarks.
+
+The input profiles are synthetic (daily cycle plus deterministic noise) so any duration and resolution
+can be generated without reading data files.
+"""
+
+import numpy as np
+import pandas as pd
+
+from pandapower.timeseries.data_sources.frame_data import DFData
+
+from pandaprosumer import *
+from pandaprosumer.energy_system.create_energy_system import create_empty_energy_system, \
+    add_pandaprosumer_to_energy_system
+from pandaprosumer.mapping import GenericMapping, FluidMixMapping
+
+START = '2020-01-01 00:00:00'
+
+DURATIONS = {"1d": pd.Timedelta(days=1), "1y": pd.Timedelta(days=365)}
+
+
+def get_time_index(duration, resol_s, start=START):
+    """
+    :param duration: Key of DURATIONS ("1d", "1y")
+    :param resol_s: Time resolution [s]
+    :return: The start, end and time index of the period
+    """
+    end = pd.Timestamp(start) + DURATIONS[duration] - pd.Timedelta("00:00:01")
+    return start, end, pd.date_range(start, end, freq='%ss' % resol_s, tz='utc')
+
+
+def _daily_profile(time_index, base, amplitude, seed):
+    """
+    Daily sinusoidal profile with some deterministic noise
+    """
+    hours = (time_index.hour + time_index.minute / 60).to_numpy()
+    noise = np.random.RandomState(seed).uniform(-.1, .1, len(time_index))
+    return base + amplitude * (np.sin(2 * np.pi * (hours - 6) / 24) + noise)
+
+
+def create_hp_shs_demand_prosumer(duration="1d", resol_s=3600, seed=0, name="hp_shs_dmd"):
+    """
+    Heat Pump -> Stratified Heat Storage -> Heat Demand
+    (see test_1heatpump_1stratifiedheatstorage_1heatdemand_mapping.py)
+    """
+    prosumer = create_empty_prosumer_container(name=name)
+    start, end, time_index = get_time_index(duration, resol_s)
+    period = create_period(prosumer, resol_s, start, end, 'utc', 'default')
+    data = pd.DataFrame({"Tin_evap": 25.,
+                         "demand_1": np.clip(_daily_profile(time_index, 300, 300, seed), 0, None),
+                         "t_feed_demand_c": 80.,
+                         "t_return_demand_c": 20.}, index=time_index)
+
+    cp_idx = create_controlled_const_profile(prosumer, ["Tin_evap", "demand_1", "t_feed_demand_c", "t_return_demand_c"],
+                                             ["t_evap_in_c", "qdemand_kw", "t_feed_demand_c", "t_return_demand_c"],
+                                             period, DFData(data), 0, 0)
+    hp_idx = create_controlled_heat_pump(prosumer, period=period, level=1, order=0, carnot_efficiency=.5, pinch_c=0,
+                                         delta_t_evap_c=5, max_p_comp_kw=100)
+    shs_idx = create_controlled_stratified_heat_storage(prosumer, period=period, level=1, order=1,
+                                                        tank_height_m=10., tank_internal_radius_m=.564,
+                                                        tank_external_radius_m=.664, insulation_thickness_m=.1,
+                                                        n_layers=100, min_useful_temp_c=80, t_ext_c=20, max_dt_s=10)
+    hd_idx = create_controlled_heat_demand(prosumer, period=period, level=1, order=2, t_in_set_c=76.85,
+                                           t_out_set_c=30)
+
+    GenericMapping(prosumer, cp_idx, "t_evap_in_c", hp_idx, "t_evap_in_c", order=0)
+    GenericMapping(prosumer, cp_idx, ["qdemand_kw", "t_feed_demand_c", "t_return_demand_c"],
+                   hd_idx, ["q_demand_kw", "t_feed_demand_c", "t_return_demand_c"], order=0)
+    FluidMixMapping(prosumer, hp_idx, shs_idx, order=0)
+    FluidMixMapping(prosumer, shs_idx, hd_idx, order=0)
+    return prosumer
+
+
+def create_chp_bhp_storage_demand_prosumer(duration="1d", resol_s=3600, seed=0, name="chp_bhp_hs_dmd"):
+    """
+    ICE CHP -> Booster Heat Pump -> Heat Storage -> Heat Demand
+    (see test_chp_bhp_storage_demand_mapping.py)
+    """
+    prosumer = create_empty_prosumer_container(name=name)
+    start, end, time_index = get_time_index(duration, resol_s)
+    period = create_period(prosumer, resol_s, start, end, 'utc', 'default')
+    data = pd.DataFrame({"cycle": 1,
+                         "t_source_k": _daily_profile(time_index, 290, 10, seed),
+                         "demand": np.clip(_daily_profile(time_index, 300, 200, seed + 1), 0, None),
+                         "mode": 1,
+                         "t_intake_k": 273}, index=time_index)
+
+    cp_idx = create_controlled_const_profile(prosumer, ["cycle", "t_source_k", "demand", "mode", "t_intake_k"],
+                                             ["cycle_cp", "t_source_cp", "demand_cp", "mode_cp", "t_intake_cp"],
+                                             period, DFData(data), 0, 0)
+    chp_idx = create_controlled_ice_chp(prosumer, 350, 'ng', 0, level=0, order=1, period=period)
+    bhp_idx = create_controlled_booster_heat_pump(prosumer, "water-water1", level=0, order=2, period=period)
+    hs_idx = create_controlled_heat_storage(prosumer, q_capacity_kwh=5000, level=0, order=3, period=period)
+    hd_idx = create_controlled_heat_demand(prosumer, level=0, order=4, period=period)
+
+    GenericMapping(prosumer, cp_idx, ["cycle_cp", "t_intake_cp"], chp_idx, ["cycle", "t_intake_k"], order=0)
+    GenericMapping(prosumer, cp_idx, ["t_source_cp", "mode_cp"], bhp_idx, ["t_source_k", "mode"], order=0)
+    GenericMapping(prosumer, cp_idx, "demand_cp", hd_idx, "q_demand_kw", order=0)
+    GenericMapping(prosumer, chp_idx, ["p_el_out_kw", "p_th_out_kw"], bhp_idx, ["p_received_kw", "q_received_kw"],
+                   order=0)
+    GenericMapping(prosumer, bhp_idx, "q_floor", hs_idx, "q_received_kw", order=0)
+    GenericMapping(prosumer, hs_idx, "q_delivered_kw", hd_idx, "q_received_kw", order=0)
+    return prosumer
+
+
+def create_2hp_demand_prosumer(duration="1d", resol_s=3600, seed=0, name="2hp_dmd"):
+    """
+    2 Heat Pumps -> Heat Demand
+    (see test_2heatpumps_1heatdemand_mapping.py)
+    """
+    prosumer = create_empty_prosumer_container(name=name)
+    start, end, time_index = get_time_index(duration, resol_s)
+    period = create_period(prosumer, resol_s, start, end, 'utc', 'default')
+    data = pd.DataFrame({"Tin_evap": _daily_profile(time_index, 20, 5, seed),
+                         "demand_1": np.clip(_daily_profile(time_index, 250, 250, seed + 1), 0, None)},
+                        index=time_index)
+
+    cp_idx = create_controlled_const_profile(prosumer, ["Tin_evap", "demand_1"], ["t_evap_in_c", "qdemand_kw"],
+                                             period, DFData(data), 0, 0)
+    hp_params = {'carnot_efficiency': .5, 'pinch_c': 0, 'delta_t_evap_c': 5, 'max_p_comp_kw': 100}
+    hp_idx_1 = create_controlled_heat_pump(prosumer, period=period, level=1, order=0, **hp_params)
+    hp_idx_2 = create_controlled_heat_pump(prosumer, period=period, level=1, order=1, **hp_params)
+    hd_idx = create_controlled_heat_demand(prosumer, period=period, level=1, order=2, t_in_set_c=76.85,
+                                           t_out_set_c=30)
+
+    GenericMapping(prosumer, cp_idx, "t_evap_in_c", hp_idx_1, "t_evap_in_c", order=0)
+    GenericMapping(prosumer, cp_idx, "t_evap_in_c", hp_idx_2, "t_evap_in_c", order=1)
+    GenericMapping(prosumer, cp_idx, "qdemand_kw", hd_idx, "q_demand_kw", order=2)
+    FluidMixMapping(prosumer, hp_idx_1, hd_idx, order=0)
+    FluidMixMapping(prosumer, hp_idx_2, hd_idx, order=0)
+    return prosumer
+
+
+TOPOLOGIES = {"hp_shs_dmd": create_hp_shs_demand_prosumer,
+              "chp_bhp_hs_dmd": create_chp_bhp_storage_demand_prosumer,
+              "2hp_dmd": create_2hp_demand_prosumer}
+
+
+def create_energy_system_of_prosumers(topology, n_prosumers, duration="1d", resol_s=3600):
+    """
+    Create an energy system with n independent prosumers of the same topology
+
+    :param topology: Key of TOPOLOGIES
+    :param n_prosumers: Number of prosumers
+    :return: The energy system
+    """
+    energy_system = create_empty_energy_system()
+    start, end, _ = get_time_index(duration, resol_s)
+    create_period(energy_system, resol_s, start, end, 'utc', 'default')
+    for i in range(n_prosumers):
+        name = "%s_%s" % (topology, i)
+        prosumer = TOPOLOGIES[topology](duration, resol_s, seed=i, name=name)
+        add_pandaprosumer_to_energy_system(energy_system, prosumer, pandaprosumer_name=name)
+    return energy_system
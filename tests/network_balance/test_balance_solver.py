@@ -0,0 +1,101 @@
+import numpy as np
+
+from pandaprosumer.constants import CELSIUS_TO_K
+from pandaprosumer.energy_system.control.controller.coupling import pandapipes_balance
+from pandaprosumer.energy_system.control.controller.coupling.pandapipes_balance import PandapipesBalanceControl, \
+    pipeflow_warm_start, get_warm_start
+from pandaprosumer.energy_system.timeseries.run_time_series_energy_system import run_timeseries
+
+from tests.fixtures.district_heating import create_district_heating_energy_system, count_pipeflows, \
+    create_ladder_pandapipes_net
+
+
+class TestBalanceSolver:
+    """
+    Tests the outer solver of the PandapipesBalanceControl on a network with several heat consumers
+    """
+
+    def test_consumers_temperatures(self):
+        energy_system = create_district_heating_energy_system(5, "1d", 6 * 3600, tol=.5)
+        net = energy_system["nets"]["hydro"]
+        balance = [ctrl for ctrl in net.controller.object if isinstance(ctrl, PandapipesBalanceControl)][0]
+
+        with count_pipeflows() as counter:
+            run_timeseries(energy_system, 0, verbose=False)
+
+        error_k = (net.res_heat_consumer.t_from_k - net.heat_consumer._pandaprosumer_t_feed_c - CELSIUS_TO_K).values
+        assert np.all(np.abs(error_k) <= balance.tol)
+        assert 0 < balance.iterations <= balance.max_iter
+        # One pipeflow per outer iteration
+        assert balance.pipeflow_calls == balance.iterations
+        # Far less than the 50 pipeflows per consumer loop of the fixed increments scheme
+        assert counter.count < 100
+        assert np.all(net.flow_control.controlled_mdot_kg_per_s >= .05)
+        assert net.circ_pump_pressure.t_flow_k.iloc[0] >= net.heat_consumer._pandaprosumer_t_feed_c.max() + CELSIUS_TO_K
+
+    def test_warm_start(self):
+        results = dict()
+        for warm_start in [False, True]:
+            energy_system = create_district_heating_energy_system(3, "1d", 6 * 3600, tol=.5, warm_start=warm_start)
+            net = energy_system["nets"]["hydro"]
+            balance = [ctrl for ctrl in net.controller.object if isinstance(ctrl, PandapipesBalanceControl)][0]
+            run_timeseries(energy_system, 0, verbose=False)
+            assert (balance._warm_start is not None) == warm_start
+            results[warm_start] = net.res_heat_consumer.t_from_k.values
+
+        # The initial guess does not change the solution
+        assert np.allclose(results[False], results[True], atol=.1)
+
+    def test_without_warm_start(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("pipeflow_warm_start called without warm start")
+        monkeypatch.setattr(pandapipes_balance, "pipeflow_warm_start", fail)
+        energy_system = create_district_heating_energy_system(3, "1d", 6 * 3600, tol=.5, warm_start=False)
+        net = energy_system["nets"]["hydro"]
+        balance = [ctrl for ctrl in net.controller.object if isinstance(ctrl, PandapipesBalanceControl)][0]
+
+        with count_pipeflows() as counter:
+            run_timeseries(energy_system, 0, verbose=False)
+
+        # All the pipeflows are run by pandapipes.pipeflow
+        assert counter.count > 0
+        assert balance._warm_start is None
+
+    def test_warm_start_unsupported_version(self, monkeypatch):
+        monkeypatch.setattr(pandapipes_balance, "WARM_START_SUPPORTED", False)
+        energy_system = create_district_heating_energy_system(3, "1d", 6 * 3600, tol=.5, warm_start=True)
+        net = energy_system["nets"]["hydro"]
+        balance = [ctrl for ctrl in net.controller.object if isinstance(ctrl, PandapipesBalanceControl)][0]
+        assert not balance.warm_start
+
+        run_timeseries(energy_system, 0, verbose=False)
+        assert balance._warm_start is None
+
+    def test_pipeflow_warm_start(self):
+        net = create_ladder_pandapipes_net(3)
+        assert not pipeflow_warm_start(net, mode="hydraulics")
+        cold_iterations = net._internal_results["iterations_hydraulics"]
+        res_junction = net.res_junction.copy()
+
+        assert pipeflow_warm_start(net, get_warm_start(net), mode="hydraulics")
+        assert net._internal_results["iterations_hydraulics"] < cold_iterations
+        assert np.allclose(net.res_junction.values, res_junction.values, rtol=1e-3)
+
+    def test_several_pumps(self):
+        energy_system = create_district_heating_energy_system(4, "1d", 6 * 3600, tol=.5, n_plants=2)
+        net = energy_system["nets"]["hydro"]
+        balance = [ctrl for ctrl in net.controller.object if isinstance(ctrl, PandapipesBalanceControl)][0]
+        assert len(net.circ_pump_pressure) == 2
+
+        run_timeseries(energy_system, 0, verbose=False)
+
+        error_k = (net.res_heat_consumer.t_from_k - net.heat_consumer._pandaprosumer_t_feed_c - CELSIUS_TO_K).values
+        assert np.all(np.abs(error_k) <= balance.tol)
+        # Each pump supplies the consumers of its zone
+        for pump_id, pump in net.circ_pump_pressure.iterrows():
+            zone = net.heat_consumer._pandaprosumer_pump_id == pump_id
+            assert zone.sum() == 2
+            assert pump.t_flow_k >= net.heat_consumer._pandaprosumer_t_feed_c[zone].max() + CELSIUS_TO_K
+            mdot_zone_kg_per_s = (net.res_heat_consumer.mdot_from_kg_per_s[zone].sum() +
+                                  net.res_flow_control.mdot_from_kg_per_s[zone].sum())
+            assert np.isclose(net.res_circ_pump_pressure.mdot_from_kg_per_s[pump_id], mdot_zone_kg_per_s, rtol=1e-3)
@@ -0,0 +1,16 @@
+import io, pickle
+import pandaprosumer.file_io as fio
+from pandaprosumer import *
+from tests.fixtures.prosumers import create_prosumer_with_all_components, run_copy
+from tests.fixtures.topologies import TOPOLOGIES
+seen=set()
+orig=fio._RestrictedUnpickler.find_class
+def fc(self,m,n):
+    seen.add((m,n)); return orig(self,m,n)
+fio._RestrictedUnpickler.find_class=fc
+ps=[create_prosumer_with_all_components()]+[run_copy(f("1d",3600)) for f in TOPOLOGIES.values()]
+p=create_empty_prosumer_container(); p.fluid.add_property("viscosity_copy", p.fluid.all_properties["viscosity"]); ps.append(p)
+pol=TOPOLOGIES["2hp_dmd"]("1d",3600); set_result_policy(pol, ResultPolicy(7200,"max")); ps.append(run_copy(pol))
+for p in ps:
+    b=io.BytesIO(); to_binary(p,b); b.seek(0); from_binary(b)
+for x in sorted(seen): print(x)
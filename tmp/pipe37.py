@@ -0,0 +1,16 @@
+import logging, time, sys
+import numpy as np
+from pandaprosumer.energy_system.timeseries import run_time_series_energy_system as rts
+from tests.fixtures.district_heating import create_district_heating_energy_system
+logging.basicConfig()
+rts.logger.setLevel(logging.INFO)
+def res(es):
+    return {(n, r.element): r.data_source.df.values for n, p in es.prosumer.items() for _, r in p.time_series.iterrows()}
+ref = create_district_heating_energy_system(3, "1d", 6 * 3600)
+rts.run_timeseries(ref, 0, verbose=False)
+for tol in [0, .01, .05]:
+    es = create_district_heating_energy_system(3, "1d", 6 * 3600)
+    t = time.time()
+    rts.run_timeseries(es, 0, verbose=False, n_jobs=2, pipeline=True, pipeline_tol=tol)
+    r, rr = res(es), res(ref)
+    print(tol, time.time() - t, max(np.nanmax(np.abs(r[k] - rr[k]) / np.maximum(np.abs(rr[k]), 1)) for k in rr))
@@ -0,0 +1,11 @@
+import numpy as np
+from pandaprosumer.energy_system.control import partitioned_prosumers as pp
+from pandaprosumer.energy_system.timeseries import run_time_series_energy_system as rts
+from tests.fixtures.district_heating import create_district_heating_energy_system
+orig = pp.PartitionedProsumers.speculation_statistics
+def stats(self):
+    r = orig(self); print("stats", r); return r
+pp.PartitionedProsumers.speculation_statistics = stats
+for tol in [0, .01, .02, .05]:
+    es = create_district_heating_energy_system(3, "1d", 6 * 3600)
+    rts.run_timeseries(es, 0, verbose=False, n_jobs=2, pipeline=True, pipeline_tol=tol)
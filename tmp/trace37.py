@@ -0,0 +1,13 @@
+from pandaprosumer.energy_system.control import partitioned_prosumers as pp
+from pandaprosumer.energy_system.timeseries.run_time_series_energy_system import run_timeseries
+from tests.fixtures.district_heating import create_district_heating_energy_system
+orig = pp.PartitionedProsumers.call
+def call(self, command, *args, **kw):
+    ws = kw.get('workers')
+    entries = {w: list(self.endpoint.outboxes.get(w, [])) for w in range(len(self.partitions))}
+    res = orig(self, command, *args, **kw)
+    print(command, args, {k: v for k, v in kw.items() if v}, entries)
+    return res
+pp.PartitionedProsumers.call = call
+es = create_district_heating_energy_system(3, "1d", 6 * 3600)
+run_timeseries(es, 0, verbose=False, n_jobs=2)
@@ -0,0 +1,13 @@
+import numpy as np
+from pandaprosumer.energy_system.control import partitioned_prosumers as pp
+from pandaprosumer.energy_system.timeseries.run_time_series_energy_system import run_timeseries
+from tests.fixtures.district_heating import create_district_heating_energy_system
+orig = pp._BoundaryEndpoint.receive
+def receive(self, entries):
+    if entries and len(self.receivers) and all(s in self.receivers for s, _ in entries):
+        print("recv", [(s, np.round(self.buffer[s:s + self.receivers[s][0].size], 4).tolist()) for s, _ in entries],
+              "demands", np.round(self.buffer[7:16], 4).tolist(), flush=True)
+    return orig(self, entries)
+pp._BoundaryEndpoint.receive = receive
+es = create_district_heating_energy_system(3, "1d", 6 * 3600)
+run_timeseries(es, 0, verbose=False, n_jobs=2)